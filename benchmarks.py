@@ -0,0 +1,636 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Benchmarks of the tree operations, on both kinds of tree.
+
+Every operation is timed on a QuadTree and a TwoDTree holding n players, for
+every n in SIZES and every point distribution in DISTRIBUTIONS, each a
+scenario of scenarios.py:
+    uniform: points spread evenly over the field.
+    clustered: points in a few tight Gaussian clusters.
+    sorted: uniform points inserted in increasing order, which makes a
+    TwoDTree built by single inserts degenerate into a list.
+    adversarial: pairs of points one step apart inserted in increasing
+    order, which forces a QuadTree to split as deep as it can for every
+    pair and still degenerates a TwoDTree.
+
+Every case reports the operations per second of every operation and the
+bytes the tree takes, as measured by tracemalloc. Each operation stops once
+it has run for <budget> seconds, so the quadratic cases finish; such a case
+is marked incomplete, and one that raises (a RecursionError from a
+degenerate tree, say) records the error instead of a rate. A TwoDTree is
+only balanced up to BALANCE_LIMIT players.
+
+The game benchmarks play every game mode in GAME_MODES on both fields, at
+every size in GAME_SIZES, from a fixed seed, for GAME_TICKS ticks of the
+Simulator's tick loop (decide, move, collide, resolve, winner). Each reports
+ticks per second, milliseconds per tick in every phase, the peak resident
+set size of the process, and the bytes allocated per tick by tracemalloc
+over the first ALLOC_TICKS ticks of the same game played again. Each game
+is played in a fresh process, so that its peak RSS is its own.
+
+The events benchmarks play the same games at every size in EVENT_SIZES for
+EVENT_TICKS ticks, once without an event log and once with one in each
+format, and report what logging costs as a fraction of the tick time of
+the game played without it: the extra time the tick loop spends outside its
+phases, where moves and direction changes are emitted, and in the resolve
+phase, where collisions are, plus the CPU time of the writer thread. Timing
+the logged and unlogged games end to end and subtracting would drown that
+cost in the noise of the tree phases. A cost over LOG_BUDGET is marked.
+
+Results are saved as a JSON baseline, and a later run is compared against
+one: a rate that fell, or a size that grew, by more than the threshold is
+reported as a regression.
+
+Run python benchmarks.py --help for the command line.
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import scenarios
+from events import EventLog
+from simulator import PHASES, Simulator
+from tournament import FIELDS, MODES, make_game
+from trees import OutOfBoundsError, QuadTree, TwoDTree
+try:
+    import resource
+except ImportError:
+    # There is no resource module on Windows, so no peak RSS either.
+    resource = None
+
+SIZES = (100, 1000, 10000, 100000)
+DISTRIBUTIONS = ('uniform', 'clustered', 'sorted', 'adversarial')
+OPERATIONS = ('insert', 'remove', 'move_point', 'names_in_range',
+              'contains_point', 'balance')
+BACKENDS = ('QuadTree', 'TwoDTree')
+
+# The most queries timed for the operations that do not build the tree.
+QUERIES = 10000
+
+GAME_SIZES = (100, 500, 2000)
+GAME_TICKS = 100
+
+# The number of ticks played under tracemalloc to count allocations.
+ALLOC_TICKS = 10
+
+# The sizes and length of the games played for the events benchmarks, and
+# the most that logging them should cost, as a fraction of tick time.
+EVENT_SIZES = (10000,)
+EVENT_TICKS = 10
+LOG_BUDGET = 0.05
+
+# The settings every benchmarked game is played with. The duration is long
+# enough that tag and zombie tag keep going for every tick benchmarked.
+GAME_CONFIG = {'duration': 10 ** 6, 'max_speed': 5, 'max_vision': 30}
+
+# The results in which a larger number is better; in every other result
+# compared, a smaller number is.
+FASTER = ('ops_per_sec', 'ticks_per_sec')
+SMALLER = ('bytes', 'peak_rss', 'alloc_bytes_per_tick')
+
+# The largest tree balance is timed on. One balance cannot be stopped once it
+# has started, and it is quadratic: a few seconds at 10000 players.
+BALANCE_LIMIT = 10000
+
+# The default fraction by which a result may get worse before it counts as a
+# regression.
+THRESHOLD = 0.2
+
+Point = Tuple[int, int]
+Result = Dict[str, Union[int, float, bool, str, None]]
+
+
+def field_size(n: int) -> int:
+    """ Return the side of the square field used for <n> players: the
+    field the games use, grown so that it is never more than a sixteenth
+    full.
+
+    >>> field_size(100), field_size(100000)
+    (500, 1264)
+    """
+    return max(500, 4 * math.isqrt(n))
+
+
+def make_tree(backend: str, side: int) -> Union[QuadTree, TwoDTree]:
+    """ Return an empty tree of <backend> covering a square field of side
+    <side>.
+
+    >>> make_tree('QuadTree', 500).bounds()
+    ((0, 0), (500, 500))
+    """
+    if backend == 'QuadTree':
+        return QuadTree((side // 2, side // 2))
+    return TwoDTree((0, 0), (side, side))
+
+
+def points(distribution: str, n: int, side: int, seed: int = 0) \
+        -> List[Point]:
+    """ Return the scenario of <n> different points of <distribution> in the
+    square field of side <side>, in the order they are inserted.
+
+    >>> points('sorted', 50, 500) == scenarios.points('sorted', 50, 500)
+    True
+    """
+    return scenarios.points(distribution, n, side, seed)
+
+
+def _time(operation: Callable[[object], object], arguments: List[object],
+          budget: float) -> Result:
+    """ Return the rate at which <operation> runs on every argument in
+    <arguments> in turn, stopping once <budget> seconds have passed. """
+    clock = time.perf_counter
+    done = 0
+    start = clock()
+    elapsed = 0.0
+    try:
+        for argument in arguments:
+            operation(argument)
+            done += 1
+            if done & 63 == 0:
+                elapsed = clock() - start
+                if elapsed > budget:
+                    break
+        elapsed = clock() - start
+    except RecursionError as error:
+        return {'ops': done, 'seconds': clock() - start,
+                'ops_per_sec': None, 'complete': False,
+                'error': type(error).__name__}
+    return {'ops': done, 'seconds': elapsed,
+            'ops_per_sec': done / elapsed if elapsed else None,
+            'complete': done == len(arguments)}
+
+
+def tree_bytes(backend: str, side: int, ps: List[Point]) -> int:
+    """ Return the bytes allocated by a tree of <backend> holding <ps>.
+
+    Both kinds of tree have one node per player whatever order players are
+    inserted in, and a QuadTree has the same shape for the same points, so
+    the tree is built with a single insert_many.
+    """
+    items = [('p' + str(i), point) for i, point in enumerate(ps)]
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = make_tree(backend, side)
+    tree.insert_many(items)
+    used = tracemalloc.get_traced_memory()[0] - before
+    if not tracing:
+        tracemalloc.stop()
+    del tree
+    return used
+
+
+def bench_case(backend: str, distribution: str, n: int,
+               operations: Tuple[str, ...] = OPERATIONS, seed: int = 0,
+               budget: float = 2.0) -> Dict[str, Result]:
+    """ Return the result of every operation in <operations> on a tree of
+    <backend> holding <n> players of <distribution>, and the bytes the tree
+    takes under 'memory'.
+
+    The tree is built by inserting the players one at a time, and each
+    operation then runs on the tree the one before it left behind.
+
+    >>> case = bench_case('QuadTree', 'uniform', 50, budget=0.5)
+    >>> sorted(case)
+    ['balance', 'contains_point', 'insert', 'memory', 'move_point', \
+'names_in_range', 'remove']
+    >>> case['insert']['ops'], case['insert']['complete']
+    (50, True)
+    >>> case['balance'] is None
+    True
+    """
+    side = field_size(n)
+    ps = points(distribution, n, side, seed)
+    names = {point: 'p' + str(i) for i, point in enumerate(ps)}
+    rng = random.Random(seed + 1)
+    tree = make_tree(backend, side)
+    results = {}
+
+    # The tree is needed by every other operation, so it is finished with
+    # insert_many if the single inserts run out of time.
+    results['insert'] = _time(lambda point: tree.insert(names[point], point),
+                              ps, budget)
+    if not results['insert']['complete']:
+        tree = make_tree(backend, side)
+        tree.insert_many([(names[point], point) for point in ps])
+
+    # The players are tracked by location, as the games track them.
+    locations = list(ps)
+    queries = min(n, QUERIES)
+
+    if 'contains_point' in operations:
+        probes = [rng.choice(locations) if i % 2 else
+                  (rng.randint(0, side), rng.randint(0, side))
+                  for i in range(queries)]
+        results['contains_point'] = _time(tree.contains_point, probes,
+                                          budget)
+
+    if 'names_in_range' in operations:
+        ranges = [(rng.choice(locations), rng.choice(('NE', 'NW', 'SE', 'SW')))
+                  for _ in range(queries)]
+        results['names_in_range'] = _time(
+            lambda query: tree.names_in_range(query[0], query[1], 25),
+            ranges, budget)
+
+    if 'move_point' in operations:
+        moves = [(rng.randrange(len(locations)),
+                  rng.choice(('N', 'S', 'E', 'W')), rng.randint(1, 5))
+                 for _ in range(queries)]
+
+        def move(move_: Tuple[int, str, int]) -> None:
+            i, direction, steps = move_
+            try:
+                new = tree.move_point(locations[i], direction, steps)
+            except OutOfBoundsError:
+                return
+            if new is not None:
+                locations[i] = new
+
+        results['move_point'] = _time(move, moves, budget)
+
+    if 'balance' in operations:
+        results['balance'] = None
+        if hasattr(tree, 'balance') and n > BALANCE_LIMIT:
+            results['balance'] = {'ops': 0, 'seconds': 0.0,
+                                  'ops_per_sec': None, 'complete': False,
+                                  'error': 'skipped'}
+        elif hasattr(tree, 'balance'):
+            results['balance'] = _time(lambda _: tree.balance(), [None],
+                                       budget)
+
+    if 'remove' in operations:
+        # A move keeps the player's name, so the names are those the tree
+        # was built with, in the order their players now sit.
+        gone = [names[ps[i]] for i in rng.sample(range(n), queries)]
+        results['remove'] = _time(tree.remove, gone, budget)
+
+    for operation in OPERATIONS:
+        if operation not in operations:
+            results.pop(operation, None)
+    used = tree_bytes(backend, side, ps)
+    results['memory'] = {'bytes': used, 'bytes_per_player': used / n}
+    return results
+
+
+def run(sizes: Tuple[int, ...] = SIZES,
+        distributions: Tuple[str, ...] = DISTRIBUTIONS,
+        backends: Tuple[str, ...] = BACKENDS,
+        operations: Tuple[str, ...] = OPERATIONS, seed: int = 0,
+        budget: float = 2.0,
+        report: Optional[Callable[[str, Result], None]] = None) \
+        -> Dict[str, object]:
+    """ Run every case and return a baseline: the results keyed by
+    'backend/distribution/n/operation', and the machine they ran on. Each
+    result is passed to <report> as soon as it is known, if given. """
+    results = {}
+    for n in sizes:
+        for distribution in distributions:
+            for backend in backends:
+                case = bench_case(backend, distribution, n, operations, seed,
+                                  budget)
+                for operation, result in case.items():
+                    key = '/'.join((backend, distribution, str(n),
+                                    operation))
+                    results[key] = result
+                    if report is not None:
+                        report(key, result)
+    return {'machine': machine(), 'seed': seed, 'budget': budget,
+            'results': results}
+
+
+def peak_rss() -> Optional[int]:
+    """ Return the most bytes this process has had resident in memory so
+    far, or None where that cannot be known. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux counts kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def bench_game(mode: str, field: str, n: int, ticks: int = GAME_TICKS,
+               seed: int = 0, scenario: Optional[str] = None) -> Result:
+    """ Return the throughput of a game of <mode> on <field> with <n>
+    players, seeded with <seed>, over its first <ticks> ticks (or until it
+    ends). Players spawn from the <scenario> seeded with <seed> if it is
+    not None.
+
+    >>> result = bench_game('zombie', 'quadtree', 20, ticks=5)
+    >>> result['ticks'], result['ticks_per_sec'] > 0
+    (5, True)
+    >>> sorted(PHASES) == sorted(key[:-3] for key in result
+    ...                          if key.endswith('_ms') and key != 'tick_ms')
+    True
+    """
+    config = dict(GAME_CONFIG, mode=mode, field=field, n_players=n,
+                  scenario=scenario, scenario_seed=seed)
+    random.seed(seed)
+    start = time.perf_counter()
+    game = make_game(config)
+    build = time.perf_counter() - start
+    players = len(game.get_players())
+    sim = Simulator(game)
+    blocks = sys.getallocatedblocks()
+    sim.run(max_ticks=ticks)
+    played = max(sim.tick, 1)
+    result = {'players': players, 'ticks': sim.tick, 'finished': sim.finished,
+              'build_seconds': build,
+              'ticks_per_sec': sim.ticks_per_second(),
+              'tick_ms': 1000 * sim.wall_time / played}
+    for phase in PHASES:
+        result[phase + '_ms'] = 1000 * sim.phase_times[phase] / played
+    result['blocks_per_tick'] = (sys.getallocatedblocks() - blocks) / played
+    result['peak_rss'] = peak_rss()
+
+    # The same game again, with every allocation traced: the peak over what
+    # was allocated when a tick started is what that tick allocated.
+    random.seed(seed)
+    sim = Simulator(make_game(config))
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    allocated = 0
+    while not sim.finished and sim.tick < min(ticks, ALLOC_TICKS):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        sim.step()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    if not tracing:
+        tracemalloc.stop()
+    result['alloc_bytes_per_tick'] = allocated / max(sim.tick, 1)
+    return result
+
+
+def run_games(sizes: Tuple[int, ...] = GAME_SIZES,
+              modes: Tuple[str, ...] = MODES,
+              fields: Tuple[str, ...] = FIELDS, ticks: int = GAME_TICKS,
+              seed: int = 0, isolate: bool = True,
+              report: Optional[Callable[[str, Result], None]] = None,
+              scenario: Optional[str] = None) -> Dict[str, object]:
+    """ Benchmark every game and return a baseline: the results keyed by
+    'game/mode/field/n', followed by '/<scenario>' if players spawn from
+    <scenario>, and the machine they ran on. Every game is played in a fresh
+    process if <isolate> is True. Each result is passed to <report> as soon
+    as it is known, if given. """
+    results = {}
+    for n in sizes:
+        for mode in modes:
+            for field in fields:
+                arguments = (mode, field, n, ticks, seed, scenario)
+                if isolate:
+                    with ProcessPoolExecutor(
+                            1, mp_context=get_context('spawn')) as executor:
+                        result = executor.submit(bench_game,
+                                                 *arguments).result()
+                else:
+                    result = bench_game(*arguments)
+                key = '/'.join(('game', mode, field, str(n)))
+                if scenario is not None:
+                    key += '/' + scenario
+                results[key] = result
+                if report is not None:
+                    report(key, result)
+    return {'machine': machine(), 'seed': seed, 'ticks': ticks,
+            'results': results}
+
+
+def bench_events(mode: str, field: str, n: int, ticks: int = EVENT_TICKS,
+                 seed: int = 0, binary: bool = False) -> Result:
+    """ Return what logging the events of a game of <mode> on <field> with
+    <n> players, seeded with <seed>, costs over its first <ticks> ticks, in
+    the binary format if <binary> is True and as JSON lines otherwise.
+
+    >>> result = bench_events('zombie', 'quadtree', 30, ticks=3)
+    >>> result['records'] > 0, result['log_overhead'] >= 0
+    (True, True)
+    """
+    config = dict(GAME_CONFIG, mode=mode, field=field, n_players=n)
+    emitting = []
+    for logged in (False, True):
+        random.seed(seed)
+        game = make_game(config)
+        if logged:
+            path = os.path.join(tempfile.mkdtemp(), 'events.log')
+            log = EventLog(path, binary)
+            sim = Simulator(game, events=log)
+        else:
+            sim = Simulator(game)
+        sim.run(max_ticks=ticks)
+        emitting.append(sim.wall_time - sum(sim.phase_times.values()) +
+                        sim.phase_times['resolve'])
+        if not logged:
+            plain = sim.wall_time
+    log.close()
+    played = max(sim.tick, 1)
+    emit = max(emitting[1] - emitting[0], 0.0)
+    overhead = (emit + log.write_seconds) / plain if plain else 0.0
+    result = {'players': len(game.get_players()), 'ticks': sim.tick,
+              'records': log.records, 'bytes': os.path.getsize(path),
+              'tick_ms': 1000 * plain / played,
+              'emit_ms': 1000 * emit / played,
+              'write_ms': 1000 * log.write_seconds / played,
+              'log_overhead': overhead,
+              'within_budget': overhead <= LOG_BUDGET}
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    return result
+
+
+def run_events(sizes: Tuple[int, ...] = EVENT_SIZES,
+               modes: Tuple[str, ...] = MODES,
+               fields: Tuple[str, ...] = FIELDS,
+               ticks: int = EVENT_TICKS, seed: int = 0,
+               report: Optional[Callable[[str, Result], None]] = None) \
+        -> Dict[str, object]:
+    """ Benchmark logging every game in both formats and return a baseline:
+    the results keyed by 'events/mode/field/n/format', and the machine they
+    ran on. Each result is passed to <report> as soon as it is known, if
+    given. """
+    results = {}
+    for n in sizes:
+        for mode in modes:
+            for field in fields:
+                for binary in (False, True):
+                    result = bench_events(mode, field, n, ticks, seed, binary)
+                    key = '/'.join(('events', mode, field, str(n),
+                                    'binary' if binary else 'jsonl'))
+                    results[key] = result
+                    if report is not None:
+                        report(key, result)
+    return {'machine': machine(), 'seed': seed, 'ticks': ticks,
+            'results': results}
+
+
+def machine() -> Dict[str, str]:
+    """ Return a description of the machine and Python running this. """
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'processor': platform.processor()}
+
+
+def save(baseline: Dict[str, object], path: str) -> None:
+    """ Write <baseline> to the JSON file at <path>. """
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=1, sort_keys=True)
+
+
+def load(path: str) -> Dict[str, object]:
+    """ Return the baseline saved in the JSON file at <path>. """
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object],
+            threshold: float = THRESHOLD) -> List[Dict[str, object]]:
+    """ Return every regression of <current> against <baseline>: a rate in
+    FASTER that fell, or a size in SMALLER that grew, by more than
+    <threshold> as a fraction of the baseline. An operation that completed
+    in the baseline but not in <current> is a regression too. Results
+    missing from either, or unknown in the baseline, are skipped.
+
+    >>> old = {'results': {'a': {'ops_per_sec': 100.0, 'complete': True},
+    ...                    'b': {'bytes': 1000}}}
+    >>> new = {'results': {'a': {'ops_per_sec': 70.0, 'complete': True},
+    ...                    'b': {'bytes': 1100}}}
+    >>> [(row['key'], row['metric']) for row in compare(old, new)]
+    [('a', 'ops_per_sec')]
+    >>> compare(old, new, threshold=0.5)
+    []
+    """
+    regressions = []
+    old_results = baseline['results']
+    for key, new in current['results'].items():
+        old = old_results.get(key)
+        if not old or not new:
+            continue
+        for metric in FASTER + SMALLER:
+            if old.get(metric) is None:
+                continue
+            if new.get(metric) is None or \
+                    old.get('complete') and not new.get('complete', True):
+                worse = True
+            elif metric in FASTER:
+                worse = new[metric] < old[metric] * (1 - threshold)
+            else:
+                worse = new[metric] > old[metric] * (1 + threshold)
+            if worse:
+                regressions.append({'key': key, 'metric': metric,
+                                    'baseline': old[metric],
+                                    'current': new.get(metric)})
+    return regressions
+
+
+def _format(key: str, result: Optional[Result]) -> str:
+    """ Return one line describing <result>. """
+    if result is None:
+        return '{:48} n/a'.format(key)
+    if 'ticks_per_sec' in result:
+        line = '{:32} {:8,.1f} ticks/s {:8.2f} ms/tick ({})'.format(
+            key, result['ticks_per_sec'], result['tick_ms'],
+            ' '.join('{} {:.2f}'.format(phase, result[phase + '_ms'])
+                     for phase in PHASES))
+        if result['peak_rss'] is not None:
+            line += ' {:,.0f} MB peak'.format(result['peak_rss'] / 2 ** 20)
+        return line + ' {:,.0f} bytes/tick allocated'.format(
+            result['alloc_bytes_per_tick'])
+    if 'log_overhead' in result:
+        return ('{:40} {:6.2%} of {:8.2f} ms/tick (emit {:.2f} ms, write '
+                '{:.2f} ms, {:,} records){}').format(
+            key, result['log_overhead'], result['tick_ms'],
+            result['emit_ms'], result['write_ms'], result['records'],
+            '' if result['within_budget'] else ' OVER BUDGET')
+    if 'bytes' in result:
+        return '{:48} {:>14,} bytes {:10.1f} per player'.format(
+            key, result['bytes'], result['bytes_per_player'])
+    if result.get('error') == 'skipped':
+        return '{:48} skipped'.format(key)
+    if result.get('error'):
+        return '{:48} {} after {} ops'.format(key, result['error'],
+                                              result['ops'])
+    rate = result['ops_per_sec'] or 0
+    rate = ('{:14,.2f}' if rate < 100 else '{:14,.0f}').format(rate) + ' ops/s'
+    if not result['complete']:
+        rate += ' ({} ops, out of time)'.format(result['ops'])
+    return '{:48} {}'.format(key, rate)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """ Run the benchmarks from the command line <argv>, and return 1 if a
+    regression was found against the baseline given, or 0. """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3])
+    parser.add_argument('--suites', nargs='+', default=('trees', 'games'),
+                        choices=('trees', 'games', 'events'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--distributions', nargs='+', default=DISTRIBUTIONS,
+                        choices=DISTRIBUTIONS)
+    parser.add_argument('--backends', nargs='+', default=BACKENDS,
+                        choices=BACKENDS)
+    parser.add_argument('--operations', nargs='+', default=OPERATIONS,
+                        choices=OPERATIONS)
+    parser.add_argument('--game-sizes', type=int, nargs='+',
+                        default=GAME_SIZES)
+    parser.add_argument('--event-sizes', type=int, nargs='+',
+                        default=EVENT_SIZES)
+    parser.add_argument('--event-ticks', type=int, default=EVENT_TICKS)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--fields', nargs='+', default=FIELDS,
+                        choices=FIELDS)
+    parser.add_argument('--ticks', type=int, default=GAME_TICKS)
+    parser.add_argument('--scenario', choices=scenarios.DISTRIBUTIONS,
+                        help='spawn the game players from this scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=2.0,
+                        help='seconds each operation may run for')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare against this file')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='fraction a result may get worse by')
+    args = parser.parse_args(argv)
+
+    def report(key: str, result: Optional[Result]) -> None:
+        print(_format(key, result), flush=True)
+
+    current = {'machine': machine(), 'seed': args.seed, 'results': {}}
+    if 'trees' in args.suites:
+        trees = run(tuple(args.sizes), tuple(args.distributions),
+                    tuple(args.backends), tuple(args.operations), args.seed,
+                    args.budget, report)
+        current['budget'] = args.budget
+        current['results'].update(trees['results'])
+    if 'games' in args.suites:
+        games = run_games(tuple(args.game_sizes), tuple(args.modes),
+                          tuple(args.fields), args.ticks, args.seed,
+                          report=report, scenario=args.scenario)
+        current['ticks'] = args.ticks
+        current['results'].update(games['results'])
+    if 'events' in args.suites:
+        logs = run_events(tuple(args.event_sizes), tuple(args.modes),
+                          tuple(args.fields), args.event_ticks, args.seed,
+                          report)
+        current['results'].update(logs['results'])
+    if args.save:
+        save(current, args.save)
+    if args.baseline:
+        regressions = compare(load(args.baseline), current, args.threshold)
+        for row in regressions:
+            print('REGRESSION {key}: {metric} {baseline} -> {current}'
+                  .format(**row))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
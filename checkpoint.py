@@ -0,0 +1,490 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Checkpoints that save a running simulation to disk and restore it, so that a
+long game can be stopped and resumed with exactly the same results.
+
+A checkpoint holds every player's state, the game's own attributes, the
+simulator's clock and the state of the game's random generator: the
+module-global one, a random.Random or a BatchedRandom. It is
+stored in columns: one array per player attribute, in the order the game
+lists its players, plus a few JSON chunks for everything that is not per
+player. Columns of names are arrays of ints in a game keyed by ids. The
+field is not stored, since at the end of every tick it holds exactly the
+players of the game at their locations; it is rebuilt with insert_many on
+restore.
+
+Taking a snapshot only copies the columns into memory, so a Checkpointer can
+write the file from a background thread while the tick loop carries on.
+"""
+from __future__ import annotations
+import json
+import os
+import random
+import struct
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple, Union
+from games import Game, Tag, ZombieTag, EliminationTag
+from players import Player
+from randomness import BatchedRandom
+from simulator import Simulator, EventSimulator
+from trees import QuadTree, TwoDTree
+
+# The first bytes of every checkpoint file, and the version of its layout.
+MAGIC = b'TAGC'
+VERSION = 1
+
+# The directions a player can move in, stored by their index.
+DIRECTIONS = ('N', 'S', 'E', 'W')
+
+_HEADER = struct.Struct('<4sH')
+_CHUNK = struct.Struct('<H1sQ')
+
+# A snapshot is a list of (name, chunk) pairs, where a chunk is an array of
+# numbers or a JSON-compatible object.
+Snapshot = List[Tuple[str, Union[array, object]]]
+
+
+def save(sim: Simulator, path: str) -> None:
+    """ Save the simulation <sim> and the state of its game's random
+    generator to the checkpoint file at <path>. If <sim> is an
+    EventSimulator, its quiet players are written back into the field first.
+
+    >>> import os, tempfile
+    >>> from games import ZombieTag
+    >>> from trees import QuadTree
+    >>> sim = Simulator(ZombieTag(5, QuadTree((250, 250)), 30, 8, 6))
+    >>> sim.run(max_ticks=3)
+    >>> path = os.path.join(tempfile.mkdtemp(), 'game.ckpt')
+    >>> save(sim, path)
+    >>> load(path).tick
+    3
+    """
+    write(snapshot(sim), path)
+
+
+def snapshot(sim: Simulator) -> Snapshot:
+    """ Return a copy of the state of <sim> and of its game's random
+    generator, which write saves to disk. No later change to <sim> changes
+    the snapshot.
+
+    Raise a ValueError if the game's random generator is not the
+    module-global one, a random.Random or a BatchedRandom.
+    """
+    if isinstance(sim, EventSimulator):
+        sim.flush()
+    game = sim.game
+    teams = _teams(game)
+    team_of = {id(team): i for i, (_, team) in enumerate(teams)}
+    rows = []
+    for i, (_, team) in enumerate(teams):
+        rows.extend((i, player) for player in team.values())
+    names = [player._name for _, player in rows]
+
+    chunks = [('players.name', _names_chunk(names)),
+              ('players.colour', [player._colour for _, player in rows])]
+    for column, typecode, values in (
+            ('team', 'b', [i for i, _ in rows]),
+            ('x', 'i', [player._location[0] for _, player in rows]),
+            ('y', 'i', [player._location[1] for _, player in rows]),
+            ('direction', 'b',
+             [DIRECTIONS.index(player._direction) for _, player in rows]),
+            ('speed', 'i', [player._speed for _, player in rows]),
+            ('vision', 'i', [player._vision for _, player in rows]),
+            ('points', 'q', [player._points for _, player in rows]),
+            ('target_team', 'b',
+             [team_of.get(id(player._target_team), -1)
+              for _, player in rows]),
+            ('enemy_team', 'b',
+             [team_of.get(id(player._enemy_team), -1)
+              for _, player in rows]),
+            ('neighbour_skin', 'i',
+             [player._neighbour_skin for _, player in rows]),
+            ('neighbour_ticks', 'i',
+             [player._neighbour_ticks for _, player in rows]),
+            ('neighbour_age', 'i',
+             [player._neighbour_age for _, player in rows])):
+        chunks.append(('players.' + column, array(typecode, values)))
+    for column in ('targets', 'enemies', 'neighbours'):
+        lists = [getattr(player, '_' + column) for _, player in rows]
+        chunks.append(('players.{}.counts'.format(column),
+                       array('i', [-1 if names_ is None else len(names_)
+                                   for names_ in lists])))
+        chunks.append(('players.' + column, _names_chunk(
+            [name for names_ in lists if names_ is not None
+             for name in names_])))
+
+    state = {'kind': type(game).__name__, 'cosmetic': game.cosmetic,
+             'ids': game.ids, 'teams': [attr for attr, _ in teams]}
+    if isinstance(game, Tag):
+        state.update({'duration': game._duration, 'it': game._it})
+        chunks.append(('game.tagged', _names_chunk(sorted(game._tagged))))
+    elif isinstance(game, ZombieTag):
+        state['duration'] = game._duration
+    else:
+        chunks.append(('game.next', _names_chunk(
+            [game._next[name] for name in names])))
+    nw, se = game.field.bounds()
+    state['field'] = {'kind': type(game.field).__name__,
+                      'nw': list(nw), 'se': list(se)}
+    chunks.append(('game', state))
+
+    chunks.append(('simulator', {
+        'kind': type(sim).__name__,
+        'tick': sim.tick, 'finished': sim.finished, 'winner': sim.winner,
+        'wall_time': sim.wall_time, 'phase_times': dict(sim.phase_times),
+        'tick_rate': sim._tick_rate,
+        'collision_distance': sim._collision_distance,
+        'max_speed': sim._max_speed,
+        'neighbour_ticks': sim._neighbour_ticks,
+        'fast_forward': sim._fast_forward, 'resolved': sim._resolved,
+        'next_due': sim._next_due,
+        'reach': getattr(sim, '_reach', None)}))
+
+    chunks.extend(_rng_chunks(game.rng))
+    return chunks
+
+
+def _names_chunk(names: List[Union[int, str]]) -> Union[array, list]:
+    """ Return the chunk that holds the column <names>: an array if they
+    are the int ids of a game keyed by ids, and <names> itself otherwise.
+    load reads either back as a list with list(). """
+    if names and all(type(name) is int for name in names):
+        return array('q', names)
+    return names
+
+
+def _rng_chunks(rng: random.Random) -> Snapshot:
+    """ Return the chunks that hold the state of <rng>. """
+    if rng is random:
+        kind = 'random'
+        state, choices, pairs = random.getstate(), {}, {}
+    elif type(rng) is random.Random:
+        kind = 'Random'
+        state, choices, pairs = rng.getstate(), {}, {}
+    elif type(rng) is BatchedRandom:
+        kind = 'BatchedRandom'
+        state, choices, pairs = rng.getstate()
+    else:
+        raise ValueError('cannot save a ' + type(rng).__name__)
+    version, internal, gauss_next = state
+    chunks = [('random', {'kind': kind, 'version': version,
+                          'gauss_next': gauss_next,
+                          'used': {str(n): used
+                                   for n, (_, used) in choices.items()},
+                          'pairs_used': {str(n): used
+                                         for n, (_, used) in pairs.items()}}),
+              ('random.state', array('I', internal))]
+    for n, (block, _) in choices.items():
+        chunks.append(('random.block.' + str(n), array('i', block)))
+    for n, (block, _) in pairs.items():
+        chunks.append(('random.pairs.' + str(n), array('i', block)))
+    return chunks
+
+
+def write(chunks: Snapshot, path: str) -> None:
+    """ Write the snapshot <chunks> to the checkpoint file at <path>, one
+    chunk at a time. The file is only replaced once it has been written in
+    full, so an interrupted write leaves the last checkpoint in place.
+    """
+    temp = path + '.tmp'
+    with open(temp, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION))
+        for name, chunk in chunks:
+            if isinstance(chunk, array):
+                _write_chunk(file, name, chunk.typecode, chunk)
+            elif isinstance(chunk, list) and \
+                    all(isinstance(item, str) for item in chunk):
+                # A column of strings is its offsets and its text.
+                encoded = [item.encode() for item in chunk]
+                offsets = array('Q', [0])
+                total = 0
+                for item in encoded:
+                    total += len(item)
+                    offsets.append(total)
+                _write_chunk(file, name + '.offsets', 'Q', offsets)
+                _write_chunk(file, name + '.text', 's', b''.join(encoded))
+            else:
+                _write_chunk(file, name, 'j',
+                             json.dumps(chunk, sort_keys=True).encode())
+    os.replace(temp, path)
+
+
+def _write_chunk(file: object, name: str, typecode: str,
+                 data: Union[array, bytes]) -> None:
+    """ Write one chunk named <name> holding <data> to <file>. """
+    if isinstance(data, array):
+        if sys.byteorder == 'big':
+            data = array(data.typecode, data)
+            data.byteswap()
+        data = data.tobytes()
+    encoded = name.encode()
+    file.write(_CHUNK.pack(len(encoded), typecode.encode(), len(data)))
+    file.write(encoded)
+    file.write(data)
+
+
+def load(path: str) -> Simulator:
+    """ Return the simulation saved in the checkpoint file at <path>, with
+    its game's random generator in its saved state; if that is the
+    module-global one, it is set to that state. Running the returned
+    simulator gives exactly the results the saved one would have.
+
+    Raise a ValueError if the file at <path> is not a checkpoint.
+    """
+    chunks = _read(path)
+    state = chunks['game']
+    cls = {'Tag': Tag, 'ZombieTag': ZombieTag,
+           'EliminationTag': EliminationTag}[state['kind']]
+    # The constructors place players at random, so the game and its players
+    # are rebuilt without them.
+    game = object.__new__(cls)
+    game.cosmetic = state['cosmetic']
+    game.ids = state.get('ids', False)
+    game.events = None
+    game.rng = _restore_rng(chunks)
+    field = state['field']
+    if field['kind'] == 'QuadTree':
+        game.field = QuadTree((field['se'][0] // 2, field['se'][1] // 2))
+    else:
+        game.field = TwoDTree(tuple(field['nw']), tuple(field['se']))
+    teams = [{} for _ in state['teams']]
+    for attr, team in zip(state['teams'], teams):
+        setattr(game, attr, team)
+
+    names = list(chunks['players.name'])
+    lists = {}
+    for column in ('targets', 'enemies', 'neighbours'):
+        flat = list(chunks['players.' + column])
+        start = 0
+        lists[column] = []
+        for count in chunks['players.{}.counts'.format(column)]:
+            if count < 0:
+                lists[column].append(None)
+            else:
+                lists[column].append(flat[start:start + count])
+                start += count
+    for i, name in enumerate(names):
+        player = object.__new__(Player)
+        player._name = name
+        player._location = (chunks['players.x'][i], chunks['players.y'][i])
+        player._colour = chunks['players.colour'][i]
+        player._vision = chunks['players.vision'][i]
+        player._speed = chunks['players.speed'][i]
+        player._game = game
+        player._points = chunks['players.points'][i]
+        player._targets = lists['targets'][i]
+        player._enemies = lists['enemies'][i]
+        player._target_team = _team(teams, chunks['players.target_team'][i])
+        player._enemy_team = _team(teams, chunks['players.enemy_team'][i])
+        player._direction = DIRECTIONS[chunks['players.direction'][i]]
+        player._neighbours = lists['neighbours'][i]
+        player._neighbour_skin = chunks['players.neighbour_skin'][i]
+        player._neighbour_ticks = chunks['players.neighbour_ticks'][i]
+        player._neighbour_age = chunks['players.neighbour_age'][i]
+        player._rng = game.rng
+        teams[chunks['players.team'][i]][name] = player
+    game.field.insert_many([(name, (chunks['players.x'][i],
+                                    chunks['players.y'][i]))
+                            for i, name in enumerate(names)])
+
+    if cls is Tag:
+        game._duration = state['duration']
+        game._it = state['it']
+        game._tagged = set(chunks['game.tagged'])
+    elif cls is ZombieTag:
+        game._duration = state['duration']
+    else:
+        game._next = dict(zip(names, list(chunks['game.next'])))
+        game._prev = {target: name for name, target in game._next.items()}
+
+    return _restore_simulator(chunks['simulator'], game)
+
+
+def _restore_rng(chunks: Dict[str, object]) -> random.Random:
+    """ Return the random generator saved in <chunks>, in its saved state.
+    """
+    saved = chunks['random']
+    state = (saved['version'], tuple(chunks['random.state']),
+             saved['gauss_next'])
+    kind = saved.get('kind', 'random')
+    if kind == 'random':
+        random.setstate(state)
+        return random
+    if kind == 'Random':
+        rng = random.Random()
+        rng.setstate(state)
+        return rng
+    rng = BatchedRandom()
+    rng.setstate((state,
+                  {int(n): (list(chunks['random.block.' + n]), used)
+                   for n, used in saved['used'].items()},
+                  {int(n): (list(chunks['random.pairs.' + n]), used)
+                   for n, used in saved.get('pairs_used', {}).items()}))
+    return rng
+
+
+def _restore_simulator(state: Dict[str, object], game: Game) -> Simulator:
+    """ Return a simulator of <game> with the saved <state>. """
+    if state['kind'] == 'EventSimulator':
+        sim = EventSimulator(game, state['tick_rate'],
+                             state['collision_distance'],
+                             state['fast_forward'])
+        sim._reach = state['reach']
+        sim._retry = {name: (state['tick'], 1)
+                      for name in game.get_players()}
+    else:
+        # Neighbour lists are restored with the players, so they are not
+        # set up again here.
+        sim = Simulator(game, state['tick_rate'],
+                        state['collision_distance'], 0,
+                        state['fast_forward'])
+        sim._neighbour_ticks = state['neighbour_ticks']
+    sim.tick = state['tick']
+    sim.finished = state['finished']
+    sim.winner = state['winner']
+    sim.wall_time = state['wall_time']
+    sim.phase_times = state['phase_times']
+    sim._max_speed = state['max_speed']
+    sim._resolved = state['resolved']
+    sim._next_due = state['next_due']
+    return sim
+
+
+def _teams(game: Game) -> List[Tuple[str, Dict[str, Player]]]:
+    """ Return the name and value of every attribute of <game> that holds
+    players, in the order get_players lists them. """
+    if isinstance(game, ZombieTag):
+        return [('_zombies', game._zombies), ('_humans', game._humans)]
+    return [('_players', game._players)]
+
+
+def _team(teams: List[Dict[str, Player]],
+          index: int) -> Optional[Dict[str, Player]]:
+    """ Return team <index> of <teams>, or None if <index> is -1. """
+    return None if index < 0 else teams[index]
+
+
+def _read(path: str) -> Dict[str, object]:
+    """ Return every chunk of the checkpoint file at <path>, keyed by name,
+    with every column of strings put back together. """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < _HEADER.size or \
+            _HEADER.unpack_from(data, 0) != (MAGIC, VERSION):
+        raise ValueError(path + ' is not a checkpoint')
+    chunks = {}
+    offset = _HEADER.size
+    while offset < len(data):
+        length, typecode, size = _CHUNK.unpack_from(data, offset)
+        offset += _CHUNK.size
+        name = data[offset:offset + length].decode()
+        offset += length
+        raw = data[offset:offset + size]
+        offset += size
+        typecode = typecode.decode()
+        if typecode == 'j':
+            chunks[name] = json.loads(raw.decode())
+        elif typecode == 's':
+            chunks[name] = raw
+        else:
+            column = array(typecode)
+            column.frombytes(raw)
+            if sys.byteorder == 'big':
+                column.byteswap()
+            chunks[name] = column
+    for name in [name for name in chunks if name.endswith('.offsets')]:
+        column = name[:-len('.offsets')]
+        offsets = chunks.pop(name)
+        text = chunks.pop(column + '.text')
+        chunks[column] = [text[offsets[i]:offsets[i + 1]].decode()
+                          for i in range(len(offsets) - 1)]
+    return chunks
+
+
+class Checkpointer:
+    """ Runs a simulation, saving a checkpoint every few ticks.
+
+    === Public Attributes ===
+    path: the checkpoint file, which always holds the latest checkpoint.
+    every: the number of ticks between two checkpoints.
+    background: whether checkpoints are written from a background thread.
+
+    === Private Attributes ===
+    _thread: the thread writing the last checkpoint, or None if there is
+    none.
+
+    === Representation Invariants ===
+    - every >= 1
+    """
+    path: str
+    every: int
+    background: bool
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, path: str, every: int,
+                 background: bool = True) -> None:
+        """ Initialize a checkpointer saving to <path> every <every> ticks.
+        """
+        self.path = path
+        self.every = every
+        self.background = background
+        self._thread = None
+
+    def checkpoint(self, sim: Simulator) -> None:
+        """ Save a checkpoint of <sim>. The snapshot is taken now; if
+        background is True, it is written to disk while the caller carries
+        on. """
+        chunks = snapshot(sim)
+        self.wait()
+        if self.background:
+            self._thread = threading.Thread(target=write,
+                                            args=(chunks, self.path))
+            self._thread.start()
+        else:
+            write(chunks, self.path)
+
+    def wait(self) -> None:
+        """ Wait until the last checkpoint has been written. """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self, sim: Simulator,
+            max_ticks: Optional[int] = None) -> Optional[str]:
+        """ Run <sim> as its run method does, saving a checkpoint every
+        <every> ticks and once it stops, and return the winner.
+
+        >>> import os, tempfile
+        >>> from games import ZombieTag
+        >>> from trees import QuadTree
+        >>> sim = Simulator(ZombieTag(5, QuadTree((250, 250)), 6, 8, 6))
+        >>> path = os.path.join(tempfile.mkdtemp(), 'game.ckpt')
+        >>> Checkpointer(path, 4).run(sim) in ('humans', 'zombies')
+        True
+        >>> load(path).finished
+        True
+        """
+        ticks = 0
+        while not sim.finished and (max_ticks is None or ticks < max_ticks):
+            chunk = self.every if max_ticks is None \
+                else min(self.every, max_ticks - ticks)
+            start = sim.tick
+            sim.run(max_ticks=chunk)
+            ticks += sim.tick - start
+            self.checkpoint(sim)
+        self.wait()
+        return sim.winner
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['json', 'os', 'random', 'struct', 'sys',
+                                  'threading', 'array', 'typing', 'games',
+                                  'players', 'randomness', 'simulator',
+                                  'trees'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -0,0 +1,311 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+A streaming log of what happens in a game.
+
+Games and simulators emit compact records through an EventLog. Every record
+is a tuple (tick, kind, field, ...), where kind is one of the event kinds
+below and the fields are:
+    MOVE: name, x, y (the player's new location)
+    DIRECTION: name, direction (the player's new direction)
+    COLLISION: name, name (a pair whose collision was handled)
+    TAG: old 'it', new 'it'
+    INFECT: zombie, human (the human became a zombie)
+    ELIMINATE: hunter, target (hunter is None if time ran out on target)
+    WINNER: winner
+
+Records are kept in memory and handed over in batches to a background
+thread, which encodes and writes them, so the tick loop never waits for the
+disk. A log is written as JSON lines, each line the array of the records of
+one batch (encoding a batch at once is far cheaper than one record at a
+time), or in a binary format in which names are only written out the first
+time they are used. Names may be the int ids of a game keyed by ids; both
+formats read them back as ints.
+
+The binary format writes every run of records of the same tick and kind,
+like the moves of a tick, as one header and a packed column of every field,
+so a whole run is packed by a few calls into struct rather than one per
+record. Logs written one record at a time are still read.
+
+The writer holds the GIL while it encodes, so its work still competes with
+the tick loop: write_seconds counts it, and the events suite of
+benchmarks.py weighs it and the cost of emitting against the tick time.
+"""
+from __future__ import annotations
+import itertools
+import json
+import operator
+import queue
+import struct
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union
+
+# The kinds of event.
+MOVE = 'move'
+DIRECTION = 'direction'
+COLLISION = 'collision'
+TAG = 'tag'
+INFECT = 'infect'
+ELIMINATE = 'eliminate'
+WINNER = 'winner'
+
+# The fields of every kind of event, in the binary format: 's' for a string
+# or None, stored as an index into the table of names, and 'i' for an int.
+FIELDS = {MOVE: 'sii', DIRECTION: 'ss', COLLISION: 'ss', TAG: 'ss',
+          INFECT: 'ss', ELIMINATE: 'ss', WINNER: 's'}
+
+# The first bytes of a binary log.
+MAGIC = b'TAGE'
+
+# The code of every kind of event in the binary format. Code 0 defines a
+# name, and _ID defines a name that is an int id.
+_CODES = {kind: code for code, kind in enumerate(FIELDS, 1)}
+_KINDS = {code: kind for kind, code in _CODES.items()}
+_ID_CODE = 0xFF
+_NAME = struct.Struct('<BIH')
+_ID = struct.Struct('<BIq')
+_RECORDS = {kind: struct.Struct('<BI' + fields.replace('s', 'I'))
+            for kind, fields in FIELDS.items()}
+_NONE = 0xFFFFFFFF
+
+# A run of records of one tick and kind has the code of its kind with _RUN
+# set, then its tick and length, then a column of every field.
+_RUN = 0x80
+_RUN_HEADER = struct.Struct('<BII')
+_TICK_AND_KIND = operator.itemgetter(0, 1)
+
+# The positions of the string fields of every kind of record, counting the
+# tick and the kind.
+_STRINGS = {kind: tuple(i for i, field in enumerate(fields, 2) if field == 's')
+            for kind, fields in FIELDS.items()}
+
+Record = Tuple[object, ...]
+
+
+class EventLog:
+    """ A buffered log of game events, written from a background thread.
+
+    === Public Attributes ===
+    path: the file the log is written to.
+    binary: whether the log is written in the binary format rather than as
+    JSON lines.
+    batch: the number of records handed to the writer at a time.
+    tick: the tick stamped on every record emitted from now on.
+    records: the number of records written so far.
+    write_seconds: the CPU time the writer thread has spent encoding and
+    writing records so far, which the tick loop does not see in its own
+    timings.
+
+    === Private Attributes ===
+    _buffer: the records emitted since the last batch was handed over.
+    _queue: the batches waiting to be written, then None once the log is
+    closed.
+    _thread: the thread writing batches to the file.
+    _names: the index of every name already written to a binary log.
+
+    === Representation Invariants ===
+    - batch >= 1
+    """
+    path: str
+    binary: bool
+    batch: int
+    tick: int
+    records: int
+    write_seconds: float
+    _buffer: List[Record]
+    _queue: queue.Queue
+    _thread: threading.Thread
+    _names: Dict[Union[int, str, None], int]
+
+    def __init__(self, path: str, binary: bool = False,
+                 batch: int = 4096) -> None:
+        """ Initialize a log written to <path>, and start its writer.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'events.jsonl')
+        >>> log = EventLog(path)
+        >>> log.emit(TAG, 'p0', 'p3')
+        >>> log.close()
+        >>> list(read_events(path))
+        [(0, 'tag', 'p0', 'p3')]
+        """
+        self.path = path
+        self.binary = binary
+        self.batch = batch
+        self.tick = 0
+        self.records = 0
+        self.write_seconds = 0.0
+        self._buffer = []
+        self._queue = queue.Queue()
+        self._names = {None: _NONE}
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def emit(self, kind: str, *fields: object) -> None:
+        """ Record an event of <kind> with <fields> at the current tick. """
+        buffer = self._buffer
+        buffer.append((self.tick, kind) + fields)
+        if len(buffer) >= self.batch:
+            self.flush()
+
+    def extend(self, records: List[Record]) -> None:
+        """ Record every record in <records>, each already stamped with its
+        tick and kind. This is emit for a whole list of events at once, which
+        the simulators use for the moves and direction changes of every
+        player. """
+        buffer = self._buffer
+        buffer.extend(records)
+        batch = self.batch
+        while len(buffer) >= batch:
+            self._queue.put(buffer[:batch])
+            del buffer[:batch]
+
+    def flush(self) -> None:
+        """ Hand every record emitted so far to the writer. """
+        if self._buffer:
+            self._queue.put(self._buffer)
+            self._buffer = []
+
+    def close(self) -> None:
+        """ Write every record emitted so far, and close the file. """
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> EventLog:
+        """ Return this log, to be closed at the end of a with block. """
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """ Close this log. """
+        self.close()
+
+    def _write(self) -> None:
+        """ Write every batch in the queue to the file, until the log is
+        closed. """
+        mode = 'wb' if self.binary else 'w'
+        with open(self.path, mode) as file:
+            if self.binary:
+                file.write(MAGIC)
+            batch = self._queue.get()
+            while batch is not None:
+                start = time.thread_time()
+                if self.binary:
+                    file.write(self._encode(batch))
+                else:
+                    file.write(json.dumps(batch, separators=(',', ':')) +
+                               '\n')
+                self.write_seconds += time.thread_time() - start
+                self.records += len(batch)
+                batch = self._queue.get()
+
+    def _encode(self, batch: List[Record]) -> bytes:
+        """ Return <batch> in the binary format, one run of records of the
+        same tick and kind at a time, defining every name that has not been
+        written yet. """
+        names = self._names
+        out = []
+        for (tick, kind), run in itertools.groupby(batch, _TICK_AND_KIND):
+            run = list(run)
+            columns = []
+            for i, field in enumerate(FIELDS[kind], 2):
+                if field == 's':
+                    try:
+                        column = [names[record[i]] for record in run]
+                    except KeyError:
+                        for record in run:
+                            if record[i] not in names:
+                                self._define(record[i], out)
+                        column = [names[record[i]] for record in run]
+                else:
+                    column = [record[i] for record in run]
+                columns.append(struct.pack(_column(field, len(run)), *column))
+            out.append(_RUN_HEADER.pack(_CODES[kind] | _RUN, tick, len(run)))
+            out.extend(columns)
+        return b''.join(out)
+
+    def _define(self, name: Union[int, str], out: List[bytes]) -> int:
+        """ Give <name> the next index, append its definition to <out> and
+        return the index. """
+        index = self._names[name] = len(self._names) - 1
+        if type(name) is int:
+            out.append(_ID.pack(_ID_CODE, index, name))
+        else:
+            encoded = name.encode()
+            out.append(_NAME.pack(0, index, len(encoded)))
+            out.append(encoded)
+        return index
+
+
+def read_events(path: str) -> Iterator[Record]:
+    """ Yield every record in the log at <path>, in the order it was
+    emitted. Both formats are read. """
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) == MAGIC:
+            yield from _read_binary(file)
+            return
+    with open(path) as file:
+        for line in file:
+            for record in json.loads(line):
+                yield tuple(record)
+
+
+def _column(field: str, length: int) -> str:
+    """ Return the struct format of a column of <length> values of the
+    binary <field>.
+
+    >>> _column('s', 3)
+    '<3I'
+    """
+    return '<{}{}'.format(length, 'I' if field == 's' else 'i')
+
+
+def _read_binary(file: BinaryIO) -> Iterator[Record]:
+    """ Yield every record in the rest of the binary log <file>. """
+    data = file.read()
+    names = {_NONE: None}
+    offset = 0
+    while offset < len(data):
+        code = data[offset]
+        if code == 0:
+            _, index, length = _NAME.unpack_from(data, offset)
+            offset += _NAME.size
+            names[index] = data[offset:offset + length].decode()
+            offset += length
+            continue
+        if code == _ID_CODE:
+            _, index, names[index] = _ID.unpack_from(data, offset)
+            offset += _ID.size
+            continue
+        if code & _RUN:
+            _, tick, length = _RUN_HEADER.unpack_from(data, offset)
+            offset += _RUN_HEADER.size
+            kind = _KINDS[code & ~_RUN]
+            columns = []
+            for field in FIELDS[kind]:
+                column = struct.unpack_from(_column(field, length), data,
+                                            offset)
+                offset += 4 * length
+                if field == 's':
+                    column = [names[value] for value in column]
+                columns.append(column)
+            for fields in zip(*columns):
+                yield (tick, kind) + fields
+            continue
+        kind = _KINDS[code]
+        layout = _RECORDS[kind]
+        values = layout.unpack_from(data, offset)
+        offset += layout.size
+        fields = [names[value] if field == 's' else value
+                  for field, value in zip(FIELDS[kind], values[2:])]
+        yield (values[1], kind) + tuple(fields)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['itertools', 'json', 'operator', 'queue',
+                                  'struct', 'threading', 'time', 'typing'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
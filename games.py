@@ -6,26 +6,116 @@ University of Toronto
 """
 from __future__ import annotations
 import random
-from typing import Dict, Union, Optional
+from typing import Dict, List, Set, Tuple, Union, Optional
+from events import EventLog, TAG, INFECT, ELIMINATE
 from players import Player
-from trees import QuadTree, TwoDTree
+from scenarios import spread
+from trees import Name, QuadTree, TwoDTree
+
+
+def player_keys(n: int, ids: bool) -> List[Name]:
+    """ Return the keys of players 0 to <n> - 1: the ints 0 to <n> - 1 if
+    <ids> is True, and the names p0 to p<n - 1> otherwise.
+
+    >>> player_keys(3, True), player_keys(3, False)
+    ([0, 1, 2], ['p0', 'p1', 'p2'])
+    """
+    if ids:
+        return list(range(n))
+    return ['p' + str(i) for i in range(n)]
+
+
+def player_name(key: Name) -> str:
+    """ Return the name player <key> is shown by: pi for the id i, or <key>
+    itself if it is a name already.
+
+    >>> player_name(3), player_name('p3'), player_name('humans')
+    ('p3', 'p3', 'humans')
+    """
+    if isinstance(key, int):
+        return 'p' + str(key)
+    return key
+
+
+def player_id(name: str) -> Optional[int]:
+    """ Return the id of the player named <name>, or None if <name> is not
+    the name of an id.
+
+    >>> player_id('p12'), player_id('p012'), player_id('nobody')
+    (12, None, None)
+    """
+    digits = name[1:]
+    if name[:1] == 'p' and digits.isdigit() and str(int(digits)) == digits:
+        return int(digits)
+    return None
 
 
 class Game:
     """ A class for a game.
 
     This is an abstract class. No instance should be raised.
-    """
 
-    def handle_collision(self, player1: str, player2: str) -> None:
+    A game keys its players by name, or by dense int ids 0 to n - 1 if it
+    was built with ids=True. Ids are what the field, the relationship lists
+    of every player, the events and the winner hold; the name pi of id i
+    is only made for display, by get_name. get_player also takes the name
+    of a player in a game keyed by ids.
+
+    === Public Attributes ===
+    ids: whether players are keyed by int ids rather than by name.
+    """
+    ids: bool
+
+    def get_name(self, key: Optional[Name]) -> Optional[str]:
+        """ Return the name the player or group of players <key> is shown
+        by, or None if <key> is None. """
+        if key is None:
+            return None
+        return player_name(key)
+
+    def get_key(self, name: str) -> Optional[Name]:
+        """ Return the key of the player named <name> in this game: its id
+        if this game is keyed by ids, or <name> itself. Return None if this
+        game is keyed by ids and <name> is not the name of one. """
+        if self.ids:
+            return player_id(name)
+        return name
+
+    def handle_collision(self, player1: Name, player2: Name) -> None:
         """ Perform some action when <player1> and <player2> collide """
         raise NotImplementedError
 
-    def check_for_winner(self) -> Optional[str]:
+    def check_for_winner(self) -> Optional[Name]:
         """ Return the name of the player or group of players that have
         won the game, or None if no player has won yet """
         raise NotImplementedError
 
+    def get_player(self, name: Name) -> Optional[Player]:
+        """ Return the player named <name>, or None if no such player is
+        still in the game """
+        raise NotImplementedError
+
+    def get_players(self) -> Dict[Name, Player]:
+        """ Return a new dictionary of every player still in the game, keyed
+        by name """
+        raise NotImplementedError
+
+    def winner_due(self, elapsed: int) -> bool:
+        """ Return True if check_for_winner should be called after <elapsed>
+        seconds of play """
+        raise NotImplementedError
+
+    def is_over(self, elapsed: int) -> bool:
+        """ Return True if the game has ended after <elapsed> seconds of
+        play """
+        raise NotImplementedError
+
+    def next_due(self, elapsed: int) -> Optional[int]:
+        """ Return the first number of seconds after <elapsed> at which
+        winner_due may be True even if no collision happens in between, or
+        None if only a collision can make it True """
+        raise NotImplementedError
+
 
 class Tag(Game):
     """The class for game tag.
@@ -38,12 +128,21 @@ class Tag(Game):
 
     === Public Attributes ===
     field: the game field represented by either a QuadTree or a TwoDTree.
+    cosmetic: whether players' colours are kept up to date. Turning this off
+    does not change the outcome of the game.
+    events: the log that tags, infections and eliminations are emitted to,
+    or None if they are not logged.
+    rng: the random generator that spawn points and players are drawn from,
+    which is the random module itself unless one was given.
+    ids: whether players are keyed by the ints 0 to n - 1 rather than by
+    the names p0 to pn-1.
 
     === Private Attribute ===
     _players: a dictionary with the name of the players being the key and the
     <Player> instances being the value.
     _it: the name of the player who is currently 'it'.
     _duration: the duration of the game.
+    _tagged: the names of every player who is not 'it' but has been tagged.
 
     === Representation Invariants ===
     - The player who is ‘it’ should be purple, all other players should be
@@ -51,51 +150,83 @@ class Tag(Game):
     - All fields will have a north-west corner at (0, 0) and a south-east corner
      at (500, 500).
     - <duration> must be a non-negative integer.
+    - a name is in <_tagged> if and only if that player is not 'it' and has
+    at least 1 point.
     """
-    _players: Dict[str, Player]
+    _players: Dict[Name, Player]
     field: Union[QuadTree, TwoDTree]
-    _it: str
+    cosmetic: bool
+    events: Optional[EventLog]
+    rng: random.Random
+    ids: bool
+    _it: Name
     _duration: int
+    _tagged: Set[Name]
 
     def __init__(self, n_players: int,
                  field_type: Union[QuadTree, TwoDTree],
                  duration: int,
                  max_speed: int,
-                 max_vision: int) -> None:
-        """ Initialize this tag game.
+                 max_vision: int,
+                 spawns: Optional[List[Tuple[int, int]]] = None,
+                 rng: Optional[random.Random] = None,
+                 ids: bool = False) -> None:
+        """ Initialize this tag game. Player pi spawns at spawns[i], or at
+        a different random point for every player if <spawns> is None, so
+        there are always <n_players> players. Everything random is drawn
+        from <rng>, or from the module-global random generator if <rng> is
+        None. If <ids> is True, player pi is keyed by the int i instead.
 
         === Precondition ===
-        - <field_type> should be a tree that have its nw corner at (0, 0)
-        and se corner at (500, 500).
+        - <field_type> should be an empty tree that have its nw corner at
+        (0, 0) and se corner at (500, 500).
         - <duration> is a non-negative integer
         - <max_speed> and <max_vision> are non-negative integers.
+        - <n_players> is at least 1.
+        - <spawns> is None, or holds <n_players> different points in the
+        field.
 
         >>> tag = Tag(5, QuadTree((250, 250)), 5, 8, 6)
         >>> len(tag.__getattribute__('_players')) == 5
         True
+        >>> tag = Tag(3, QuadTree((250, 250)), 5, 8, 6,
+        ...           [(0, 0), (10, 10), (20, 20)])
+        >>> tag.get_player('p2').get_location()
+        (20, 20)
+        >>> first = Tag(5, QuadTree((250, 250)), 5, 8, 6, rng=random.Random(1))
+        >>> second = Tag(5, QuadTree((250, 250)), 5, 8, 6,
+        ...              rng=random.Random(1))
+        >>> first.get_player('p4').get_location() == \
+        second.get_player('p4').get_location()
+        True
         """
         self._players = {}
         self._duration = duration
         self.field = field_type
-        self._it = 'p0'
-        point = random.randint(0, 500), random.randint(0, 500)
-        it = Player('p0', random.randint(0, max_vision),
-                    random.randint(1, max_speed), self, 'purple', point)
-        self.field.insert('p0', point)
-        self._players['p0'] = it
+        self.cosmetic = True
+        self.events = None
+        self.rng = random if rng is None else rng
+        self.ids = ids
+        keys = player_keys(n_players, ids)
+        self._it = keys[0]
+        self._tagged = set()
+        if spawns is None:
+            spawns = spread(n_players, rng=self.rng)
+        it = Player(keys[0], self.rng.randint(0, max_vision),
+                    self.rng.randint(1, max_speed), self, 'purple', spawns[0],
+                    self.rng)
+        self._players[keys[0]] = it
         for i in range(1, n_players):
-            point = random.randint(0, 500), random.randint(0, 500)
-            if not self.field.contains_point(point):
-                name = 'p' + str(i)
-                player = Player(name, random.randint(0, max_vision),
-                                random.randint(1, max_speed), self, 'green',
-                                point)
-                player.select_enemy('p0')
-                it.select_target(name)
-                self._players[name] = player
-                self.field.insert(name, point)
-
-    def handle_collision(self, player1: str, player2: str) -> None:
+            name = keys[i]
+            player = Player(name, self.rng.randint(0, max_vision),
+                            self.rng.randint(1, max_speed), self, 'green',
+                            spawns[i], self.rng)
+            player.select_enemy(keys[0])
+            self._players[name] = player
+        it.select_targets(list(self._players)[1:])
+        self.field.insert_many(list(zip(self._players, spawns)))
+
+    def handle_collision(self, player1: Name, player2: Name) -> None:
         """ Perform some action when <player1> and <player2> collide.
 
         When <player1> and <player2> collide, both players reverse the
@@ -117,8 +248,11 @@ class Tag(Game):
         p2.reverse_direction()
         if self._it == player1:
             self._it = player2
+            self._tag(player1, player2)
             p2.increase_points(1)
-            p2.set_colour('purple')
+            if self.cosmetic:
+                p2.set_colour('purple')
+                p1.set_colour('green')
             for player in self._players:
                 if player != player2:
                     p2.select_target(player)
@@ -126,11 +260,13 @@ class Tag(Game):
                 if player != player1:
                     p1.ignore_target(player)
                     self._players[player].ignore_enemy(player1)
-            p1.set_colour('green')
         elif self._it == player2:
             self._it = player1
+            self._tag(player2, player1)
             p1.increase_points(1)
-            p1.set_colour('purple')
+            if self.cosmetic:
+                p1.set_colour('purple')
+                p2.set_colour('green')
             for player in self._players:
                 if player != player1:
                     p1.select_target(player)
@@ -138,10 +274,86 @@ class Tag(Game):
                 if player != player2:
                     p2.ignore_target(player)
                     self._players[player].ignore_enemy(player2)
-            p2.set_colour('green')
             p2.select_enemy(player1)
 
-    def check_for_winner(self) -> Optional[str]:
+    def _tag(self, old_it: Name, new_it: Name) -> None:
+        """ Update the tagged players when 'it' passes from <old_it> to
+        <new_it>. """
+        if self.events is not None:
+            self.events.emit(TAG, old_it, new_it)
+        self._tagged.discard(new_it)
+        if self._players[old_it].get_points() >= 1:
+            self._tagged.add(old_it)
+
+    def get_player(self, name: Name) -> Optional[Player]:
+        """ Return the player named <name>, or None if no such player is
+        still in the game.
+
+        >>> tag = Tag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> tag.get_player('p0') is tag.__getattribute__('_players')['p0']
+        True
+        >>> tag.get_player('nobody') is None
+        True
+        >>> tag = Tag(5, QuadTree((250, 250)), 5, 8, 6, ids=True)
+        >>> tag.get_player('p3') is tag.get_player(3) is not None
+        True
+        """
+        player = self._players.get(name)
+        if player is None and self.ids and isinstance(name, str):
+            return self._players.get(player_id(name))
+        return player
+
+    def get_players(self) -> Dict[Name, Player]:
+        """ Return a new dictionary of every player still in the game, keyed
+        by name.
+
+        >>> tag = Tag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> tag.get_players() == tag.__getattribute__('_players')
+        True
+        """
+        return dict(self._players)
+
+    def winner_due(self, elapsed: int) -> bool:
+        """ Return True if check_for_winner should be called after <elapsed>
+        seconds of play, which is once every _duration seconds, or as soon as
+        at most two players are left.
+
+        >>> tag = Tag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> tag.winner_due(4)
+        False
+        >>> tag.winner_due(10)
+        True
+        """
+        if len(self._players) <= 2:
+            return True
+        return elapsed > 0 and elapsed % max(self._duration, 1) == 0
+
+    def is_over(self, elapsed: int) -> bool:
+        """ Return True if at most two players are left.
+
+        >>> tag = Tag(2, QuadTree((250, 250)), 5, 8, 6)
+        >>> tag.is_over(0)
+        True
+        """
+        return len(self._players) <= 2
+
+    def next_due(self, elapsed: int) -> Optional[int]:
+        """ Return the first number of seconds after <elapsed> at which
+        winner_due may be True, which is the end of the current period of
+        _duration seconds, or the next second if at most two players are left.
+
+        >>> tag = Tag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> tag.next_due(0)
+        5
+        >>> tag.next_due(5)
+        10
+        """
+        if len(self._players) <= 2:
+            return elapsed + 1
+        period = max(self._duration, 1)
+        return (elapsed // period + 1) * period
+
+    def check_for_winner(self) -> Optional[Name]:
         """ Return the name of the player that have won the game, or None if no
         player has won yet.
         If more than 2 players left, all players who are not ‘it’ with at least
@@ -149,6 +361,10 @@ class Tag(Game):
         if there is one player left, that player is the winner
         if there are two players left, the player that isn’t ‘it’ is the winner.
 
+        Runtime: O(1) when at most two players are left, otherwise one bulk
+        removal of the k tagged players from the field, plus one pass over
+        the targets of 'it'.
+
         === Precondition ===
         - self._players is not empty.
 
@@ -168,24 +384,20 @@ class Tag(Game):
         'p0'
         """
         if len(self._players) > 2:
-            to_del = []
-            for player in self._players:
-                if self._players[player].get_points() >= 1 and \
-                        self._it != player:
-                    to_del.append(player)
-                    self.field.remove(player)
-                    self._players[self._it].ignore_target(player)
-            for player in to_del:
-                del self._players[player]
+            if self._tagged:
+                if self.events is not None:
+                    for player in sorted(self._tagged):
+                        self.events.emit(ELIMINATE, None, player)
+                self.field.remove_many([self._players.pop(player)
+                                        .get_location()
+                                        for player in self._tagged])
+                self._players[self._it].ignore_targets(self._tagged)
+                self._tagged = set()
         elif len(self._players) == 2:
-            for player in self._players:
-                if player != self._it:
-                    return player
-        else:
-            p = None
-            for player in self._players:
-                p = player
-            return p
+            first, second = self._players
+            return second if first == self._it else first
+        elif self._players:
+            return next(iter(self._players))
 
 
 class ZombieTag(Game):
@@ -198,6 +410,14 @@ class ZombieTag(Game):
 
     === Public Attributes ===
     field: the game field represented by either a QuadTree or a TwoDTree.
+    cosmetic: whether players' colours are kept up to date. Turning this off
+    does not change the outcome of the game.
+    events: the log that tags, infections and eliminations are emitted to,
+    or None if they are not logged.
+    rng: the random generator that spawn points and players are drawn from,
+    which is the random module itself unless one was given.
+    ids: whether players are keyed by the ints 0 to n - 1 rather than by
+    the names p0 to pn-1.
 
     === Private Attribute ===
     _humans: a dictionary with the name of the human players being the key and
@@ -212,23 +432,37 @@ class ZombieTag(Game):
      at (500, 500).
      - <duration> must be a non-negative integer.
     """
-    _humans: Dict[str, Player]
-    _zombies: Dict[str, Player]
+    _humans: Dict[Name, Player]
+    _zombies: Dict[Name, Player]
     field: Union[QuadTree, TwoDTree]
+    cosmetic: bool
+    events: Optional[EventLog]
+    rng: random.Random
+    ids: bool
     _duration: int
 
     def __init__(self, n_players: int,
                  field_type: Union[QuadTree, TwoDTree],
                  duration: int,
                  max_speed: int,
-                 max_vision: int) -> None:
-        """ Initialize this zombie tag game.
+                 max_vision: int,
+                 spawns: Optional[List[Tuple[int, int]]] = None,
+                 rng: Optional[random.Random] = None,
+                 ids: bool = False) -> None:
+        """ Initialize this zombie tag game, with the zombie p0 and the
+        humans p1 to p<n_players>. Player pi spawns at spawns[i], or at a
+        different random point for every player if <spawns> is None.
+        Everything random is drawn from <rng>, or from the module-global
+        random generator if <rng> is None. If <ids> is True, player pi is
+        keyed by the int i instead.
 
         === Precondition ===
-        - <field_type> should be a tree that have its nw corner at (0, 0)
-        and se corner at (500, 500).
+        - <field_type> should be an empty tree that have its nw corner at
+        (0, 0) and se corner at (500, 500).
         - <duration> is a non-negative integer
         - <max_speed> and <max_vision> are non-negative integers.
+        - <spawns> is None, or holds <n_players> + 1 different points in the
+        field: one for the zombie p0 and one for every human.
 
         >>> zombie_tag = ZombieTag(5, QuadTree((250, 250)), 5, 8, 6)
         >>> len(zombie_tag.__getattribute__('_humans')) == 5
@@ -237,30 +471,40 @@ class ZombieTag(Game):
         self._humans = {}
         self._zombies = {}
         self.field = field_type
+        self.cosmetic = True
+        self.events = None
+        self.rng = random if rng is None else rng
+        self.ids = ids
         self._duration = duration
-        point = random.randint(0, 500), random.randint(0, 500)
-        it = Player('p0', max_vision, 1, self, 'purple', point)
-        self.field.insert('p0', point)
-        self._zombies['p0'] = it
+        if spawns is None:
+            spawns = spread(n_players + 1, rng=self.rng)
+        keys = player_keys(n_players + 1, ids)
+        it = Player(keys[0], max_vision, 1, self, 'purple', spawns[0],
+                    self.rng)
+        it.set_teams(self._humans, None)
+        self._zombies[keys[0]] = it
         for i in range(1, n_players + 1):
-            point = random.randint(0, 500), random.randint(0, 500)
-            if not self.field.contains_point(point):
-                name = 'p' + str(i)
-                player = Player(name, random.randint(0, max_vision),
-                                random.randint(1, max_speed), self, 'green',
-                                point)
-                player.select_enemy('p0')
-                it.select_target(name)
-                self._humans[name] = player
-                self.field.insert(name, point)
-
-    def handle_collision(self, player1: str, player2: str) -> None:
+            name = keys[i]
+            player = Player(name, self.rng.randint(0, max_vision),
+                            self.rng.randint(1, max_speed), self, 'green',
+                            spawns[i], self.rng)
+            player.set_teams(None, self._zombies)
+            self._humans[name] = player
+        self.field.insert_many(list(zip(keys, spawns)))
+
+    def handle_collision(self, player1: Name, player2: Name) -> None:
         """ Perform some action when <player1> and <player2> collide.
 
         Both players should reverse the direction they are moving in.
         if one player is a zombie and the other is a human, the human
         becomes a zombie.
 
+        Every player looks up its targets and enemies in the _humans and
+        _zombies teams, so a conversion only moves the human to the other
+        team and swaps which teams it hunts and avoids.
+
+        Runtime: O(1)
+
         === Precondition ===
         - player1 and player2 are in either self._humans or self._zombies
 
@@ -275,30 +519,12 @@ class ZombieTag(Game):
             p1, p2 = self._zombies[player1], self._humans[player2]
             p1.reverse_direction()
             p2.reverse_direction()
-            p2.set_colour('purple')
-            p2.set_speed(1)
-            for zombie in self._zombies:
-                p2.ignore_enemy(zombie)
-                self._zombies[zombie].ignore_target(player2)
-            self._zombies[player2] = p2
-            del self._humans[player2]
-            for human in self._humans:
-                self._humans[human].select_enemy(player2)
-                p2.select_target(human)
+            self._infect(player1, player2)
         elif player2 in self._zombies and player1 in self._humans:
             p1, p2 = self._humans[player1], self._zombies[player2]
             p2.reverse_direction()
             p1.reverse_direction()
-            p1.set_colour('purple')
-            p1.set_speed(1)
-            for zombie in self._zombies:
-                p1.ignore_enemy(zombie)
-                self._zombies[zombie].ignore_target(player1)
-            self._zombies[player1] = p1
-            del self._humans[player1]
-            for human in self._humans:
-                self._humans[human].select_enemy(player1)
-                p1.select_target(human)
+            self._infect(player2, player1)
         elif player1 in self._zombies and player2 in self._zombies:
             self._zombies[player1].reverse_direction()
             self._zombies[player2].reverse_direction()
@@ -306,7 +532,84 @@ class ZombieTag(Game):
             self._humans[player1].reverse_direction()
             self._humans[player2].reverse_direction()
 
-    def check_for_winner(self) -> Optional[str]:
+    def _infect(self, zombie: Name, name: Name) -> None:
+        """ Turn the human <name> into a zombie, after it was caught by
+        <zombie>.
+
+        Runtime: O(1)
+        """
+        if self.events is not None:
+            self.events.emit(INFECT, zombie, name)
+        player = self._humans.pop(name)
+        if self.cosmetic:
+            player.set_colour('purple')
+        player.set_speed(1)
+        player.set_teams(self._humans, None)
+        self._zombies[name] = player
+
+    def get_player(self, name: Name) -> Optional[Player]:
+        """ Return the human or zombie named <name>, or None if no such player
+        is in the game.
+
+        >>> zombie_tag = ZombieTag(1, QuadTree((250, 250)), 5, 8, 6)
+        >>> zombie_tag.get_player('p0').get_location() is not None
+        True
+        >>> zombie_tag.get_player('nobody') is None
+        True
+        """
+        if self.ids and isinstance(name, str):
+            name = player_id(name)
+        if name in self._humans:
+            return self._humans[name]
+        return self._zombies.get(name)
+
+    def get_players(self) -> Dict[Name, Player]:
+        """ Return a new dictionary of every zombie and human in the game,
+        keyed by name.
+
+        >>> zombie_tag = ZombieTag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> len(zombie_tag.get_players())
+        6
+        """
+        players = dict(self._zombies)
+        players.update(self._humans)
+        return players
+
+    def winner_due(self, elapsed: int) -> bool:
+        """ Return True if the game has ended after <elapsed> seconds of play.
+
+        >>> zombie_tag = ZombieTag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> zombie_tag.winner_due(4)
+        False
+        """
+        return self.is_over(elapsed)
+
+    def is_over(self, elapsed: int) -> bool:
+        """ Return True if _duration seconds have passed or no humans are left.
+
+        >>> zombie_tag = ZombieTag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> zombie_tag.is_over(4)
+        False
+        >>> zombie_tag.is_over(5)
+        True
+        """
+        return elapsed >= self._duration or not self._humans
+
+    def next_due(self, elapsed: int) -> Optional[int]:
+        """ Return the first number of seconds after <elapsed> at which
+        winner_due may be True, which is when _duration seconds have passed.
+
+        >>> zombie_tag = ZombieTag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> zombie_tag.next_due(0)
+        5
+        >>> zombie_tag.next_due(7)
+        8
+        """
+        if not self._humans:
+            return elapsed + 1
+        return max(self._duration, elapsed + 1)
+
+    def check_for_winner(self) -> Optional[Name]:
         """ Return the group of players (i.e. humans or zombies) that have won
         the game, if there are any humans left, humans win, otherwise, zombies
         win.
@@ -336,30 +639,64 @@ class EliminationTag(Game):
 
     === Public Attributes ===
     field: the game field represented by either a QuadTree or a TwoDTree.
+    cosmetic: whether players' colours are kept up to date. Turning this off
+    does not change the outcome of the game.
+    events: the log that tags, infections and eliminations are emitted to,
+    or None if they are not logged.
+    rng: the random generator that spawn points and players are drawn from,
+    which is the random module itself unless one was given.
+    ids: whether players are keyed by the ints 0 to n - 1 rather than by
+    the names p0 to pn-1.
 
     === Private Attribute ===
     _players: a dictionary with the name of the players being the key and
     the <Player> instances being the value.
+    _next: the ring of players, mapping the name of every player to the name
+    of its target.
+    _prev: the same ring in the other direction, mapping the name of every
+    player to the name of the player hunting it.
 
     === Representation Invariants ===
     - Every players is randomly coloured.
+    - _next, _prev and _players have the same keys.
+    - _prev[_next[name]] == name for every player.
+    - following _next from any player visits every player once.
+    - the target and enemy lists of every player only hold _next[name] and
+    _prev[name].
     - All fields will have a north-west corner at (0, 0) and a south-east corner
      at (500, 500).
     """
-    _players: Dict[str, Player]
+    _players: Dict[Name, Player]
     field: Union[QuadTree, TwoDTree]
+    cosmetic: bool
+    events: Optional[EventLog]
+    rng: random.Random
+    ids: bool
+    _next: Dict[Name, Name]
+    _prev: Dict[Name, Name]
 
     def __init__(self, n_players: int,
                  field_type: Union[QuadTree, TwoDTree],
                  max_speed: int,
-                 max_vision: int) -> None:
-        """Initialize this elimination tag game.
+                 max_vision: int,
+                 spawns: Optional[List[Tuple[int, int]]] = None,
+                 rng: Optional[random.Random] = None,
+                 ids: bool = False) -> None:
+        """Initialize this elimination tag game. Player pi targets player
+        p(i + 1), and the last player targets p0. Player pi spawns at
+        spawns[i], or at a different random point for every player if
+        <spawns> is None, so there are always <n_players> players in the
+        ring. Everything random is drawn from <rng>, or from the module-global
+        random generator if <rng> is None. If <ids> is True, player pi is
+        keyed by the int i instead.
 
         === Precondition ===
-        - <field_type> should be a tree that have its nw corner at (0, 0)
-        and se corner at (500, 500).
-        - <duration> is a non-negative integer
+        - <field_type> should be an empty tree that have its nw corner at
+        (0, 0) and se corner at (500, 500).
+        - <n_players> is at least 2.
         - <max_speed> and <max_vision> are non-negative integers.
+        - <spawns> is None, or holds <n_players> different points in the
+        field.
 
         >>> e_tag = EliminationTag(5, QuadTree((250, 250)), 5, 8)
         >>> len(e_tag.__getattribute__('_players')) == 5
@@ -367,36 +704,33 @@ class EliminationTag(Game):
         """
         self._players = {}
         self.field = field_type
-        point0 = random.randint(0, 500), random.randint(0, 500)
-        p0 = Player('p0', random.randint(0, max_vision),
-                    random.randint(1, max_speed), self, 'random', point0)
-        self.field.insert('p0', point0)
-        self._players['p0'] = p0
-        p0.select_enemy('p' + str(n_players - 1))
-        p0.select_target('p1')
-        point_n = random.randint(0, 500), random.randint(0, 500)
-        while point_n == point0:
-            point_n = random.randint(0, 500), random.randint(0, 500)
-        n_name = 'p' + str(n_players - 1)
-        pn = Player(n_name, random.randint(0, max_vision),
-                    random.randint(1, max_speed), self, 'random', point_n)
-        self.field.insert(n_name, point_n)
-        self._players[n_name] = pn
-        pn.select_target('p0')
-        pn.select_enemy('p' + str(n_players - 2))
-        for i in range(1, n_players - 1):
-            point = random.randint(0, 500), random.randint(0, 500)
-            if not self.field.contains_point(point):
-                name = 'p' + str(i)
-                player = Player(name, random.randint(0, max_vision),
-                                random.randint(1, max_speed), self, 'random',
-                                point)
-                player.select_enemy('p' + str(i - 1))
-                player.select_target('p' + str(i + 1))
-                self._players[name] = player
-                self.field.insert(name, point)
-
-    def handle_collision(self, player1: str, player2: str) -> None:
+        self.cosmetic = True
+        self.events = None
+        self.rng = random if rng is None else rng
+        self.ids = ids
+        self._next = {}
+        self._prev = {}
+        # p0 and the last player are placed first, then everyone else.
+        order = [0, n_players - 1] + list(range(1, n_players - 1))
+        if spawns is None:
+            spawns = spread(n_players, rng=self.rng)
+        keys = player_keys(n_players, ids)
+        for i in order:
+            name = keys[i]
+            self._players[name] = Player(name,
+                                         self.rng.randint(0, max_vision),
+                                         self.rng.randint(1, max_speed), self,
+                                         'random', spawns[i], self.rng)
+        self.field.insert_many([(keys[i], spawns[i]) for i in order])
+        for i in range(n_players):
+            name = keys[i]
+            target = keys[(i + 1) % n_players]
+            self._next[name] = target
+            self._prev[target] = name
+            self._players[name].select_target(target)
+            self._players[target].select_enemy(name)
+
+    def handle_collision(self, player1: Name, player2: Name) -> None:
         """ Perform some action when <player1> and <player2> collide.
         Both players reverses the direction they are moving in.
         If neither player is the other’s target: both players reverses the
@@ -418,29 +752,134 @@ class EliminationTag(Game):
         """
         p1 = self._players[player1]
         p2 = self._players[player2]
-        if player2 in p1.get_targets():
-            p1.ignore_target(player2)
-            new_target = p2.get_targets()[0]
-            p1.select_target(new_target)
-            self._players[new_target].ignore_enemy(player2)
-            self._players[new_target].select_enemy(player1)
-            del self._players[player2]
-            self.field.remove(player2)
-            p1.increase_points(1)
-        elif player1 in p2.get_targets():
-            p2.ignore_target(player1)
-            new_target = p1.get_targets()[0]
-            p2.select_target(new_target)
-            self._players[new_target].ignore_enemy(player1)
-            self._players[new_target].select_enemy(player2)
-            del self._players[player1]
-            self.field.remove(player1)
-            p2.increase_points(1)
+        if self._next[player1] == player2:
+            self._eliminate(player1, player2)
+        elif self._next[player2] == player1:
+            self._eliminate(player2, player1)
         else:
             p1.reverse_direction()
             p2.reverse_direction()
 
-    def check_for_winner(self) -> Optional[str]:
+    def _eliminate(self, hunter: Name, target: Name) -> None:
+        """ Eliminate <target>, splicing it out of the ring so that <hunter>
+        now hunts <target>'s target, and give <hunter> a point.
+
+        === Precondition ===
+        - self._next[hunter] == target
+
+        Runtime: O(1) apart from removing <target> from the field.
+        """
+        if self.events is not None:
+            self.events.emit(ELIMINATE, hunter, target)
+        new_target = self._next.pop(target)
+        del self._prev[target]
+        self._next[hunter] = new_target
+        self._prev[new_target] = hunter
+        p1 = self._players[hunter]
+        p1.ignore_target(target)
+        p1.select_target(new_target)
+        self._players[new_target].ignore_enemy(target)
+        self._players[new_target].select_enemy(hunter)
+        self.field.remove_point(self._players.pop(target).get_location())
+        p1.increase_points(1)
+
+    def target_of(self, name: Name) -> Optional[Name]:
+        """ Return the key of the player <name> is hunting, or None if
+        <name> is not in the game. Like get_player, this also takes the name
+        of a player in a game keyed by ids.
+
+        >>> e_tag = EliminationTag(3, QuadTree((250, 250)), 5, 8)
+        >>> e_tag.target_of('p2')
+        'p0'
+        >>> e_tag.handle_collision('p0', 'p1')
+        >>> e_tag.target_of('p0')
+        'p2'
+        >>> e_tag = EliminationTag(3, QuadTree((250, 250)), 5, 8, ids=True)
+        >>> e_tag.target_of('p2'), e_tag.target_of(2)
+        (0, 0)
+        """
+        if self.ids and isinstance(name, str):
+            name = player_id(name)
+        return self._next.get(name)
+
+    def hunter_of(self, name: Name) -> Optional[Name]:
+        """ Return the key of the player hunting <name>, or None if <name> is
+        not in the game. Like get_player, this also takes the name of a
+        player in a game keyed by ids.
+
+        >>> e_tag = EliminationTag(3, QuadTree((250, 250)), 5, 8)
+        >>> e_tag.hunter_of('p0')
+        'p2'
+        >>> e_tag.handle_collision('p0', 'p1')
+        >>> e_tag.hunter_of('p2')
+        'p0'
+        >>> e_tag = EliminationTag(3, QuadTree((250, 250)), 5, 8, ids=True)
+        >>> e_tag.hunter_of('p0'), e_tag.hunter_of('p9')
+        (2, None)
+        """
+        if self.ids and isinstance(name, str):
+            name = player_id(name)
+        return self._prev.get(name)
+
+    def get_player(self, name: Name) -> Optional[Player]:
+        """ Return the player named <name>, or None if that player has been
+        eliminated.
+
+        >>> e_tag = EliminationTag(5, QuadTree((250, 250)), 5, 8)
+        >>> e_tag.handle_collision('p0', 'p1')
+        >>> e_tag.get_player('p1') is None
+        True
+        """
+        player = self._players.get(name)
+        if player is None and self.ids and isinstance(name, str):
+            return self._players.get(player_id(name))
+        return player
+
+    def get_players(self) -> Dict[Name, Player]:
+        """ Return a new dictionary of every player not yet eliminated, keyed
+        by name.
+
+        >>> e_tag = EliminationTag(5, QuadTree((250, 250)), 5, 8)
+        >>> e_tag.handle_collision('p0', 'p1')
+        >>> sorted(e_tag.get_players())
+        ['p0', 'p2', 'p3', 'p4']
+        """
+        return dict(self._players)
+
+    def winner_due(self, elapsed: int) -> bool:
+        """ Return True if the game has ended after <elapsed> seconds of play.
+
+        >>> e_tag = EliminationTag(5, QuadTree((250, 250)), 5, 8)
+        >>> e_tag.winner_due(100)
+        False
+        """
+        return self.is_over(elapsed)
+
+    def is_over(self, elapsed: int) -> bool:
+        """ Return True if at most two players are left.
+
+        >>> e_tag = EliminationTag(3, QuadTree((250, 250)), 5, 8)
+        >>> e_tag.is_over(0)
+        False
+        >>> e_tag.handle_collision('p0', 'p1')
+        >>> e_tag.is_over(0)
+        True
+        """
+        return len(self._players) <= 2
+
+    def next_due(self, elapsed: int) -> Optional[int]:
+        """ Return the next second if at most two players are left, or None
+        since only an elimination can end the game otherwise.
+
+        >>> e_tag = EliminationTag(5, QuadTree((250, 250)), 5, 8)
+        >>> e_tag.next_due(3) is None
+        True
+        """
+        if len(self._players) <= 2:
+            return elapsed + 1
+        return None
+
+    def check_for_winner(self) -> Optional[Name]:
         """ Return the name of the player that have won the game, or None if no
         player has won yet.
         Return the name of the player with the most points.
@@ -470,5 +909,6 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(
-        config={'extra-imports': ['random', 'typing', 'players', 'trees'],
+        config={'extra-imports': ['random', 'typing', 'events', 'players',
+                                  'scenarios', 'trees'],
                 'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -0,0 +1,299 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Opt-in counters on the hot paths of both kinds of tree.
+
+While a Counters is enabled, every operation in OPERATIONS called on a
+QuadTree or TwoDTree is counted: its calls, the nodes it visited, the deepest
+node it reached, and the OutOfBoundsErrors it raised. A move_point is counted
+as made in place, relocated (removed and inserted again) or missing (no
+player was there), a move_many counts the same for every move in it, and
+names_in_range and names_in_box add up the number of names they returned.
+
+Counting works by replacing the methods of QuadTree and TwoDTree with
+counting wrappers when a Counters is enabled, and putting the originals back
+when it is disabled, so the trees cost nothing extra while no Counters is
+enabled. Only one Counters can be enabled at a time. A tracing.Tracer wraps
+the same methods through replace_methods, and the two can be enabled and
+disabled in any order. Every tree method that
+runs once per node visited is listed in NODE_METHODS; an operation called
+from inside another, like the contains_point inside an insert, is counted as
+part of the outer operation only.
+
+A Simulator given a Counters resets it at the start of every tick and keeps
+a snapshot of it at the end.
+"""
+from __future__ import annotations
+import functools
+from typing import Callable, Dict, Optional, Tuple
+from trees import OutOfBoundsError, QuadTree, TwoDTree
+
+# The operations counted.
+OPERATIONS = ('insert', 'insert_many', 'remove', 'remove_point',
+              'remove_many', 'move', 'move_point', 'move_many',
+              'contains_point', 'names_in_range', 'names_in_box', 'balance')
+
+# The methods of every kind of tree that run once for every node visited.
+NODE_METHODS = {
+    QuadTree: ('_help_contains', '_help_insert', '_help_insert_many',
+               'remove', '_help_remove_point', '_collect_points',
+               '_help_remove_many', '_find_point', '_find_point_tree',
+               '_check_side', '_name_in_range'),
+    TwoDTree: ('contains_point', '_help_insert', '_help_insert_many',
+               '_build', '_find_point', 'remove_point', '_help_remove_many',
+               '_remove_root', '_find_root', '_remove_node', '_check_side',
+               '_find_name', '_name_in_range', '_help_balance',
+               '_build_list')}
+
+# Marks a method that a class only inherits, and the Counters enabled now.
+_MISSING = object()
+_enabled = None
+
+Stats = Dict[str, int]
+Wrap = Callable[[Callable, type, str], Callable]
+Hook = Tuple[Dict[type, Tuple[str, ...]], Wrap]
+
+# Every hook installed by replace_methods and not restored yet, oldest
+# first, and the original of every method they replaced, keyed by its class
+# and name, or _MISSING if the class only inherited it.
+_hooks = []
+_originals = {}
+
+
+class Counters:
+    """ Counters of the tree operations run while this is enabled.
+
+    === Public Attributes ===
+    stats: the counters of every operation called so far, keyed by its name.
+    Every operation has 'calls', 'nodes', 'max_depth' and 'errors'; a move
+    also has 'in_place', 'relocated' and 'missing', move_many also
+    'rejected' for the moves it turned down instead of raising, and a range
+    query 'results'.
+
+    === Private Attributes ===
+    _hook: the methods replaced while this is enabled, or None.
+    _operation: the counters of the outermost operation running now, or
+    None between operations.
+    _depth: how many node methods are running now.
+    _relocated: whether the move running now removed its player.
+    _in_place: the number of moves of the move_many running now that were
+    made in place.
+    """
+    stats: Dict[str, Stats]
+    _hook: Optional[Hook]
+    _operation: Optional[Stats]
+    _depth: int
+    _relocated: bool
+    _in_place: int
+
+    def __init__(self) -> None:
+        """ Initialize a set of counters, all zero and not enabled yet.
+
+        >>> counters = Counters()
+        >>> tree = QuadTree((250, 250))
+        >>> with counters:
+        ...     tree.insert('a', (100, 100))
+        ...     tree.insert('b', (400, 400))
+        ...     tree.move_point((100, 100), 'N', 5)
+        ...     tree.move_point((400, 400), 'W', 200)
+        (100, 95)
+        (200, 400)
+        >>> counters.stats['insert']['calls']
+        2
+        >>> move = counters.stats['move_point']
+        >>> move['in_place'], move['relocated']
+        (1, 1)
+        >>> tree.insert('c', (300, 300))
+        >>> counters.stats['insert']['calls']
+        2
+        """
+        self.stats = {}
+        self._hook = None
+        self._operation = None
+        self._depth = 0
+        self._relocated = False
+        self._in_place = 0
+
+    def enable(self) -> None:
+        """ Start counting every operation on every tree.
+
+        Raise a ValueError if any Counters is enabled already.
+        """
+        global _enabled
+        if _enabled is not None:
+            raise ValueError('a Counters is already enabled')
+        _enabled = self
+        self._hook = replace_methods(
+            {cls: OPERATIONS + node_methods + ('_move_in_place',)
+             for cls, node_methods in NODE_METHODS.items()},
+            lambda method, cls, name: self._wrap(
+                method, name, name in OPERATIONS,
+                name in NODE_METHODS[cls]))
+
+    def disable(self) -> None:
+        """ Stop counting, and put back every method replaced. Do nothing if
+        these counters are not enabled. """
+        global _enabled
+        if self._hook is None:
+            return
+        restore_methods(self._hook)
+        self._hook = None
+        _enabled = None
+
+    def reset(self) -> None:
+        """ Set every counter back to zero. """
+        self.stats = {}
+
+    def snapshot(self) -> Dict[str, Stats]:
+        """ Return a copy of the counters as they are now. """
+        return {name: dict(stats) for name, stats in self.stats.items()}
+
+    def __enter__(self) -> Counters:
+        """ Enable these counters for the length of a with block. """
+        self.enable()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """ Disable these counters. """
+        self.disable()
+
+    def _wrap(self, method: Callable, name: str, operation: bool,
+              node: bool) -> Callable:
+        """ Return <method> wrapped to count its calls as the operation
+        <name> if <operation> is True, and as a node visited if <node> is
+        True. """
+
+        @functools.wraps(method)
+        def wrapper(tree: object, *args: object) -> object:
+            outer = operation and self._operation is None
+            if outer:
+                stats = self.stats.get(name)
+                if stats is None:
+                    stats = self.stats[name] = {'calls': 0, 'nodes': 0,
+                                                'max_depth': 0, 'errors': 0}
+                stats['calls'] += 1
+                self._operation = stats
+                self._relocated = False
+                self._in_place = 0
+            elif name in ('remove', 'remove_point', 'remove_many') and \
+                    self._operation is not None:
+                self._relocated = True
+            if node and self._operation is not None:
+                self._depth += 1
+                self._operation['nodes'] += 1
+                if self._depth > self._operation['max_depth']:
+                    self._operation['max_depth'] = self._depth
+            try:
+                result = method(tree, *args)
+            except OutOfBoundsError:
+                if outer:
+                    self._operation['errors'] += 1
+                raise
+            finally:
+                if node and self._operation is not None:
+                    self._depth -= 1
+                if outer:
+                    self._operation = None
+                    self._depth = 0
+            if outer:
+                _count_result(self, name, self.stats[name], result)
+            elif name == '_move_in_place' and result:
+                self._in_place += 1
+            return result
+
+        return wrapper
+
+
+def replace_methods(names: Dict[type, Tuple[str, ...]], wrap: Wrap) -> Hook:
+    """ Replace every method in <names> with wrap(method, its class, its
+    name), skipping the names a class does not have, and return the hook
+    that restore_methods takes to undo it. A method replaced by several
+    hooks is wrapped by each in turn, the oldest innermost, and hooks can
+    be restored in any order.
+
+    >>> hook = replace_methods(
+    ...     {QuadTree: ('size', 'balance')},
+    ...     lambda method, cls, name: lambda tree: -1)
+    >>> QuadTree((250, 250)).size()
+    -1
+    >>> restore_methods(hook)
+    >>> QuadTree((250, 250)).size()
+    1
+    """
+    hook = (names, wrap)
+    _hooks.append(hook)
+    _install()
+    return hook
+
+
+def restore_methods(hook: Hook) -> None:
+    """ Undo the replace_methods that returned <hook>, keeping every other
+    hook installed.
+
+    Raise a ValueError if <hook> is not installed.
+    """
+    for i, installed in enumerate(_hooks):
+        if installed is hook:
+            del _hooks[i]
+            _install()
+            return
+    raise ValueError('the hook is not installed')
+
+
+def _install() -> None:
+    """ Put back the original of every method replaced, then wrap the
+    methods of every hook in _hooks, oldest first. """
+    for (cls, name), original in _originals.items():
+        if original is _MISSING:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+    _originals.clear()
+    for names, wrap in _hooks:
+        for cls, methods in names.items():
+            for name in dict.fromkeys(methods):
+                if not hasattr(cls, name):
+                    continue
+                if (cls, name) not in _originals:
+                    _originals[cls, name] = cls.__dict__.get(name, _MISSING)
+                setattr(cls, name, wrap(getattr(cls, name), cls, name))
+
+
+def _count_result(counters: Counters, name: str, stats: Stats,
+                  result: object) -> None:
+    """ Add the <result> of a call of the operation <name> to <stats>. """
+    if name in ('move', 'move_point'):
+        if result is None:
+            kind = 'missing'
+        elif counters._relocated:
+            kind = 'relocated'
+        else:
+            kind = 'in_place'
+        stats[kind] = stats.get(kind, 0) + 1
+    elif name == 'move_many':
+        moved = sum(isinstance(item, tuple) for item in result)
+        missing = result.count(None)
+        for kind, count in (('in_place', counters._in_place),
+                            ('relocated', moved - counters._in_place),
+                            ('missing', missing),
+                            ('rejected', len(result) - moved - missing)):
+            stats[kind] = stats.get(kind, 0) + count
+    elif name in ('names_in_range', 'names_in_box'):
+        stats['results'] = stats.get('results', 0) + len(result)
+
+
+def enabled() -> Optional[Counters]:
+    """ Return the Counters enabled now, or None.
+
+    >>> enabled() is None
+    True
+    """
+    return _enabled
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['functools', 'typing', 'trees'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -0,0 +1,284 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Accounting of the memory a game and its field take up.
+
+report walks a game: the dictionaries holding its players, every Player
+and the target and enemy lists it keeps, and every node of its QuadTree or
+TwoDTree. It breaks the bytes it finds down into CATEGORIES. Every object is
+counted once, in the first category it is found in, so a name shared by a
+player, its team and its tree node is only counted as a name once.
+Sizes come from sys.getsizeof, which does not follow references, so every
+object reached is counted on its own.
+
+The relationships category also counts the names held in target and enemy
+lists. Those lists grow with the number of players a player hunts or
+avoids, so a game that gives every player a list of every other player
+shows up as a number of entries that grows with the square of the number of
+players. A player that looks its targets or enemies up in a team shared
+with the game (see Player.set_teams) holds no entries.
+
+A field loaded by QuadTree.load or TwoDTree.load reads its nodes from the
+file only when they are first used. report counts a node that has not been
+read yet as a node, and under 'unread', but not the nodes, points and names
+it would read: those are still in the file, not in memory.
+
+A PhaseMemory given to a Simulator uses tracemalloc to measure the peak
+memory allocated in every phase of every tick.
+"""
+from __future__ import annotations
+import sys
+import tracemalloc
+from typing import Dict, Optional, Set, Union
+from games import Game
+from trees import QuadTree, TwoDTree
+
+# The categories that bytes are broken down into, in the order they are
+# listed.
+CATEGORIES = ('nodes', 'points', 'names', 'relationships', 'players',
+              'game')
+
+# The attributes of every kind of tree node that hold other nodes, and
+# those that hold points.
+_CHILDREN = {QuadTree: ('_nw', '_ne', '_sw', '_se'), TwoDTree: ('_lt', '_gt')}
+_POINTS = {QuadTree: ('_point', '_centre'), TwoDTree: ('_point', '_nw', '_se')}
+
+Report = Dict[str, Dict[str, int]]
+
+
+class _Walk:
+    """ The objects counted so far by a report.
+
+    === Public Attributes ===
+    report: the bytes and objects counted in every category so far.
+
+    === Private Attributes ===
+    _seen: the id of every object counted so far.
+    """
+    report: Report
+    _seen: Set[int]
+
+    def __init__(self) -> None:
+        """ Initialize a walk that has counted nothing. """
+        self.report = {category: {'bytes': 0, 'objects': 0}
+                       for category in CATEGORIES}
+        self._seen = set()
+
+    def add(self, category: str, obj: object) -> bool:
+        """ Count <obj> in <category> and return True, unless it was counted
+        already. """
+        if id(obj) in self._seen:
+            return False
+        self._seen.add(id(obj))
+        self.report[category]['bytes'] += sys.getsizeof(obj)
+        self.report[category]['objects'] += 1
+        return True
+
+    def add_point(self, point: Optional[tuple]) -> None:
+        """ Count <point> and its coordinates as a point. """
+        if point is not None and self.add('points', point):
+            for coordinate in point:
+                self.add('points', coordinate)
+
+    def add_object(self, category: str, obj: object) -> None:
+        """ Count <obj> and the dictionary of its attributes in <category>.
+        """
+        if self.add(category, obj):
+            self.add(category, vars(obj))
+
+
+def report(game: Game) -> Report:
+    """ Return the bytes taken up by <game>, broken down into every category
+    in CATEGORIES, with the number of objects counted in each. The
+    relationships category also has the number of names in every target and
+    enemy list under 'entries', and the nodes category the number of nodes
+    not read from a dumped field yet under 'unread'.
+
+    Runtime: O(n + e) for n players and e entries in their lists.
+
+    >>> from games import Tag
+    >>> tag = Tag(10, QuadTree((250, 250)), 5, 8, 6)
+    >>> result = report(tag)
+    >>> result['players']['objects'] == 2 * len(tag.get_players())
+    True
+    >>> n = len(tag.get_players())
+    >>> result['relationships']['entries'] == 2 * (n - 1)
+    True
+    """
+    walk = _Walk()
+    walk.add_object('game', game)
+    players = game.get_players()
+    entries = 0
+    for name, player in players.items():
+        walk.add('names', name)
+        walk.add_object('players', player)
+        walk.add_point(player.get_location())
+        for relationship in (player._targets, player._enemies,
+                             player._neighbours):
+            if relationship is not None:
+                walk.add('relationships', relationship)
+                for other in relationship:
+                    walk.add('names', other)
+        entries += len(player._targets) + len(player._enemies)
+    for value in vars(game).values():
+        if isinstance(value, (set, dict)):
+            walk.add('game', value)
+    walk.report['relationships']['entries'] = entries
+    _walk_tree(walk, game.field)
+    return walk.report
+
+
+def tree_report(tree: Union[QuadTree, TwoDTree]) -> Report:
+    """ Return the bytes taken up by <tree> on its own, broken down the same
+    way as report.
+
+    >>> tree = TwoDTree((0, 0), (500, 500))
+    >>> tree.insert_many([('a', (100, 100)), ('b', (400, 400))])
+    >>> tree_report(tree)['nodes']['objects'] == 2 * tree.size()
+    True
+    """
+    walk = _Walk()
+    _walk_tree(walk, tree)
+    return walk.report
+
+
+def _walk_tree(walk: _Walk, tree: Union[QuadTree, TwoDTree]) -> None:
+    """ Count every node of <tree>, with its points and name, and the nodes
+    not read from a dumped field yet. """
+    stack = [tree]
+    unread = 0
+    while stack:
+        node = stack.pop()
+        walk.add_object('nodes', node)
+        # vars, unlike getattr, does not make a loaded node read its file.
+        attributes = vars(node)
+        if '_field' in attributes:
+            unread += 1
+            continue
+        kind = QuadTree if isinstance(node, QuadTree) else TwoDTree
+        for point in _POINTS[kind]:
+            walk.add_point(attributes[point])
+        if attributes['_name'] is not None:
+            walk.add('names', attributes['_name'])
+        for child in _CHILDREN[kind]:
+            if attributes[child] is not None:
+                stack.append(attributes[child])
+    walk.report['nodes']['unread'] = unread
+
+
+def total(result: Report) -> int:
+    """ Return the bytes counted in every category of <result>.
+
+    >>> total({'nodes': {'bytes': 10, 'objects': 1},
+    ...        'names': {'bytes': 5, 'objects': 1}})
+    15
+    """
+    return sum(category['bytes'] for category in result.values())
+
+
+def format_report(result: Report) -> str:
+    """ Return <result> as a table with one line for every category.
+
+    >>> print(format_report({'names': {'bytes': 100, 'objects': 2}}))
+    names                   100 bytes         2 objects
+    total                   100 bytes
+    """
+    lines = []
+    for category, counts in result.items():
+        line = '{:<14}{:>13,} bytes {:>9,} objects'.format(
+            category, counts['bytes'], counts['objects'])
+        if 'entries' in counts:
+            line += ' {:>9,} entries'.format(counts['entries'])
+        if counts.get('unread'):
+            line += ' {:>9,} unread'.format(counts['unread'])
+        lines.append(line)
+    lines.append('{:<14}{:>13,} bytes'.format('total', total(result)))
+    return '\n'.join(lines)
+
+
+class PhaseMemory:
+    """ The peak memory allocated in every phase of the ticks of a
+    Simulator, measured with tracemalloc.
+
+    The peak of a phase is the most memory traced at any point during it,
+    less the memory traced when it started. Memory allocated to log events
+    between two phases is counted in the phase after.
+
+    === Public Attributes ===
+    peaks: the largest peak of every phase over every tick measured.
+    tick_peaks: the peak of every phase in the last tick measured.
+
+    === Private Attributes ===
+    _started: True if tracemalloc was started by this PhaseMemory.
+    _base: the memory traced at the start of the phase running now.
+    """
+    peaks: Dict[str, int]
+    tick_peaks: Dict[str, int]
+    _started: bool
+    _base: int
+
+    def __init__(self) -> None:
+        """ Initialize a PhaseMemory that has measured nothing yet.
+
+        >>> from games import Tag
+        >>> from simulator import Simulator, PHASES
+        >>> memory = PhaseMemory()
+        >>> sim = Simulator(Tag(5, QuadTree((250, 250)), 5, 8, 6),
+        ...                 memory=memory)
+        >>> with memory:
+        ...     sim.run(max_ticks=2)
+        >>> sorted(memory.peaks) == sorted(PHASES)
+        True
+        """
+        self.peaks = {}
+        self.tick_peaks = {}
+        self._started = False
+        self._base = 0
+
+    def start(self) -> None:
+        """ Start tracing allocations, unless they are traced already. """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def stop(self) -> None:
+        """ Stop tracing allocations, if this PhaseMemory started it. """
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def __enter__(self) -> PhaseMemory:
+        """ Trace allocations for the length of a with block. """
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """ Stop tracing allocations. """
+        self.stop()
+
+    def reset(self) -> None:
+        """ Start measuring a new phase. """
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+
+    def phase(self, name: str) -> None:
+        """ Record the peak of the phase <name>, which just ended, and start
+        measuring the next one. Nothing is recorded while allocations are
+        not traced. """
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1] - self._base
+        self.tick_peaks[name] = peak
+        if peak > self.peaks.get(name, -1):
+            self.peaks[name] = peak
+        self.reset()
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['sys', 'tracemalloc', 'typing', 'games',
+                                  'trees'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
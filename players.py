@@ -6,15 +6,15 @@ University of Toronto
 """
 from __future__ import annotations
 import random
-from typing import List, Tuple, Optional, Set
-from trees import OutOfBoundsError
+from typing import Dict, List, Tuple, Optional, Set, Union
+from trees import Name, OutOfBoundsError, OUT_OF_BOUNDS, COLLISION
 
 
 class Player:
     """ A class for players.
 
     === Private Attribute ===
-    _name: The name of the player
+    _name: The name of the player, or its int id in a game keyed by ids
     _location: The current location of the player on the field
     _color: The colour used to draw the player object
     _vision: The distance a player can see in any direction
@@ -23,7 +23,19 @@ class Player:
     _points: The number of points the player has
     _targets: A list of player names that this player should move towards
     _enemies: A list of player names that this player should avoid
+    _target_team: The team whose players are this player's targets, used
+    instead of _targets if it is not None
+    _enemy_team: The team whose players are this player's enemies, used
+    instead of _enemies if it is not None
     _direction: A string indicating the direction the player is currently moving
+    _neighbours: The cached names of players that may come into vision before
+    the cache expires, or None if the cache has to be rebuilt
+    _neighbour_skin: The distance added to _vision when building _neighbours
+    _neighbour_ticks: The number of moves a cache stays valid for, or 0 if
+    next_direction should always query the field
+    _neighbour_age: The number of moves made since _neighbours was built
+    _rng: The random generator the direction of the player is drawn from,
+    which is the random module itself unless one was given
 
     === Representation Invariants ===
     - The _location of a player must fall within the boundaries set by the
@@ -37,20 +49,29 @@ class Player:
     - When implementing these methods, if one of the representation invariants
     would be violated, methods should always fail silently.
     """
-    _name: str
+    _name: Name
     _location: Tuple[int, int]
     _colour: str
     _vision: int
     _speed: int
     _game: 'Game'
     _points: int
-    _targets: List[str]
-    _enemies: List[str]
+    _targets: List[Name]
+    _enemies: List[Name]
+    _target_team: Optional[Dict[Name, Player]]
+    _enemy_team: Optional[Dict[Name, Player]]
     _direction: str
-
-    def __init__(self, name: str, vision: int, speed: int, game: 'Game',
-                 colour: str, location: Tuple[int, int]) -> None:
-        """ Initialize this player.
+    _neighbours: Optional[List[Name]]
+    _neighbour_skin: int
+    _neighbour_ticks: int
+    _neighbour_age: int
+    _rng: random.Random
+
+    def __init__(self, name: Name, vision: int, speed: int, game: 'Game',
+                 colour: str, location: Tuple[int, int],
+                 rng: Optional[random.Random] = None) -> None:
+        """ Initialize this player, drawing its direction from <rng>, or
+        from the module-global random generator if <rng> is None.
 
         >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
         'purple', (50, 100))
@@ -65,7 +86,14 @@ class Player:
         self._points = 0
         self._targets = []
         self._enemies = []
-        self._direction = random.choice(('N', 'S', 'E', 'W'))
+        self._target_team = None
+        self._enemy_team = None
+        self._rng = random if rng is None else rng
+        self._direction = self._rng.choice(('N', 'S', 'E', 'W'))
+        self._neighbours = None
+        self._neighbour_skin = 0
+        self._neighbour_ticks = 0
+        self._neighbour_age = 0
 
     def set_colour(self, colour: str) -> None:
         """ Change the colour of self
@@ -109,7 +137,27 @@ class Player:
         """
         return self._points
 
-    def select_target(self, name: str) -> None:
+    def get_location(self) -> Tuple[int, int]:
+        """ Return the current location of <self> on the field.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.get_location()
+        (50, 100)
+        """
+        return self._location
+
+    def get_direction(self) -> str:
+        """ Return the direction <self> is moving in.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.get_direction() in ('N', 'S', 'E', 'W')
+        True
+        """
+        return self._direction
+
+    def select_target(self, name: Name) -> None:
         """ Add a target to <self>'s target list.
 
         === Precondition ===
@@ -124,7 +172,7 @@ class Player:
         if name not in self._targets:
             self._targets.append(name)
 
-    def ignore_target(self, name: str) -> None:
+    def ignore_target(self, name: Name) -> None:
         """ Remove a target from <self>'s target list
 
         === Precondition ===
@@ -140,7 +188,42 @@ class Player:
         if name in self._targets:
             self._targets.remove(name)
 
-    def get_targets(self) -> List[str]:
+    def select_targets(self, names: List[Name]) -> None:
+        """ Add every name in <names> to <self>'s target list, in order,
+        unless it is a target already.
+
+        Runtime: O(t + k) for t targets and k names, where select_target
+        would take O(t * k).
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.select_target('p1')
+        >>> player.select_targets(['p2', 'p1', 'p3'])
+        >>> player.get_targets()
+        ['p1', 'p2', 'p3']
+        """
+        targets = set(self._targets)
+        for name in names:
+            if name not in targets:
+                targets.add(name)
+                self._targets.append(name)
+
+    def ignore_targets(self, names: Set[Name]) -> None:
+        """ Remove every name in <names> from <self>'s target list.
+
+        Runtime: O(t) for t targets, however many names are removed.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.select_target('p1')
+        >>> player.select_target('p2')
+        >>> player.ignore_targets({'p1', 'p3'})
+        >>> player.get_targets()
+        ['p2']
+        """
+        self._targets = [name for name in self._targets if name not in names]
+
+    def get_targets(self) -> List[Name]:
         """ Return a copy of the list of target names.
 
         >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
@@ -151,9 +234,11 @@ class Player:
         >>> player.get_targets()
         ['p1']
         """
+        if self._target_team is not None:
+            return list(self._target_team)
         return self._targets[:]
 
-    def select_enemy(self, name: str) -> None:
+    def select_enemy(self, name: Name) -> None:
         """ Add an enemy to <self>'s target list.
 
         === Precondition ===
@@ -168,7 +253,7 @@ class Player:
         if name not in self._enemies:
             self._enemies.append(name)
 
-    def ignore_enemy(self, name: str) -> None:
+    def ignore_enemy(self, name: Name) -> None:
         """ Remove an enemy from <self>'s enemy list
 
         === Precondition ===
@@ -184,7 +269,7 @@ class Player:
         if name in self._enemies:
             self._enemies.remove(name)
 
-    def get_enemies(self) -> List[str]:
+    def get_enemies(self) -> List[Name]:
         """ Return a copy of the list of enemy names.
 
         >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
@@ -195,8 +280,32 @@ class Player:
         >>> player.get_enemies()
         ['p1']
         """
+        if self._enemy_team is not None:
+            return list(self._enemy_team)
         return self._enemies[:]
 
+    def set_teams(self, targets: Optional[Dict[Name, Player]],
+                  enemies: Optional[Dict[Name, Player]]) -> None:
+        """ Make every player in the team <targets> a target of <self>, and
+        every player in the team <enemies> an enemy of <self>. A team is a
+        dictionary kept up to date by the game, so players joining or leaving
+        it need no call on <self>. A team of None means the target or enemy
+        list is used instead.
+
+        === Precondition ===
+        - <self> is in neither team.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> humans = {}
+        >>> player.set_teams(humans, None)
+        >>> humans['p1'] = None
+        >>> player.get_targets()
+        ['p1']
+        """
+        self._target_team = targets
+        self._enemy_team = enemies
+
     def reverse_direction(self) -> None:
         """ Update the direction so that <self> will move in the opposite
         direction.
@@ -231,6 +340,53 @@ class Player:
         """
         self._speed = speed
 
+    def get_vision(self) -> int:
+        """ Return the distance <self> can see in any direction.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.get_vision()
+        3
+        """
+        return self._vision
+
+    def get_speed(self) -> int:
+        """ Return the number of steps <self> moves in a single turn.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.get_speed()
+        1
+        """
+        return self._speed
+
+    def set_neighbour_list(self, max_speed: int, ticks: int) -> None:
+        """ Make next_direction look for targets and enemies in a cached list
+        of nearby players instead of querying the field on every call.
+
+        No player moves more than <max_speed> steps along one axis in a move,
+        so two players close at most 2 * <max_speed> steps per move. A list
+        of every player within _vision + 2 * <ticks> * <max_speed> therefore
+        holds every player that can come into vision during the next <ticks>
+        moves. The list is rebuilt once <self> has moved <ticks> times.
+        If <ticks> is 0, the cache is disabled.
+
+        === Precondition ===
+        - <max_speed> is at least the speed of every player on the field.
+        - <ticks> is a non-negative integer.
+        - every player moves at most once for each move of <self>.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.set_neighbour_list(2, 4)
+        >>> player.__getattribute__('_neighbour_skin')
+        16
+        """
+        self._neighbours = None
+        self._neighbour_skin = 2 * ticks * max_speed
+        self._neighbour_ticks = ticks
+        self._neighbour_age = 0
+
     def next_direction(self) -> Set[str]:
         """ Update the direction to move the next time self.move is called. This
         direction should be determined by the relative number of visible targets
@@ -241,7 +397,9 @@ class Player:
         enemies.
 
         Return a set of all equally good directions to move towards.
-        This method should call the names_in_range Tree method exactly twice.
+        This method should call the names_in_range Tree method exactly twice,
+        unless a neighbour list is set (see set_neighbour_list), in which case
+        the cached list is filtered instead.
         This method should set self._direction to a subset of:
         ('N', 'S', 'E', 'W')
 
@@ -259,19 +417,23 @@ class Player:
         ne = []
         sw = []
         se = []
-        directions = random.sample(['NE', 'SE', 'NE', 'SW'], 2)
-        if 'NW' in directions:
-            nw.extend(self._game.field.names_in_range(self._location, 'NW',
-                                                      self._vision))
-        if 'NE' in directions:
-            ne.extend(self._game.field.names_in_range(self._location, 'NE',
-                                                      self._vision))
-        if 'SW' in directions:
-            sw.extend(self._game.field.names_in_range(self._location, 'SW',
-                                                      self._vision))
-        if 'SE' in directions:
-            se.extend(self._game.field.names_in_range(self._location, 'SE',
-                                                      self._vision))
+        directions = self._rng.sample(['NE', 'SE', 'NE', 'SW'], 2)
+        if self._neighbour_ticks:
+            self._neighbours_in_range(directions, nw, ne, sw, se)
+        else:
+            field = self._game.field
+            if 'NW' in directions:
+                nw.extend(field.names_in_range(self._location, 'NW',
+                                               self._vision))
+            if 'NE' in directions:
+                ne.extend(field.names_in_range(self._location, 'NE',
+                                               self._vision))
+            if 'SW' in directions:
+                sw.extend(field.names_in_range(self._location, 'SW',
+                                               self._vision))
+            if 'SE' in directions:
+                se.extend(field.names_in_range(self._location, 'SE',
+                                               self._vision))
         n, w, s, e = self._help_next(nw, ne, sw, se)
         result = []
         if n == max(n, w, s, e):
@@ -282,44 +444,106 @@ class Player:
             result.append('S')
         if e == max(n, w, s, e):
             result.append('E')
-        self._direction = random.choice(result)
+        self._direction = self._rng.choice(result)
         return set(result)
 
-    def _help_next(self, nw: List[str], ne: List[str], sw: List[str],
-                   se: List[str]) -> tuple:
+    def wander(self) -> Set[str]:
+        """ Update the direction exactly as next_direction would when no
+        target or enemy is in vision, without looking at the field.
+
+        This draws the same random values as next_direction, so a player
+        that wanders ends up in the same state as one that looked.
+
+        >>> player = Player('p0', 3, 1, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.wander() == {'N', 'S', 'E', 'W'}
+        True
+        """
+        self._rng.sample(['NE', 'SE', 'NE', 'SW'], 2)
+        self._direction = self._rng.choice(['N', 'W', 'S', 'E'])
+        return {'N', 'W', 'S', 'E'}
+
+    def _neighbours_in_range(self, directions: List[str], nw: List[Name],
+                             ne: List[Name], sw: List[Name],
+                             se: List[Name]) -> None:
+        """ Split the self.next_direction function. Extend <nw>, <ne>, <sw>
+        and <se> with the names that names_in_range would return for each
+        direction in <directions>, using the cached neighbour list.
+        """
+        if self._neighbours is None or \
+                self._neighbour_age >= self._neighbour_ticks:
+            self._build_neighbours()
+        x0, y0 = self._location
+        vision = self._vision
+        for name in self._neighbours:
+            player = self._game.get_player(name)
+            if player is None:
+                continue
+            x1, y1 = player._location
+            dx, dy = x1 - x0, y1 - y0
+            if -vision <= dx <= vision and -vision <= dy <= vision:
+                if 'NW' in directions and dx <= 0 and dy <= 0:
+                    nw.append(name)
+                if 'NE' in directions and dx >= 0 and dy <= 0:
+                    ne.append(name)
+                if 'SW' in directions and dx <= 0 and dy >= 0:
+                    sw.append(name)
+                if 'SE' in directions and dx >= 0 and dy >= 0:
+                    se.append(name)
+
+    def _build_neighbours(self) -> None:
+        """ Rebuild the cached list of players within _vision plus the skin
+        distance of <self>.
+        """
+        field = self._game.field
+        radius = self._vision + self._neighbour_skin
+        names = set()
+        for direction in ('NW', 'NE', 'SW', 'SE'):
+            names.update(field.names_in_range(self._location, direction,
+                                              radius))
+        names.discard(self._name)
+        self._neighbours = list(names)
+        self._neighbour_age = 0
+
+    def _help_next(self, nw: List[Name], ne: List[Name], sw: List[Name],
+                   se: List[Name]) -> tuple:
         """ Split the self.next_direction function. This function evaluates
         the score to move in each directins.
         """
+        targets = self._targets if self._target_team is None \
+            else self._target_team
+        enemies = self._enemies if self._enemy_team is None \
+            else self._enemy_team
         n = 0
         w = 0
         s = 0
         e = 0
         for name in nw:
-            if name in self._enemies:
+            if name in enemies:
                 s += 1
                 e += 1
-            if name in self._targets:
+            if name in targets:
                 n += 1
                 w += 1
         for name in ne:
-            if name in self._enemies:
+            if name in enemies:
                 s += 1
                 w += 1
-            if name in self._targets:
+            if name in targets:
                 n += 1
                 e += 1
         for name in sw:
-            if name in self._enemies:
+            if name in enemies:
                 n += 1
                 e += 1
-            if name in self._targets:
+            if name in targets:
                 s += 1
                 w += 1
         for name in se:
-            if name in self._enemies:
+            if name in enemies:
                 n += 1
                 w += 1
-            if name in self._targets:
+            if name in targets:
                 s += 1
                 e += 1
         return n, w, s, e
@@ -339,6 +563,7 @@ class Player:
         >>> loc in [(51, 100), (49, 100), (50, 101), (50, 99)]
         True
         """
+        self._neighbour_age += 1
         try:
             loc = self._game.field.move_point(
                 self._location, self._direction, self._speed)
@@ -347,6 +572,77 @@ class Player:
         except OutOfBoundsError:
             self.reverse_direction()
 
+    def plan_move(self) -> Tuple[Tuple[int, int], str, int]:
+        """ Return the (point, direction, steps) move <self> would make, for
+        passing to the move_many method of the field with the moves of other
+        players.
+
+        >>> player = Player('p0', 3, 10, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.__setattr__('_direction', 'W')
+        >>> player.plan_move()
+        ((50, 100), 'W', 10)
+        """
+        return self._location, self._direction, self._speed
+
+    def apply_move(self, result: Union[Tuple[int, int], str, None]) -> None:
+        """ Finish the move planned by plan_move, given the <result> the field
+        gave for it. If the move was blocked, reverse the direction of self
+        as move does.
+
+        >>> player = Player('p0', 3, 10, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.__setattr__('_direction', 'W')
+        >>> player.apply_move((40, 100))
+        >>> player.get_location()
+        (40, 100)
+        >>> player.apply_move('out of bounds')
+        >>> player.__getattribute__('_direction')
+        'E'
+        """
+        self._neighbour_age += 1
+        if result == OUT_OF_BOUNDS or result == COLLISION:
+            self.reverse_direction()
+        elif result is not None:
+            self._location = result
+
+    def drift(self, nw: Tuple[int, int], se: Tuple[int, int]) -> None:
+        """ Move <self> as move would if no other player were in the way,
+        without updating the field. <nw> and <se> are the corners of the
+        field. The caller is responsible for updating the field later.
+
+        >>> player = Player('p0', 3, 10, 'Game (a valid game class)',\
+        'purple', (50, 100))
+        >>> player.__setattr__('_direction', 'W')
+        >>> player.drift((0, 0), (500, 500))
+        >>> player.get_location()
+        (40, 100)
+        >>> player.drift((0, 0), (45, 500))
+        >>> player.get_location()
+        (30, 100)
+        >>> player.drift((35, 0), (500, 500))
+        >>> player.get_location()
+        (30, 100)
+        >>> player.__getattribute__('_direction')
+        'E'
+        """
+        self._neighbour_age += 1
+        if self._speed == 0:
+            return
+        x, y = self._location
+        if self._direction == 'N':
+            y -= self._speed
+        elif self._direction == 'S':
+            y += self._speed
+        elif self._direction == 'E':
+            x += self._speed
+        else:
+            x -= self._speed
+        if nw[0] <= x <= se[0] and nw[1] <= y <= se[1]:
+            self._location = x, y
+        else:
+            self.reverse_direction()
+
 
 if __name__ == '__main__':
     import python_ta
@@ -0,0 +1,192 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Random generators that can be handed to a game and its players in place of
+the module-global random generator.
+
+Every game takes an rng: a random.Random that its spawn points, its
+players' speed, vision and first direction, and every random choice the
+players make while the game runs are drawn from. Two games given
+generators seeded the same play out the same way, whatever else draws from
+the module-global generator in the meantime, so games can run side by side
+in one process and be replayed exactly. A game given no rng uses the
+module-global generator, as before.
+
+Every tick, every player draws the two quadrants it looks in and breaks
+ties between equally good directions, through random.sample and
+random.choice, which cost a few calls into the generator each. A
+BatchedRandom draws those small choices from blocks of indices drawn BLOCK
+at a time instead, so each costs a step through its block. It draws
+different values from a random.Random with the same seed, but is just as
+reproducible.
+"""
+from __future__ import annotations
+import random
+from collections import abc
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# The number of indices a BatchedRandom draws at a time, and the most items
+# it draws a choice from that way.
+BLOCK = 4096
+MAX_ITEMS = 256
+
+# The blocks of indices drawn ahead by a BatchedRandom, keyed by the number
+# they are below: each block, with how many of its indices were used.
+Blocks = Dict[int, Tuple[List[int], int]]
+
+
+class BatchedRandom(random.Random):
+    """ A random.Random that draws the index of every choice over at most
+    MAX_ITEMS items, and of every sample of 2 of them, from a block of
+    indices drawn ahead of time.
+
+    A block of BLOCK indices below n is drawn with a single call of choices
+    the first time an index below n is needed, and again every time the
+    last one runs out, so every index is as likely as it is in
+    random.Random. A sample of 2 of n items is drawn as one of the
+    n * (n - 1) ordered pairs of them, from blocks of its own.
+
+    === Private Attributes ===
+    _choices: the indices below n drawn ahead for choice and not used yet,
+    keyed by n.
+    _pairs: the indices of ordered pairs of n items drawn ahead for sample
+    and not used yet, keyed by n * (n - 1).
+
+    === Representation Invariants ===
+    - every key of _choices is at most MAX_ITEMS, and every key of _pairs
+    is n * (n - 1) for some n from 2 to MAX_ITEMS.
+    """
+    _choices: Dict[int, Iterator[int]]
+    _pairs: Dict[int, Iterator[int]]
+
+    def __init__(self, seed: Optional[object] = None) -> None:
+        """ Initialize a generator seeded with <seed>.
+
+        >>> first, second = BatchedRandom(3), BatchedRandom(3)
+        >>> directions = ['N', 'S', 'E', 'W']
+        >>> [first.choice(directions) for _ in range(9)] == \
+        [second.choice(directions) for _ in range(9)]
+        True
+        >>> first.sample(directions, 2) == second.sample(directions, 2)
+        True
+        """
+        self._choices = {}
+        self._pairs = {}
+        random.Random.__init__(self, seed)
+
+    def seed(self, a: Optional[object] = None, version: int = 2) -> None:
+        """ Seed this generator with <a>, dropping the indices drawn ahead.
+        """
+        random.Random.seed(self, a, version)
+        self._choices = {}
+        self._pairs = {}
+
+    def getstate(self) -> Tuple[object, Blocks, Blocks]:
+        """ Return the state of this generator: that of a random.Random,
+        and every block of indices drawn ahead for choice and for sample,
+        with how many of them were used. """
+        return (random.Random.getstate(self), _blocks(self._choices),
+                _blocks(self._pairs))
+
+    def setstate(self, state: Tuple[object, Blocks, Blocks]) -> None:
+        """ Restore a state returned by getstate.
+
+        >>> rng = BatchedRandom(5)
+        >>> rng.choice(range(10)) is not None
+        True
+        >>> state = rng.getstate()
+        >>> first = [rng.choice(range(10)) for _ in range(5)]
+        >>> rng.setstate(state)
+        >>> [rng.choice(range(10)) for _ in range(5)] == first
+        True
+        """
+        base, choices, pairs = state
+        random.Random.setstate(self, base)
+        self._choices = _iterators(choices)
+        self._pairs = _iterators(pairs)
+
+    def _draw(self, cache: Dict[int, Iterator[int]], n: int) -> int:
+        """ Draw a new block of indices below <n> into <cache>, and return
+        its first. """
+        indices = iter(self.choices(range(n), k=BLOCK))
+        cache[n] = indices
+        return next(indices)
+
+    def choice(self, seq: Sequence) -> object:
+        """ Return a random item of the non-empty sequence <seq>. """
+        n = len(seq)
+        if not 0 < n <= MAX_ITEMS:
+            return random.Random.choice(self, seq)
+        indices = self._choices.get(n)
+        if indices is not None:
+            for i in indices:
+                return seq[i]
+        return seq[self._draw(self._choices, n)]
+
+    def sample(self, population: Sequence, k: int, *,
+               counts: Optional[List[int]] = None) -> List[object]:
+        """ Return <k> different items of <population>, in random order, as
+        random.Random.sample does. """
+        n = len(population)
+        if k != 2 or not 2 <= n <= MAX_ITEMS or counts is not None or \
+                not isinstance(population, abc.Sequence):
+            return random.Random.sample(self, population, k, counts=counts)
+        pairs = n * (n - 1)
+        indices = self._pairs.get(pairs)
+        pair = None
+        if indices is not None:
+            for pair in indices:
+                break
+        if pair is None:
+            pair = self._draw(self._pairs, pairs)
+        first, second = divmod(pair, n - 1)
+        if second >= first:
+            second += 1
+        return [population[first], population[second]]
+
+
+def _blocks(cache: Dict[int, Iterator[int]]) -> Blocks:
+    """ Return every block of indices in <cache> that has indices left, with
+    how many of them were used. """
+    blocks = {}
+    for n, indices in cache.items():
+        reduced = indices.__reduce__()
+        # An iterator that has run out no longer holds its block.
+        if len(reduced) == 3:
+            _, (block,), used = reduced
+            if used < len(block):
+                blocks[n] = (block, used)
+    return blocks
+
+
+def _iterators(blocks: Blocks) -> Dict[int, Iterator[int]]:
+    """ Return the iterators over the blocks in <blocks>, each past the
+    indices already used. """
+    cache = {}
+    for n, (block, used) in blocks.items():
+        indices = iter(block)
+        indices.__setstate__(used)
+        cache[int(n)] = indices
+    return cache
+
+
+def make_rng(kind: str, seed: object) -> random.Random:
+    """ Return a new generator of <kind>, 'random' for a random.Random or
+    'batched' for a BatchedRandom, seeded with <seed>.
+
+    >>> type(make_rng('batched', 0)).__name__
+    'BatchedRandom'
+    """
+    if kind == 'random':
+        return random.Random(seed)
+    if kind == 'batched':
+        return BatchedRandom(seed)
+    raise ValueError('unknown generator ' + kind)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['random', 'collections', 'typing'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -0,0 +1,805 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+A compact replay format for recorded games, with fast seeking.
+
+A Recorder is passed to a simulator in place of an EventLog. Every <every>
+ticks it writes a keyframe holding the location, direction and points of
+every player, and for every tick in between it writes only what changed:
+moves, direction changes, and the handled collisions, tags, infections,
+eliminations and winner. Every number is a varint. A move packs the
+difference between its player's id and the one before, its steps and its
+direction into one varint, so most moves take one byte. A player that moves
+is taken to face the way it moved, so only the direction changes a move
+does not imply are stored; and the collisions that follow one another are
+stored as one run of pairs of ids.
+
+A Replay reads the file back. It seeks to any tick by starting from the
+nearest keyframe at or before it and applying the changes of the ticks in
+between, and it can rebuild a field tick by tick from the moves alone,
+without running the players' AI.
+
+The file starts with MAGIC, a version byte and a JSON header naming every
+player, followed by keyframe and tick blocks, and ends with an index of the
+keyframes, the offset of that index and MAGIC again. A file cut short is
+read by scanning its blocks instead.
+"""
+from __future__ import annotations
+import bisect
+import json
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from events import MOVE, DIRECTION, COLLISION, TAG, INFECT, ELIMINATE, \
+    WINNER
+from games import Game
+from trees import QuadTree, TwoDTree
+
+# The first and last bytes of every replay file, and the version of its
+# layout.
+MAGIC = b'TAGR'
+VERSION = 2
+
+# The directions a player can move in, stored by their index.
+DIRECTIONS = ('N', 'S', 'E', 'W')
+
+# The steps of a move are stored in three bits of its varint, between its
+# direction and its player: 0 marks a place, whose location follows, and
+# _MORE_STEPS a move whose steps follow.
+_MORE_STEPS = 7
+
+# The kinds of block in a replay file.
+_KEYFRAME, _TICK, _INDEX = 1, 2, 3
+
+# The code of every kind of change stored after the moves and direction
+# changes of a tick block; a COLLISION code starts a run of collisions. A
+# PLACE is a change of location that is not a single move along one axis; it
+# is stored among the moves.
+_PLACE = 'place'
+_CODES = {COLLISION: 3, TAG: 4, INFECT: 5, ELIMINATE: 6, WINNER: 7}
+_KINDS = {code: kind for kind, code in _CODES.items()}
+
+_FOOTER = struct.Struct('<Q4s')
+
+# The state of a player: its location, direction and points.
+PlayerState = Tuple[Tuple[int, int], str, int]
+
+
+def _varint(value: int, out: bytearray) -> None:
+    """ Append the non-negative <value> to <out> as a varint: seven bits per
+    byte, lowest first, with the high bit set on every byte but the last.
+
+    >>> out = bytearray()
+    >>> _varint(300, out)
+    >>> bytes(out)
+    b'\\xac\\x02'
+    """
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    """ Return <value> mapped to a non-negative int, so that numbers close
+    to zero, negative or not, are small.
+
+    >>> [_zigzag(value) for value in (0, -1, 1, -2, 2)]
+    [0, 1, 2, 3, 4]
+    """
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    """ Return the int that _zigzag maps to <value>.
+
+    >>> [_unzigzag(value) for value in range(5)]
+    [0, -1, 1, -2, 2]
+    """
+    return value >> 1 if value & 1 == 0 else -((value + 1) >> 1)
+
+
+def _read_varint(data: Union[bytes, memoryview], offset: int) \
+        -> Tuple[int, int]:
+    """ Return the varint in <data> at <offset>, and the offset after it.
+
+    >>> _read_varint(b'\\xac\\x02', 0)
+    (300, 2)
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Recorder:
+    """ Records a game into a replay file. A Recorder is passed to a
+    Simulator as its events, and closed once the simulation is over.
+
+    === Public Attributes ===
+    path: the replay file.
+    every: the number of ticks between two keyframes.
+
+    === Private Attributes ===
+    _game: the game being recorded.
+    _file: the open replay file.
+    _ids: the id of every player, which is its index in the header.
+    _locations: the last recorded location of every player.
+    _headings: the direction of every player at the start of _tick.
+    _tick: the tick whose changes are being recorded.
+    _end: the number of ticks run so far.
+    _moves: the moves recorded for _tick so far.
+    _move_count: the number of moves in _moves.
+    _last_move: the id of the player in the last of _moves, or 0.
+    _steps: the index of the direction of every player that moved along
+        one axis in _tick so far, in the order they moved.
+    _turns: the name and new direction of every direction change recorded
+        for _tick so far.
+    _collisions: the run of collisions recorded last for _tick, if no
+        other change has been recorded since.
+    _collision_count: the number of collisions in _collisions.
+    _changes: every other change recorded for _tick so far.
+    _keyframes: the tick and file offset of every keyframe written.
+
+    === Representation Invariants ===
+    - every >= 1
+    """
+    path: str
+    every: int
+    _game: Game
+    _file: object
+    _ids: Dict[str, int]
+    _locations: Dict[str, Tuple[int, int]]
+    _headings: Dict[str, str]
+    _tick: int
+    _end: int
+    _moves: bytearray
+    _move_count: int
+    _last_move: int
+    _steps: Dict[str, int]
+    _turns: List[Tuple[str, str]]
+    _collisions: bytearray
+    _collision_count: int
+    _changes: bytearray
+    _keyframes: List[Tuple[int, int]]
+
+    def __init__(self, path: str, game: Game, every: int = 50,
+                 tick: int = 0) -> None:
+        """ Initialize a recorder of <game>, which has run <tick> ticks so
+        far, writing a keyframe to <path> every <every> ticks and one now.
+        """
+        self.path = path
+        self.every = every
+        self._game = game
+        players = game.get_players()
+        self._ids = {name: i for i, name in enumerate(players)}
+        self._locations = {name: player.get_location()
+                           for name, player in players.items()}
+        self._headings = {name: player.get_direction()
+                          for name, player in players.items()}
+        self._tick = tick
+        self._end = tick
+        self._keyframes = []
+        self._moves = bytearray()
+        self._collisions = bytearray()
+        self._changes = bytearray()
+        self._move_count = self._collision_count = self._last_move = 0
+        self._steps = {}
+        self._turns = []
+        nw, se = game.field.bounds()
+        header = json.dumps({'names': list(players), 'every': every,
+                             'game': type(game).__name__,
+                             'field': type(game.field).__name__,
+                             'nw': list(nw), 'se': list(se)}).encode()
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        _varint(len(header), out)
+        out += header
+        self._file = open(path, 'wb')
+        self._file.write(out)
+        self._keyframe()
+
+    @property
+    def tick(self) -> int:
+        """ Return the tick whose changes are being recorded. """
+        return self._tick
+
+    @tick.setter
+    def tick(self, tick: int) -> None:
+        """ Finish recording the current tick and start recording <tick>,
+        writing a keyframe first if one is due. """
+        if tick == self._tick:
+            self._end = tick + 1
+            return
+        self._end_tick()
+        self._tick = tick
+        self._end = tick + 1
+        if tick % self.every == 0:
+            self._keyframe()
+
+    def emit(self, kind: str, *fields: object) -> None:
+        """ Record an event of <kind> with <fields> in the current tick, as
+        an EventLog would. """
+        ids = self._ids
+        if kind == MOVE:
+            name, x, y = fields
+            x0, y0 = self._locations[name]
+            self._locations[name] = x, y
+            out = self._moves
+            delta = _zigzag(ids[name] - self._last_move) << 5
+            self._last_move = ids[name]
+            self._move_count += 1
+            if x == x0 and y != y0:
+                steps, direction = abs(y - y0), 0 if y < y0 else 1
+            elif y == y0 and x != x0:
+                steps, direction = abs(x - x0), 2 if x > x0 else 3
+            else:
+                # Zero steps marks a place: the new location follows.
+                _varint(delta, out)
+                _varint(x, out)
+                _varint(y, out)
+                return
+            self._steps[name] = direction
+            if steps < _MORE_STEPS:
+                _varint(delta | steps << 2 | direction, out)
+            else:
+                _varint(delta | _MORE_STEPS << 2 | direction, out)
+                _varint(steps, out)
+        elif kind == DIRECTION:
+            self._turns.append(fields)
+        elif kind == COLLISION:
+            self._collision_count += 1
+            _varint(ids[fields[0]], self._collisions)
+            _varint(ids[fields[1]], self._collisions)
+        elif kind == WINNER:
+            self._end_collisions()
+            out = self._changes
+            _varint(_CODES[WINNER], out)
+            if fields[0] is None:
+                _varint(0, out)
+            else:
+                encoded = str(fields[0]).encode()
+                _varint(len(encoded) + 1, out)
+                out += encoded
+        else:
+            # Every other kind is a pair of players; an elimination without
+            # a hunter stores 0, so every id is stored plus one.
+            self._end_collisions()
+            out = self._changes
+            _varint(_CODES[kind], out)
+            for name in fields:
+                _varint(0 if name is None else ids[name] + 1, out)
+
+    def extend(self, records: List[Tuple[object, ...]]) -> None:
+        """ Record every record in <records>, each stamped with its tick and
+        kind as an EventLog's are. """
+        emit = self.emit
+        for record in records:
+            emit(*record[1:])
+
+    def close(self) -> None:
+        """ Write the last tick and the index of keyframes, and close the
+        file. """
+        self._end_tick()
+        out = bytearray([_INDEX])
+        _varint(self._end, out)
+        _varint(len(self._keyframes), out)
+        for tick, offset in self._keyframes:
+            _varint(tick, out)
+            _varint(offset, out)
+        offset = self._file.tell()
+        self._file.write(bytes(out) + _FOOTER.pack(offset, MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> Recorder:
+        """ Return this recorder, to be closed at the end of a with block.
+        """
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """ Close this recorder. """
+        self.close()
+
+    def _end_tick(self) -> None:
+        """ Write the changes of the current tick, if there are any. """
+        self._end_collisions()
+        if self._move_count or self._turns or self._changes:
+            body = bytearray()
+            _varint(self._move_count, body)
+            body += self._moves
+            self._write_turns(body)
+            body += self._changes
+            out = bytearray([_TICK])
+            _varint(self._tick, out)
+            _varint(len(body), out)
+            self._file.write(bytes(out + body))
+        self._moves = bytearray()
+        self._changes = bytearray()
+        self._move_count = self._last_move = 0
+        self._steps = {}
+        self._turns = []
+
+    def _write_turns(self, out: bytearray) -> None:
+        """ Append to <out> the direction changes of the current tick that
+        its moves do not imply, and bring _headings up to date.
+
+        A player that moved along an axis is read back facing the way it
+        moved, or the other way if its bit is set in the bits that follow
+        the moves, one for each player that moved in the order they moved.
+        A direction change is stored unless its move implies it, and so is
+        the direction of a player that moved and ended up facing neither
+        way. The changes moves imply are read back in the order they were
+        recorded, so each change stored is followed by the number of those
+        that came before it, less the number before the change stored
+        before it.
+        """
+        headings = self._headings
+        ids = self._ids
+        turned = dict(self._turns)
+        bits = bytearray((len(self._steps) + 7) // 8)
+        implies = {}
+        for i, (name, index) in enumerate(self._steps.items()):
+            final = DIRECTIONS.index(turned.get(name, headings[name]))
+            if final == index ^ 1:
+                bits[i >> 3] |= 1 << (i & 7)
+                index = final
+            implies[name] = index
+        out += bits
+        stored = []
+        implied = 0
+        for name, direction in self._turns:
+            if implies.get(name) == DIRECTIONS.index(direction):
+                implied += 1
+            else:
+                stored.append((name, direction, implied))
+        for name, index in implies.items():
+            if name not in turned and DIRECTIONS[index] != headings[name]:
+                stored.append((name, headings[name], implied))
+        headings.update(turned)
+        _varint(len(stored), out)
+        last = before = 0
+        for name, direction, implied in stored:
+            _varint(_zigzag(ids[name] - last) << 2 |
+                    DIRECTIONS.index(direction), out)
+            _varint(implied - before, out)
+            last, before = ids[name], implied
+
+    def _end_collisions(self) -> None:
+        """ Write the run of collisions recorded last, if there is one. """
+        if self._collision_count:
+            _varint(_CODES[COLLISION], self._changes)
+            _varint(self._collision_count, self._changes)
+            self._changes += self._collisions
+            self._collisions = bytearray()
+            self._collision_count = 0
+
+    def _keyframe(self) -> None:
+        """ Write the state of every player as a keyframe of the current
+        tick. """
+        players = self._game.get_players()
+        out = bytearray([_KEYFRAME])
+        _varint(self._tick, out)
+        _varint(len(players), out)
+        for name, player in players.items():
+            x, y = player.get_location()
+            self._locations[name] = x, y
+            self._headings[name] = player.get_direction()
+            _varint(self._ids[name], out)
+            _varint(x, out)
+            _varint(y, out)
+            _varint(DIRECTIONS.index(player.get_direction()), out)
+            _varint(player.get_points(), out)
+        self._keyframes.append((self._tick, self._file.tell()))
+        self._file.write(bytes(out))
+
+
+class Replay:
+    """ A recorded game, read from a replay file.
+
+    === Public Attributes ===
+    names: the name of every player, indexed by id.
+    every: the number of ticks between two keyframes.
+    end: the number of ticks recorded.
+    header: everything the recorder wrote about the game and its field.
+
+    === Private Attributes ===
+    _data: the contents of the file.
+    _keyframes: the tick of every keyframe, in increasing order.
+    _offsets: the file offset of every keyframe, in the same order.
+    _body: the offset of the first block.
+    """
+    names: List[str]
+    every: int
+    end: int
+    header: Dict[str, object]
+    _data: bytes
+    _keyframes: List[int]
+    _offsets: List[int]
+    _body: int
+
+    def __init__(self, path: str) -> None:
+        """ Read the replay file at <path>.
+
+        Raise a ValueError if it is not a replay file.
+
+        >>> import os, random, tempfile
+        >>> from games import Tag
+        >>> from simulator import Simulator
+        >>> path = os.path.join(tempfile.mkdtemp(), 'game.replay')
+        >>> game = Tag(5, QuadTree((250, 250)), 5, 8, 6)
+        >>> with Recorder(path, game, every=4) as recorder:
+        ...     Simulator(game, events=recorder).run(max_ticks=10)
+        >>> replay = Replay(path)
+        >>> replay.end
+        10
+        >>> replay.seek(10) == {name: (player.get_location(),
+        ...                            player.get_direction(),
+        ...                            player.get_points())
+        ...                     for name, player in game.get_players().items()}
+        True
+        """
+        with open(path, 'rb') as file:
+            self._data = data = file.read()
+        if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+            raise ValueError(path + ' is not a replay file')
+        length, offset = _read_varint(data, len(MAGIC) + 1)
+        self.header = json.loads(data[offset:offset + length].decode())
+        self.names = self.header['names']
+        self.every = self.header['every']
+        self._body = offset + length
+        self._keyframes = []
+        self._offsets = []
+        if len(data) >= self._body + _FOOTER.size and \
+                data[-len(MAGIC):] == MAGIC:
+            index = _FOOTER.unpack_from(data, len(data) - _FOOTER.size)[0]
+            self.end, offset = _read_varint(data, index + 1)
+            count, offset = _read_varint(data, offset)
+            for _ in range(count):
+                tick, offset = _read_varint(data, offset)
+                start, offset = _read_varint(data, offset)
+                self._keyframes.append(tick)
+                self._offsets.append(start)
+        else:
+            self._scan()
+
+    def _scan(self) -> None:
+        """ Find every keyframe and the number of ticks recorded in a file
+        with no index, up to where it was cut short. """
+        data = self._data
+        offset = self._body
+        self.end = 0
+        while offset < len(data):
+            try:
+                start = offset
+                kind = data[offset]
+                tick, offset = _read_varint(data, offset + 1)
+                if kind == _KEYFRAME:
+                    count, offset = _read_varint(data, offset)
+                    for _ in range(5 * count):
+                        offset = _read_varint(data, offset)[1]
+                elif kind == _TICK:
+                    length, offset = _read_varint(data, offset)
+                    offset += length
+                else:
+                    return
+            except IndexError:
+                return
+            if offset > len(data):
+                return
+            if kind == _KEYFRAME:
+                self._keyframes.append(tick)
+                self._offsets.append(start)
+            self.end = max(self.end, tick + (kind == _TICK))
+
+    def seek(self, tick: int) -> Dict[str, PlayerState]:
+        """ Return the state of every player still in the game after <tick>
+        ticks, keyed by name.
+
+        === Precondition ===
+        - 0 <= tick <= self.end
+        """
+        state = {}
+        for _ in self._run(tick, state):
+            pass
+        return state
+
+    def records(self, start: int = 0,
+                stop: Optional[int] = None) -> Iterator[Tuple[object, ...]]:
+        """ Yield every change recorded in ticks <start> up to but not
+        including <stop> (or the end), as the records read_events gives:
+        (tick, kind, field, ...). Within a tick, the moves come first, then
+        the direction changes, then the rest in the order they happened.
+        """
+        state = {}
+        for record in self._run(self.end if stop is None else stop, state,
+                                start):
+            if record[1] == MOVE:
+                yield record[:5]
+            elif record[1] == _PLACE:
+                yield (record[0], MOVE) + record[2:]
+            elif record[1] == ELIMINATE:
+                yield record[:4]
+            else:
+                yield record
+
+    def play(self, field: Union[QuadTree, TwoDTree], start: int = 0,
+             stop: Optional[int] = None) -> Iterator[int]:
+        """ Fill the empty <field> with every player as it was after <start>
+        ticks, then move the players through <field> one tick at a time up
+        to <stop> (or the end), yielding the number of ticks played after
+        each tick. The players' AI is not run: every move is read from the
+        file and made with one move_many per tick.
+        """
+        state = self.seek(start)
+        field.insert_many([(name, location)
+                           for name, (location, _, _) in state.items()])
+        stop = self.end if stop is None else stop
+        moves = []
+        tick = start
+        for record in self._run(stop, state, start, seek=start):
+            if record[0] != tick:
+                field.move_many(moves)
+                moves = []
+                for skipped in range(tick, record[0]):
+                    yield skipped + 1
+                tick = record[0]
+            kind = record[1]
+            if kind == MOVE:
+                moves.append(record[5:])
+            elif kind == _PLACE:
+                field.move_many(moves)
+                moves = []
+                field.remove(record[2])
+                field.insert(record[2], (record[3], record[4]))
+            elif kind == ELIMINATE:
+                field.move_many(moves)
+                moves = []
+                field.remove_point(record[4])
+        field.move_many(moves)
+        for skipped in range(tick, stop):
+            yield skipped + 1
+
+    def _run(self, stop: int, state: Dict[str, PlayerState], start: int = 0,
+             seek: Optional[int] = None) -> Iterator[Tuple[object, ...]]:
+        """ Fill <state> from the last keyframe at or before <start> (or
+        <seek>, if given), then apply the changes of every tick before
+        <stop>, yielding every change made from tick <start> on. A MOVE
+        record is yielded with its new location, then for play the point
+        it moved from, its direction and its steps; an ELIMINATE record
+        with the location of the player removed. """
+        data = self._data
+        names = self.names
+        first = start if seek is None else seek
+        i = bisect.bisect_right(self._keyframes, first) - 1
+        offset = self._offsets[i]
+        state.clear()
+        while offset < len(data):
+            kind = data[offset]
+            if kind == _INDEX:
+                return
+            tick, offset = _read_varint(data, offset + 1)
+            if tick >= stop and kind == _TICK or tick > stop:
+                return
+            if kind == _KEYFRAME:
+                count, offset = _read_varint(data, offset)
+                if tick > first:
+                    for _ in range(5 * count):
+                        offset = _read_varint(data, offset)[1]
+                    continue
+                state.clear()
+                for _ in range(count):
+                    values = []
+                    for _ in range(5):
+                        value, offset = _read_varint(data, offset)
+                        values.append(value)
+                    player, x, y, direction, points = values
+                    state[names[player]] = ((x, y), DIRECTIONS[direction],
+                                            points)
+                continue
+            length, offset = _read_varint(data, offset)
+            end = offset + length
+            if tick >= start:
+                yield from self._tick(tick, offset, end, state)
+            else:
+                self._skip(offset, end, state)
+            offset = end
+
+    def _tick(self, tick: int, offset: int, end: int,
+              state: Dict[str, PlayerState]) -> Iterator[Tuple[object, ...]]:
+        """ Apply the tick block of <tick> between <offset> and <end> to
+        <state>, yielding every change in it: its moves, then its direction
+        changes, then the rest. """
+        data = self._data
+        names = self.names
+        before = {}
+        count, offset = _read_varint(data, offset)
+        player = 0
+        for _ in range(count):
+            delta, steps, direction, offset = _read_move(data, offset)
+            player += delta
+            name = names[player]
+            location, heading, points = state[name]
+            if steps == 0:
+                x, offset = _read_varint(data, offset)
+                y, offset = _read_varint(data, offset)
+                state[name] = (x, y), heading, points
+                yield tick, _PLACE, name, x, y
+                continue
+            before.setdefault(name, heading)
+            x, y = _step(location, steps, direction)
+            state[name] = (x, y), DIRECTIONS[direction], points
+            yield (tick, MOVE, name, x, y, location, DIRECTIONS[direction],
+                   steps)
+        offset = _reverse(data, offset, before, state)
+        stored = []
+        count, offset = _read_varint(data, offset)
+        player = position = 0
+        for _ in range(count):
+            packed, offset = _read_varint(data, offset)
+            implied, offset = _read_varint(data, offset)
+            player += _unzigzag(packed >> 2)
+            position += implied
+            name = names[player]
+            location, heading, points = state[name]
+            stored.append((position, name, before.pop(name, heading)))
+            state[name] = location, DIRECTIONS[packed & 3], points
+        changes = []
+        while offset < end:
+            code, offset = _read_varint(data, offset)
+            if code == _CODES[COLLISION]:
+                count, offset = _read_varint(data, offset)
+                for _ in range(count):
+                    first, offset = _read_varint(data, offset)
+                    second, offset = _read_varint(data, offset)
+                    changes.append((tick, COLLISION, names[first],
+                                    names[second]))
+            else:
+                record, offset = self._change(tick, _KINDS[code], offset,
+                                              state)
+                changes.append(record)
+        # A direction change is only a change for a player still in the
+        # game, and the ones implied by moves go back among the ones stored
+        # in the order they were recorded.
+        implied = [name for name, heading in before.items()
+                   if name in state and state[name][1] != heading]
+        turns = [((i, 1), name) for i, name in enumerate(implied)]
+        turns.extend(((position, 0), name)
+                     for position, name, heading in stored
+                     if name in state and state[name][1] != heading)
+        for _, name in sorted(turns, key=lambda turn: turn[0]):
+            yield tick, DIRECTION, name, state[name][1]
+        yield from changes
+
+    def _skip(self, offset: int, end: int,
+              state: Dict[str, PlayerState]) -> None:
+        """ Apply the tick block between <offset> and <end> to <state>
+        without building any records, for seeking past it. """
+        data = self._data
+        names = self.names
+        stepped = {}
+        count, offset = _read_varint(data, offset)
+        player = 0
+        for _ in range(count):
+            delta, steps, direction, offset = _read_move(data, offset)
+            player += delta
+            name = names[player]
+            location, heading, points = state[name]
+            if steps == 0:
+                x, offset = _read_varint(data, offset)
+                y, offset = _read_varint(data, offset)
+                state[name] = (x, y), heading, points
+            else:
+                stepped[name] = None
+                state[name] = (_step(location, steps, direction),
+                               DIRECTIONS[direction], points)
+        offset = _reverse(data, offset, stepped, state)
+        count, offset = _read_varint(data, offset)
+        player = 0
+        for _ in range(count):
+            packed, offset = _read_varint(data, offset)
+            offset = _read_varint(data, offset)[1]
+            player += _unzigzag(packed >> 2)
+            name = names[player]
+            location, _, points = state[name]
+            state[name] = location, DIRECTIONS[packed & 3], points
+        while offset < end:
+            code, offset = _read_varint(data, offset)
+            if code == _CODES[COLLISION]:
+                count, offset = _read_varint(data, offset)
+                for _ in range(2 * count):
+                    offset = _read_varint(data, offset)[1]
+            elif code == _CODES[INFECT]:
+                offset = _read_varint(data, _read_varint(data, offset)[1])[1]
+            else:
+                offset = self._change(0, _KINDS[code], offset, state)[1]
+
+    def _change(self, tick: int, kind: str, offset: int,
+                state: Dict[str, PlayerState]) \
+            -> Tuple[Tuple[object, ...], int]:
+        """ Apply the change of <kind> at <offset> to <state>, and return its
+        record and the offset after it. <kind> is neither a move, a direction
+        change nor a collision. """
+        data = self._data
+        names = self.names
+        if kind == WINNER:
+            length, offset = _read_varint(data, offset)
+            if length == 0:
+                return (tick, kind, None), offset
+            end = offset + length - 1
+            return (tick, kind, data[offset:end].decode()), end
+        pair = []
+        for _ in range(2):
+            player, offset = _read_varint(data, offset)
+            pair.append(None if player == 0 else names[player - 1])
+        first, second = pair
+        if kind == TAG:
+            location, direction, points = state[second]
+            state[second] = location, direction, points + 1
+        elif kind == ELIMINATE:
+            if first is not None:
+                location, direction, points = state[first]
+                state[first] = location, direction, points + 1
+            return (tick, kind, first, second,
+                    state.pop(second)[0]), offset
+        return (tick, kind, first, second), offset
+
+
+def _read_move(data: Union[bytes, memoryview], offset: int) \
+        -> Tuple[int, int, int, int]:
+    """ Return the move in <data> at <offset>: the difference between the id
+    of its player and the one before, its steps, or 0 for a place, and the
+    index of its direction; and the offset after it.
+
+    >>> _read_move(bytes([2 << 5 | 3 << 2 | 1]), 0)
+    (1, 3, 1, 1)
+    """
+    packed, offset = _read_varint(data, offset)
+    steps = packed >> 2 & 7
+    if steps == _MORE_STEPS:
+        steps, offset = _read_varint(data, offset)
+    return _unzigzag(packed >> 5), steps, packed & 3, offset
+
+
+def _reverse(data: Union[bytes, memoryview], offset: int,
+             stepped: Dict[str, object],
+             state: Dict[str, PlayerState]) -> int:
+    """ Turn around every player in <stepped>, the players that moved along
+    an axis in the order they moved, whose bit is set in the bits in <data>
+    at <offset>, and return the offset after them. """
+    for i, name in enumerate(stepped):
+        if data[offset + (i >> 3)] >> (i & 7) & 1:
+            location, direction, points = state[name]
+            state[name] = (location,
+                           DIRECTIONS[DIRECTIONS.index(direction) ^ 1], points)
+    return offset + (len(stepped) + 7) // 8
+
+
+def _step(location: Tuple[int, int], steps: int, direction: int) \
+        -> Tuple[int, int]:
+    """ Return <location> after moving <steps> in the direction whose index
+    is <direction>.
+
+    >>> _step((10, 10), 5, 2)
+    (15, 10)
+    """
+    x, y = location
+    if direction == 0:
+        return x, y - steps
+    if direction == 1:
+        return x, y + steps
+    if direction == 2:
+        return x + steps, y
+    return x - steps, y
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['bisect', 'json', 'struct', 'typing',
+                                  'events', 'games', 'trees'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -0,0 +1,181 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Scenarios: the spawn points of every player of a game, generated ahead of
+time so that benchmarks, tournaments and tests can share the same
+workloads at any scale.
+
+A scenario is a list of exactly n different points in a square field, drawn
+from one of DISTRIBUTIONS:
+    uniform: points spread evenly over the field.
+    clustered: points in a few tight Gaussian clusters.
+    grid: points on a square lattice, many of them sharing an x or a y
+    coordinate, in a random order.
+    sorted: uniform points in increasing order, which makes a TwoDTree
+    built by single inserts degenerate into a list.
+    adversarial: pairs of points one step apart, in increasing order, which
+    forces a QuadTree to split as deep as it can for every pair and still
+    degenerates a TwoDTree.
+
+Every scenario is drawn from its own generator seeded with <seed>, so the
+same arguments always give the same points and the module-global random
+generator is left untouched. Every game takes a scenario as its spawns in
+place of drawing spawn points itself.
+"""
+from __future__ import annotations
+import math
+import random
+from typing import Dict, List, Tuple
+
+# The distributions a scenario can be drawn from.
+DISTRIBUTIONS = ('uniform', 'clustered', 'grid', 'sorted', 'adversarial')
+
+# The side of the square field the games are played on.
+SIDE = 500
+
+# The most times spread tries to fill the cells it left empty.
+SPREAD_PASSES = 8
+
+Point = Tuple[int, int]
+
+
+def points(distribution: str, n: int, side: int = SIDE, seed: int = 0) \
+        -> List[Point]:
+    """ Return <n> different points of <distribution> in the square field
+    from (0, 0) to (<side>, <side>).
+
+    Runtime: O(n log n) for sorted and adversarial, O(n) otherwise.
+
+    === Precondition ===
+    - 0 <= <n> <= (<side> // 2) ** 2
+
+    >>> ps = points('clustered', 1000)
+    >>> len(set(ps)) == 1000
+    True
+    >>> points('sorted', 50) == sorted(points('sorted', 50))
+    True
+    >>> points('grid', 4, side=10, seed=1) == points('grid', 4, 10, 1)
+    True
+    """
+    rng = random.Random(seed)
+    if distribution in ('uniform', 'sorted'):
+        result = spread(n, side, rng=rng)
+        return sorted(result) if distribution == 'sorted' else result
+    if distribution == 'clustered':
+        centres = [(rng.uniform(0, side), rng.uniform(0, side))
+                   for _ in range(10)]
+        deviation = max(side / 50, math.sqrt(n / len(centres)))
+        seen = set()
+        result = []
+        while len(result) < n:
+            x0, y0 = rng.choice(centres)
+            point = (min(side, max(0, round(rng.gauss(x0, deviation)))),
+                     min(side, max(0, round(rng.gauss(y0, deviation)))))
+            if point not in seen:
+                seen.add(point)
+                result.append(point)
+        return result
+    if distribution == 'grid':
+        per_row = math.isqrt(max(n - 1, 0)) + 1
+        stride = side // per_row
+        result = [((i % per_row) * stride, (i // per_row) * stride)
+                  for i in range(n)]
+        rng.shuffle(result)
+        return result
+    if distribution == 'adversarial':
+        pairs = (n + 1) // 2
+        per_row = math.isqrt(max(pairs - 1, 0)) + 1
+        stride = side // per_row
+        result = []
+        for i in range(pairs):
+            x, y = (i % per_row) * stride, (i // per_row) * stride
+            result.extend([(x, y), (x + 1, y)])
+        return sorted(result[:n])
+    raise ValueError('unknown distribution ' + distribution)
+
+
+def spread(n: int, side: int = SIDE, separation: int = 1,
+           rng: random.Random = random) -> List[Point]:
+    """ Return <n> points drawn from <rng> in the square field from (0, 0)
+    to (<side>, <side>), no two of them within fewer than <separation> steps
+    of each other along both the x and the y axis. Points are spread evenly
+    over the field, in a random order; the default separation only keeps
+    them different.
+
+    The field is split into cells of side <separation>, which hold at most
+    one point each. Cells are visited in a random order, and each is given
+    a random point in it unless that point is too close to a point in one
+    of the 8 cells around it. Cells left empty are tried again, up to
+    SPREAD_PASSES times in all, so no more than one point is ever drawn for
+    every cell in a pass, however full the field gets.
+
+    Raise a ValueError if <n> points cannot be placed. With a separation
+    above 1, that happens once <n> is more than about half the cells.
+
+    Runtime: O(n) for the default separation, O(c) for c cells otherwise.
+
+    >>> ps = spread(1000, separation=10, rng=random.Random(0))
+    >>> len(ps)
+    1000
+    >>> min(max(abs(x1 - x2), abs(y1 - y2)) for x1, y1 in ps[:100]
+    ...     for x2, y2 in ps[:100] if (x1, y1) != (x2, y2)) >= 10
+    True
+    """
+    width = side + 1
+    if separation <= 1:
+        if n > width * width:
+            raise ValueError('cannot place {} points'.format(n))
+        return [(i % width, i // width)
+                for i in rng.sample(range(width * width), n)]
+    cells = -(-width // separation)
+    if n > cells * cells:
+        raise ValueError('cannot place {} points {} apart'.format(
+            n, separation))
+    taken = {}
+    result = []
+    pending = list(range(cells * cells))
+    for _ in range(SPREAD_PASSES):
+        if len(result) == n:
+            break
+        rng.shuffle(pending)
+        left = []
+        for cell in pending:
+            if len(result) == n:
+                break
+            cx, cy = cell % cells, cell // cells
+            x = cx * separation + rng.randrange(
+                min(separation, width - cx * separation))
+            y = cy * separation + rng.randrange(
+                min(separation, width - cy * separation))
+            if _apart(taken, cells, cx, cy, x, y, separation):
+                taken[cell] = (x, y)
+                result.append((x, y))
+            else:
+                left.append(cell)
+        pending = left
+    if len(result) < n:
+        raise ValueError('cannot place {} points {} apart'.format(
+            n, separation))
+    return result
+
+
+def _apart(taken: Dict[int, Point], cells: int, cx: int, cy: int, x: int,
+           y: int, separation: int) -> bool:
+    """ Return whether (<x>, <y>), in cell (<cx>, <cy>) of a field of
+    <cells> by <cells> cells, is at least <separation> steps from every
+    point in <taken> along the x or the y axis. """
+    for ny in range(max(cy - 1, 0), min(cy + 2, cells)):
+        for nx in range(max(cx - 1, 0), min(cx + 2, cells)):
+            point = taken.get(ny * cells + nx)
+            if point is not None and abs(point[0] - x) < separation and \
+                    abs(point[1] - y) < separation:
+                return False
+    return True
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['math', 'random', 'typing'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
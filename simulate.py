@@ -0,0 +1,253 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Run a single game headless from the command line.
+
+    python -m simulate --mode zombie --players 2000 --field 2dtree \\
+        --seed 7 --ticks 500 --profile run.prof --counters --trace run.json
+
+plays one game of the mode, field and size given, seeded with --seed so that
+the same command line always plays the same game, and prints a summary: the
+winner, the ticks run, the ticks per second and the milliseconds per tick
+spent in every phase of the Simulator's tick loop. The summary starts with
+the command line that plays the game again. With --rng random or --rng
+batched, the game draws from a generator of its own seeded with --seed (see
+randomness.py) instead of the module-global one. With --ids, the game keys
+its players by int ids rather than by name (see games.py).
+
+Switches for looking into a slow run:
+    --profile: write the cProfile statistics of the run to a file, and print
+    the functions that took the most time.
+    --counters: count every tree operation (see instrument.py) and print the
+    totals.
+    --trace: write the last ticks, their phases and every tree operation as a
+    Chrome trace (see tracing.py); with --trace-budget, also write out every
+    tick that took longer than the budget.
+    --memory: print the bytes the game takes up and the peak memory of every
+    phase (see memory.py).
+
+Run python -m simulate --help for every option.
+"""
+from __future__ import annotations
+import argparse
+import cProfile
+import io
+import pstats
+import random
+import shlex
+import sys
+import time
+from typing import Dict, List, Optional
+import memory
+import scenarios
+from instrument import Counters
+from randomness import make_rng
+from simulator import PHASES, EventSimulator, Simulator
+from tournament import FIELDS, MODES, make_game
+from tracing import Tracer
+
+# The number of functions printed from a profile.
+PROFILE_LINES = 25
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """ Return the parser of the command line. """
+    parser = argparse.ArgumentParser(prog='python -m simulate',
+                                     description=__doc__.split('\n')[3])
+    parser.add_argument('--mode', default='tag', choices=MODES)
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--field', default='quadtree', choices=FIELDS)
+    parser.add_argument('--speed', type=int, default=5,
+                        help='the fastest a player can be')
+    parser.add_argument('--vision', type=int, default=30,
+                        help='the furthest a player can see')
+    parser.add_argument('--duration', type=int, default=30,
+                        help='the game time before tag eliminates players '
+                             'or zombie tag ends')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rng', default='global',
+                        choices=('global', 'random', 'batched'),
+                        help='the module-global random generator, or a '
+                             'random.Random or BatchedRandom of the game\'s '
+                             'own')
+    parser.add_argument('--ticks', type=int,
+                        help='the most ticks to run (default: until the '
+                             'game ends)')
+    parser.add_argument('--time-budget', type=float,
+                        help='the most wall-clock seconds to run for')
+    parser.add_argument('--scenario', choices=scenarios.DISTRIBUTIONS,
+                        help='spawn the players from this scenario')
+    parser.add_argument('--ids', action='store_true',
+                        help='key players by int ids rather than by name')
+    parser.add_argument('--simulator', default='tick',
+                        choices=('tick', 'event'),
+                        help='the Simulator or the EventSimulator')
+    parser.add_argument('--neighbour-ticks', type=int, default=0,
+                        help='how long neighbour lists stay valid (tick '
+                             'simulator only)')
+    parser.add_argument('--fast-forward', action='store_true',
+                        help='only look for a winner when one may be due')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='write cProfile statistics to this file')
+    parser.add_argument('--counters', action='store_true',
+                        help='count every tree operation')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write a Chrome trace of the run to this file')
+    parser.add_argument('--trace-budget', type=float, metavar='SECONDS',
+                        help='write out every tick slower than this')
+    parser.add_argument('--memory', action='store_true',
+                        help='report the memory of the game and its phases')
+    return parser
+
+
+def command(args: argparse.Namespace) -> str:
+    """ Return the command line that plays the game of <args> again.
+
+    >>> command(make_parser().parse_args(['--players', '50']))
+    'python -m simulate --mode tag --players 50 --field quadtree --speed 5 \
+--vision 30 --duration 30 --seed 0'
+    """
+    words = ['python', '-m', 'simulate']
+    for option in ('mode', 'players', 'field', 'speed', 'vision', 'duration',
+                   'seed', 'ticks', 'time_budget', 'scenario'):
+        value = getattr(args, option)
+        if value is not None:
+            words.extend(['--' + option.replace('_', '-'), str(value)])
+    if args.rng != 'global':
+        words.extend(['--rng', args.rng])
+    if args.ids:
+        words.append('--ids')
+    if args.simulator != 'tick':
+        words.extend(['--simulator', args.simulator])
+    if args.neighbour_ticks:
+        words.extend(['--neighbour-ticks', str(args.neighbour_ticks)])
+    if args.fast_forward:
+        words.append('--fast-forward')
+    return ' '.join(shlex.quote(word) for word in words)
+
+
+def simulate(args: argparse.Namespace) -> Dict[str, object]:
+    """ Play the game of <args>, and return its summary.
+
+    >>> summary = simulate(make_parser().parse_args(
+    ...     ['--mode', 'zombie', '--players', '20', '--duration', '5']))
+    >>> summary['ticks'], summary['winner'] in ('humans', 'zombies')
+    (5, True)
+    """
+    config = {'mode': args.mode, 'field': args.field,
+              'n_players': args.players, 'duration': args.duration,
+              'max_speed': args.speed, 'max_vision': args.vision,
+              'scenario': args.scenario, 'scenario_seed': args.seed,
+              'ids': args.ids}
+    random.seed(args.seed)
+    rng = None if args.rng == 'global' else make_rng(args.rng, args.seed)
+    start = time.perf_counter()
+    game = make_game(config, rng)
+    build = time.perf_counter() - start
+    tracer = None
+    if args.trace is not None or args.trace_budget is not None:
+        tracer = Tracer(budget=args.trace_budget)
+    phases = memory.PhaseMemory() if args.memory else None
+    if args.simulator == 'event':
+        sim = EventSimulator(game, fast_forward=args.fast_forward,
+                             tracer=tracer, memory=phases)
+    else:
+        sim = Simulator(game, neighbour_ticks=args.neighbour_ticks,
+                        fast_forward=args.fast_forward, tracer=tracer,
+                        memory=phases)
+    counters = Counters() if args.counters else None
+    profile = cProfile.Profile() if args.profile is not None else None
+
+    if counters is not None:
+        counters.enable()
+    if tracer is not None:
+        tracer.enable()
+    if phases is not None:
+        phases.start()
+    if profile is not None:
+        profile.enable()
+    try:
+        sim.run(args.ticks, args.time_budget)
+    finally:
+        if profile is not None:
+            profile.disable()
+        if phases is not None:
+            phases.stop()
+        if tracer is not None:
+            tracer.disable()
+        if counters is not None:
+            counters.disable()
+
+    played = max(sim.tick, 1)
+    summary = {'command': command(args), 'winner': game.get_name(sim.winner),
+               'ticks': sim.tick, 'finished': sim.finished,
+               'players': len(game.get_players()), 'build_seconds': build,
+               'wall_time': sim.wall_time,
+               'ticks_per_sec': sim.ticks_per_second(),
+               'phase_ms': {phase: 1000 * sim.phase_times[phase] / played
+                            for phase in PHASES}}
+    if profile is not None:
+        profile.dump_stats(args.profile)
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats('cumulative') \
+            .print_stats(PROFILE_LINES)
+        summary['profile'] = out.getvalue()
+    if counters is not None:
+        summary['counters'] = counters.snapshot()
+    if tracer is not None:
+        if args.trace is not None:
+            tracer.dump(args.trace)
+        summary['trace_dumps'] = list(tracer.dumps)
+    if phases is not None:
+        summary['memory'] = memory.report(game)
+        summary['phase_peaks'] = dict(phases.peaks)
+    return summary
+
+
+def format_summary(summary: Dict[str, object]) -> str:
+    """ Return <summary> as the lines printed at the end of a run.
+
+    >>> print(format_summary({'command': 'python -m simulate',
+    ...                       'winner': 'p3', 'ticks': 40, 'finished': True,
+    ...                       'players': 10, 'build_seconds': 0.001,
+    ...                       'wall_time': 0.5, 'ticks_per_sec': 80.0,
+    ...                       'phase_ms': {'decide': 1.0, 'move': 0.25}}))
+    command: python -m simulate
+    winner: p3 after 40 ticks with 10 players
+    speed: 80.0 ticks/s, 0.50 s wall time, 0.001 s to build
+    ms/tick: decide 1.000 move 0.250
+    """
+    ending = 'winner: {} after'.format(summary['winner']) \
+        if summary['finished'] else 'no winner yet after'
+    lines = ['command: ' + summary['command'],
+             '{} {} ticks with {} players'.format(ending, summary['ticks'],
+                                                  summary['players']),
+             'speed: {:,.1f} ticks/s, {:.2f} s wall time, {:.3f} s to build'
+             .format(summary['ticks_per_sec'], summary['wall_time'],
+                     summary['build_seconds']),
+             'ms/tick: ' + ' '.join('{} {:.3f}'.format(phase, ms) for phase, ms
+                                    in summary['phase_ms'].items())]
+    for name, stats in sorted(summary.get('counters', {}).items()):
+        lines.append('counters: {:16} '.format(name) + ' '.join(
+            '{} {:,}'.format(key, value) for key, value in stats.items()))
+    for path in summary.get('trace_dumps', []):
+        lines.append('slow tick written to ' + path)
+    if 'memory' in summary:
+        lines.append(memory.format_report(summary['memory']))
+        lines.append('peak bytes/phase: ' + ' '.join(
+            '{} {:,}'.format(phase, peak)
+            for phase, peak in summary['phase_peaks'].items()))
+    if 'profile' in summary:
+        lines.append(summary['profile'].rstrip())
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """ Play the game of the command line <argv>, print its summary, and
+    return 0. """
+    print(format_summary(simulate(make_parser().parse_args(argv))))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
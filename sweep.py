@@ -0,0 +1,285 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+A parameter sweep over game configurations, built on tournaments.
+
+Every configuration in a grid or random search space is played as a
+Tournament whose results are cached in a JSONL file named after the hash of
+the configuration and seed, so a configuration that was already played is
+never played again. Games are played in batches on one shared pool of
+worker processes, and a configuration stops being sampled once the Wilson
+confidence interval of its win rate is narrow enough.
+
+The win rate is the fraction of games won by the humans in zombie tag, and
+the fraction of games with a winner in the other modes.
+"""
+from __future__ import annotations
+import csv
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from tournament import Tournament
+
+# The two-sided normal quantile for a 95% confidence interval.
+Z_95 = 1.96
+
+
+def config_hash(config: Dict[str, object]) -> str:
+    """ Return a hash identifying <config>, which does not depend on the
+    order of its keys.
+
+    >>> config_hash({'a': 1, 'b': 2}) == config_hash({'b': 2, 'a': 1})
+    True
+    >>> len(config_hash({'a': 1}))
+    40
+    """
+    text = json.dumps(config, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def grid(space: Dict[str, List[object]]) -> List[Dict[str, object]]:
+    """ Return every configuration that takes one value from each list in
+    <space>.
+
+    >>> grid({'mode': ['tag'], 'n_players': [5, 10]})
+    [{'mode': 'tag', 'n_players': 5}, {'mode': 'tag', 'n_players': 10}]
+    """
+    keys = sorted(space)
+    return [dict(zip(keys, values))
+            for values in itertools.product(*(space[key] for key in keys))]
+
+
+def random_search(space: Dict[str, List[object]], n_configs: int,
+                  seed: int = 0) -> List[Dict[str, object]]:
+    """ Return <n_configs> different configurations (or every configuration,
+    if there are fewer) that each take a random value from each list in
+    <space>. The module-global random generator is left untouched.
+
+    >>> space = {'mode': ['tag', 'zombie'], 'n_players': [5, 10, 20]}
+    >>> len(random_search(space, 4))
+    4
+    >>> random_search(space, 4, 1) == random_search(space, 4, 1)
+    True
+    >>> random_search({'mode': ['tag'], 'n_players': [10, 10]}, 5)
+    [{'mode': 'tag', 'n_players': 10}]
+    """
+    rng = random.Random(seed)
+    keys = sorted(space)
+    # A value listed twice gives no new configuration, so it is dropped
+    # before counting how many configurations there are.
+    values = {key: list({json.dumps(value, sort_keys=True): value
+                         for value in space[key]}.values())
+              for key in keys}
+    total = 1
+    for key in keys:
+        total *= len(values[key])
+    configs = {}
+    while len(configs) < min(n_configs, total):
+        config = {key: rng.choice(values[key]) for key in keys}
+        configs[config_hash(config)] = config
+    return list(configs.values())
+
+
+def wilson(successes: int, n: int, z: float = Z_95) -> Tuple[float, float]:
+    """ Return the Wilson score interval of a success rate after <successes>
+    successes in <n> trials.
+
+    >>> wilson(0, 0)
+    (0.0, 1.0)
+    >>> low, high = wilson(50, 100)
+    >>> round(low, 3), round(high, 3)
+    (0.404, 0.596)
+    """
+    if n == 0:
+        return 0.0, 1.0
+    rate = successes / n
+    denominator = 1 + z * z / n
+    centre = (rate + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) \
+        / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def is_win(config: Dict[str, object], winner: Optional[str]) -> bool:
+    """ Return True if a game of <config> won by <winner> counts towards the
+    win rate.
+
+    >>> is_win({'mode': 'zombie'}, 'zombies')
+    False
+    >>> is_win({'mode': 'tag'}, 'p3')
+    True
+    """
+    if config['mode'] == 'zombie':
+        return winner == 'humans'
+    return winner is not None
+
+
+def summarise(config: Dict[str, object],
+              records: List[Dict[str, object]]) -> Dict[str, object]:
+    """ Return one row of outcome statistics and run-time costs for the games
+    of <config> in <records>.
+
+    >>> row = summarise({'mode': 'tag'}, [
+    ...     {'winner': 'p1', 'ticks': 10, 'finished': True, 'wall_time': 0.5},
+    ...     {'winner': None, 'ticks': 30, 'finished': False, 'wall_time': 1.5}])
+    >>> row['games'], row['win_rate'], row['mean_ticks'], row['wall_time']
+    (2, 0.5, 20.0, 2.0)
+    """
+    n = len(records)
+    wins = sum(is_win(config, record['winner']) for record in records)
+    low, high = wilson(wins, n)
+    wall_time = sum(record['wall_time'] for record in records)
+    row = dict(config)
+    row.update({'hash': config_hash(config), 'games': n,
+                'win_rate': wins / n if n else 0.0,
+                'ci_low': low, 'ci_high': high,
+                'finished_rate':
+                    sum(record['finished'] for record in records) / n
+                    if n else 0.0,
+                'mean_ticks':
+                    sum(record['ticks'] for record in records) / n
+                    if n else 0.0,
+                'wall_time': wall_time,
+                'mean_wall_time': wall_time / n if n else 0.0})
+    return row
+
+
+class Sweep:
+    """ A sweep over many game configurations.
+
+    === Public Attributes ===
+    configs: the configurations being swept.
+    cache_dir: the directory holding one results file per configuration.
+    seed: the tournament seed shared by every configuration.
+    batch: the number of games played for a configuration between two checks
+    of its confidence interval.
+    max_games: the most games played for any configuration.
+    width: a configuration stops once its confidence interval is at most
+    this wide.
+    max_ticks: the most ticks any game runs for, or None for no limit.
+
+    === Private Attributes ===
+    _tournaments: the tournament of every configuration, in the same order
+    as configs.
+
+    === Representation Invariants ===
+    - 0 < batch <= max_games
+    """
+    configs: List[Dict[str, object]]
+    cache_dir: str
+    seed: int
+    batch: int
+    max_games: int
+    width: float
+    max_ticks: Optional[int]
+    _tournaments: List[Tournament]
+
+    def __init__(self, configs: List[Dict[str, object]], cache_dir: str,
+                 seed: int = 0, batch: int = 20, max_games: int = 200,
+                 width: float = 0.1, max_ticks: Optional[int] = None) -> None:
+        """ Initialize a sweep over <configs>, reading back every result
+        already cached in <cache_dir>. """
+        self.configs = configs
+        self.cache_dir = cache_dir
+        self.seed = seed
+        self.batch = batch
+        self.max_games = max_games
+        self.width = width
+        self.max_ticks = max_ticks
+        os.makedirs(cache_dir, exist_ok=True)
+        # The seed and tick limit change results, so they are hashed too.
+        self._tournaments = [
+            Tournament(config, seed,
+                       os.path.join(cache_dir, config_hash(
+                           {'config': config, 'seed': seed,
+                            'max_ticks': max_ticks}) + '.jsonl'),
+                       max_ticks)
+            for config in configs]
+
+    def target(self, tournament: Tournament) -> int:
+        """ Return the number of games <tournament> should have played after
+        its next batch, or 0 if it is done. Only games 0 to n - 1 are used,
+        so stopping early does not depend on the order games finish in. """
+        completed = set(tournament.completed())
+        played = 0
+        while played in completed:
+            played += 1
+        if played >= self.max_games:
+            return 0
+        if played >= self.batch:
+            records = tournament.results()[:played]
+            wins = sum(is_win(tournament.config, record['winner'])
+                       for record in records)
+            low, high = wilson(wins, played)
+            if high - low <= self.width:
+                return 0
+        return min(self.max_games,
+                   (played // self.batch + 1) * self.batch)
+
+    def run(self, workers: Optional[int] = None) -> List[Dict[str, object]]:
+        """ Play every configuration until it is done, using <workers>
+        processes (as many as there are cores if None, or none at all if 0),
+        and return one summary row per configuration.
+        """
+        if workers == 0:
+            active = self._active()
+            while active:
+                for tournament, target in active:
+                    tournament.run(target, workers=0)
+                active = self._active()
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                active = self._active()
+                while active:
+                    futures = [(tournament,
+                                tournament.submit(executor, target))
+                               for tournament, target in active]
+                    for tournament, submitted in futures:
+                        tournament.collect(submitted)
+                    active = self._active()
+        return self.table()
+
+    def table(self) -> List[Dict[str, object]]:
+        """ Return one summary row per configuration, from the games played
+        so far. """
+        return [summarise(tournament.config, tournament.results())
+                for tournament in self._tournaments]
+
+    def _active(self) -> List[Tuple[Tournament, int]]:
+        """ Return every tournament that is not done, with its target. """
+        active = []
+        for tournament in self._tournaments:
+            target = self.target(tournament)
+            if target:
+                active.append((tournament, target))
+        return active
+
+
+def write_table(rows: List[Dict[str, object]], path: str) -> None:
+    """ Write <rows> to the CSV file at <path>, with one column for every key
+    of any row. """
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['csv', 'hashlib', 'itertools', 'json',
+                                  'math', 'os', 'random',
+                                  'concurrent.futures', 'typing',
+                                  'tournament'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -1,8 +1,23 @@
 import pytest
+import json
+import random
 from typing import Tuple, List
 import trees
 import players
 import games
+import simulator
+import tournament
+import sweep
+import checkpoint
+import events
+import replay
+import benchmarks
+import instrument
+import tracing
+import memory
+import scenarios
+import simulate
+import randomness
 
 ##### TREES #####
 
@@ -112,10 +127,165 @@ class TreesTest:
         self.tree.insert('joe', (300, 300))
         assert not self.tree.is_leaf()
 
+    def test_random_operations_stay_consistent(self):
+        rng = random.Random(1)
+        locations = {}
+        for i in range(400):
+            if locations and rng.random() < 0.5:
+                name = rng.choice(sorted(locations))
+                try:
+                    locations[name] = self.tree.move_point(
+                        locations[name], rng.choice('NSEW'), rng.randint(1, 9))
+                except trees.OutOfBoundsError:
+                    pass
+            elif locations and rng.random() < 0.3:
+                name = rng.choice(sorted(locations))
+                self.tree.remove_point(locations.pop(name))
+            else:
+                point = rng.randint(0, 50) * 10, rng.randint(0, 50) * 10
+                if point not in locations.values():
+                    self.tree.insert(str(i), point)
+                    locations[str(i)] = point
+            for name, point in locations.items():
+                assert self.tree.contains_point(point)
+                assert name in self.tree
+
+    def test_insert_many(self):
+        self.tree.insert('jon', (250, 250))
+        items = [('p' + str(i), (i * 37 % 500, i * 91 % 500))
+                 for i in range(1, 60)]
+        self.tree.insert_many(items)
+        for name, point in items + [('jon', (250, 250))]:
+            assert self.tree.contains_point(point)
+            assert name in self.tree
+
+    def test_insert_many_all_or_nothing(self):
+        self.tree.insert('jon', (250, 250))
+        for bad in ([('a', (10, 10)), ('b', (501, 3))],
+                    [('a', (10, 10)), ('b', (250, 250))],
+                    [('a', (10, 10)), ('b', (10, 10))]):
+            with pytest.raises(trees.OutOfBoundsError, match='item 1'):
+                self.tree.insert_many(bad)
+            assert 'a' not in self.tree
+        assert self.tree.is_leaf()
+
+    def test_remove_many(self):
+        items = [('p' + str(i), (i * 37 % 500, i * 91 % 500))
+                 for i in range(40)]
+        self.tree.insert_many(items)
+        gone = [name for name, _ in items[::3]] + \
+            [point for _, point in items[1::3]] + ['nobody', (499, 499)]
+        self.tree.remove_many(gone)
+        for i, (name, point) in enumerate(items):
+            assert (name in self.tree) == (i % 3 == 2)
+            assert self.tree.contains_point(point) == (i % 3 == 2)
+        self.tree.remove_many([name for name, _ in items])
+        assert self.tree.is_empty()
+
+    def test_near_points(self):
+        points = [(0, 0), (1, 1), (0, 1), (1, 0), (500, 500), (499, 500),
+                  (250, 250), (251, 251), (250, 251)]
+        for i, point in enumerate(points):
+            self.tree.insert(str(i), point)
+        assert all(self.tree.contains_point(point) for point in points)
+        for point in points[::2]:
+            self.tree.remove_point(point)
+        assert all(self.tree.contains_point(point) for point in points[1::2])
+
+    def test_move_many_chain_and_swap(self):
+        self.tree.insert_many([('a', (10, 10)), ('b', (20, 10)),
+                               ('c', (30, 10)), ('d', (100, 10)),
+                               ('e', (110, 10))])
+        # c leaves before b and b before a, so the chain moves together; d and
+        # e cannot swap because each point is only left after the other moves.
+        assert self.tree.move_many([((30, 10), 'E', 10),
+                                    ((20, 10), 'E', 10),
+                                    ((10, 10), 'E', 10),
+                                    ((100, 10), 'E', 10),
+                                    ((110, 10), 'W', 10),
+                                    ((40, 10), 'E', 500),
+                                    ((7, 7), 'N', 1)]) == \
+            [(40, 10), (30, 10), (20, 10), trees.COLLISION, trees.COLLISION,
+             trees.OUT_OF_BOUNDS, None]
+        for point in [(20, 10), (30, 10), (40, 10), (100, 10), (110, 10)]:
+            assert self.tree.contains_point(point)
+        assert not self.tree.contains_point((10, 10))
+
+    def test_move_many_matches_move_point(self):
+        rng = random.Random(3)
+        tree = self.tree
+        self.setup_method()
+        other, self.tree = self.tree, tree
+        items = [('p' + str(i), (i * 37 % 500, i * 91 % 500))
+                 for i in range(60)]
+        self.tree.insert_many(items)
+        other.insert_many(items)
+        for _ in range(20):
+            moves = [(self.tree._find_point(name), rng.choice('NSEW'),
+                      rng.randint(0, 40)) for name, _ in items]
+            expected = []
+            for point, direction, steps in moves:
+                try:
+                    expected.append(other.move_point(point, direction, steps))
+                except trees.OutOfBoundsError:
+                    expected.append(None)
+            results = self.tree.move_many(moves)
+            assert [None if result in (trees.COLLISION, trees.OUT_OF_BOUNDS)
+                    else result for result in results] == expected
+            for name, _ in items:
+                point = other._find_point(name)
+                assert self.tree.contains_point(point)
+                assert self.tree.names_in_box(point, point) == [name]
+
+    def test_dump_load(self, tmp_path):
+        items = [('p' + str(i), (i * 37 % 500, i * 91 % 500))
+                 for i in range(60)] + [('zoë', (3, 4))]
+        self.tree.insert_many(items)
+        path = str(tmp_path / 'field.bin')
+        self.tree.dump(path)
+        for use_mmap in (True, False):
+            loaded = type(self.tree).load(path, use_mmap)
+            assert loaded.bounds() == self.tree.bounds()
+            assert loaded.size() == self.tree.size()
+            assert loaded.height() == self.tree.height()
+            for name, point in items:
+                assert loaded.names_in_box(point, point) == [name]
+            loaded.remove_many(['p1', (3, 4)])
+            loaded.insert('new', (1, 1))
+            assert loaded.move_point((1, 1), 'S', 2) == (1, 3)
+            assert 'p1' not in loaded and 'zoë' not in loaded
+            assert loaded.contains_point((1, 3))
+            assert self.tree.contains_point((3, 4))
+
+    def test_load_wrong_file(self, tmp_path):
+        path = str(tmp_path / 'field.bin')
+        other = trees.TwoDTree((0, 0), (500, 500)) \
+            if isinstance(self.tree, trees.QuadTree) \
+            else trees.QuadTree((250, 250))
+        other.dump(path)
+        with pytest.raises(ValueError):
+            type(self.tree).load(path)
+
 class TestQuadTree(TreesTest):
     def setup_method(self):
         self.tree = trees.QuadTree((250, 250))
 
+    def test_insert_many_same_tree(self):
+        items = [('p' + str(i), (i * 37 % 500, i * 91 % 500))
+                 for i in range(50)]
+        self.tree.insert_many(items)
+        other = trees.QuadTree((250, 250))
+        for name, point in items:
+            other.insert(name, point)
+
+        def shape(tree):
+            if tree is None:
+                return None
+            return (tree._centre, tree._point,
+                    [shape(child) for child in (tree._nw, tree._ne,
+                                                tree._sw, tree._se)])
+        assert shape(self.tree) == shape(other)
+
     def test_height(self):
         assert self.tree.height() == 1
         self.tree.insert('jon', (250, 250))
@@ -137,6 +307,29 @@ class TestQuadTree(TreesTest):
         assert jon.depth(job) is None
         assert self.tree.depth(self.tree) is None
 
+    def test_contains_point_rounded_centre(self):
+        self.tree.insert('jon', (125, 10))
+        self.tree.insert('joe', (10, 10))
+        assert self.tree.contains_point((125, 10))
+        assert self.tree.move_point((125, 10), 'S', 1) == (125, 11)
+        assert self.tree.contains_point((125, 11))
+
+    def test_remove_point_rounded_centre(self):
+        self.tree.insert('jon', (125, 10))
+        self.tree.insert('joe', (10, 10))
+        self.tree.insert('job', (400, 400))
+        self.tree.remove_point((125, 10))
+        assert not self.tree.contains_point((125, 10))
+        assert 'jon' not in self.tree
+        assert self.tree.contains_point((10, 10))
+
+    def test_move_point_in_place(self):
+        self.tree.insert('jon', (8, 374))
+        self.tree.insert('joe', (59, 361))
+        leaf = self.tree._find_point_tree((8, 374))
+        assert self.tree.move_point((8, 374), 'E', 1) == (9, 374)
+        assert self.tree._find_point_tree((9, 374)) is leaf
+
 class Test2DTree(TreesTest):
     def setup_method(self):
         self.tree = trees.TwoDTree((0, 0), (500, 500))
@@ -164,6 +357,38 @@ class Test2DTree(TreesTest):
         assert jon.depth(minnie) == 2
         assert job.depth(minnie) == 1
 
+    def test_remove_root_tied_coordinates(self):
+        self.tree.insert('jon', (250, 250))
+        self.tree.insert('joe', (300, 300))
+        self.tree.insert('job', (300, 100))
+        self.tree.insert('jim', (300, 200))
+        self.tree.remove('jon')
+        for name, point in (('joe', (300, 300)), ('job', (300, 100)),
+                            ('jim', (300, 200))):
+            assert name in self.tree
+            assert self.tree.contains_point(point)
+
+    def test_remove_root_replacement_not_a_leaf(self):
+        for name, point in (('jon', (311, 482)), ('joe', (59, 285)),
+                            ('job', (271, 275)), ('jim', (230, 240))):
+            self.tree.insert(name, point)
+        self.tree.remove('jon')
+        assert 'jon' not in self.tree
+        for name, point in (('joe', (59, 285)), ('job', (271, 275)),
+                            ('jim', (230, 240))):
+            assert name in self.tree
+            assert self.tree.contains_point(point)
+
+    def test_remove_node_below_single_child(self):
+        for name, point in (('jon', (250, 250)), ('joe', (100, 300)),
+                            ('job', (50, 200)), ('jim', (40, 100))):
+            self.tree.insert(name, point)
+        assert self.tree._lt._gt is None
+        self.tree._remove_node(self.tree._lt._lt._lt)
+        assert not self.tree.contains_point((40, 100))
+        for point in ((250, 250), (100, 300), (50, 200)):
+            assert self.tree.contains_point(point)
+
 ##### PLAYERS #####
 
 class PlayersTest:
@@ -272,6 +497,20 @@ class PlayersTest:
         assert player.next_direction() == set('NSEW')
         assert player._direction in set('NSEW')
 
+    def test_next_direction_neighbour_list(self):
+        coords = [(260, 240), (240, 260), (300, 300), (450, 50)]
+        targets = [0, 3]
+        enemies = [1, 2]
+        player, _ = self._move_into_starting_position(coords, targets, enemies)
+        for seed in range(20):
+            random.seed(seed)
+            expected = player.next_direction()
+            player.set_neighbour_list(3, 4)
+            random.seed(seed)
+            assert player.next_direction() == expected
+            assert player._name not in player._neighbours
+            player.set_neighbour_list(3, 0)
+
     def test_move_no_collision(self):
         coords = [(50, 50), (50, 450), (450, 450), (450, 50)]
         targets = []
@@ -341,6 +580,20 @@ class TagTests:
         assert game._it == not_it
         assert it_points + 1 == game._players[game._it].get_points()
 
+    def test_check_for_winner_removes_tagged(self):
+        game = games.Tag(10, self.tree, 5, 3, 4)
+        game.handle_collision('p0', 'p1')
+        game.handle_collision('p1', 'p2')
+        game.handle_collision('p2', 'p1')
+        game.handle_collision('p1', 'p3')
+        assert game._tagged == {'p1', 'p2'}
+        assert game.check_for_winner() is None
+        assert sorted(game._players) == ['p0', 'p3', 'p4', 'p5', 'p6', 'p7',
+                                         'p8', 'p9']
+        assert 'p1' not in game.field and 'p2' not in game.field
+        assert not game._tagged
+        assert 'p1' not in game._players['p3'].get_targets()
+
     def test_check_for_winner_no_winner(self):
         game = games.Tag(10, self.tree, 5, 3, 4)
         assert game.check_for_winner() is None
@@ -392,6 +645,26 @@ class ZombieTagTests:
         assert human._name in game._zombies
         assert human._name not in game._humans
 
+    def test_handle_collision_teams(self):
+        game = games.ZombieTag(10, self.tree, 5, 3, 4)
+        human1, human2 = list(game._humans)[:2]
+        game.handle_collision('p0', human1)
+        zombie = game._zombies[human1]
+        assert sorted(zombie.get_targets()) == sorted(game._humans)
+        assert zombie.get_enemies() == []
+        assert game._humans[human2].get_enemies() == ['p0', human1]
+        assert human1 not in game._zombies['p0'].get_targets()
+        assert zombie._speed == 1
+
+    def test_outbreak(self):
+        game = games.ZombieTag(300, self.tree, 5, 3, 4)
+        for human in list(game._humans):
+            game.handle_collision(human, 'p0')
+        assert not game._humans
+        assert game.check_for_winner() == 'zombies'
+        assert all(zombie.get_targets() == [] and zombie.get_enemies() == []
+                   for zombie in game._zombies.values())
+
     def test_check_for_winner_humans_win(self):
         game = games.ZombieTag(2, self.tree, 5, 3, 4)
         assert game.check_for_winner() == 'humans'
@@ -449,6 +722,32 @@ class EliminationTagTests:
         assert game._players[player1].get_targets()[0] == p2targets[0]
         assert game._players[player1].get_points() - 1 == points
 
+    def test_init_spawns_every_player(self):
+        game = games.EliminationTag(3, self.tree, 3, 4,
+                                    [(100, 100), (300, 300), (200, 200)])
+        assert game._players['p0']._location == (100, 100)
+        assert game._players['p2']._location == (200, 200)
+        assert game._players['p1']._location == (300, 300)
+        assert [game.target_of(name) for name in ('p0', 'p1', 'p2')] == \
+            ['p1', 'p2', 'p0']
+
+    def test_ring_stays_linked(self):
+        game = games.EliminationTag(12, self.tree, 3, 4)
+        for victim in ('p1', 'p5', 'p6', 'p11', 'p2'):
+            game.handle_collision(game.hunter_of(victim), victim)
+            assert game.target_of(victim) is None
+            assert victim not in game.field
+        names = set()
+        name = 'p0'
+        while name not in names:
+            names.add(name)
+            player = game._players[name]
+            assert player.get_targets() == [game.target_of(name)]
+            assert player.get_enemies() == [game.hunter_of(name)]
+            assert game.hunter_of(game.target_of(name)) == name
+            name = game.target_of(name)
+        assert names == set(game._players)
+
     def test_check_for_winner_no_winner(self):
         game = games.EliminationTag(10, self.tree, 3, 4)
         assert game.check_for_winner() is None
@@ -467,5 +766,1083 @@ class TestEliminationTag2dTree(EliminationTagTests):
     def setup_method(self):
         self.tree = trees.TwoDTree((0, 0), (500, 500))
 
+##### SIMULATOR #####
+
+def _state(game: games.Game):
+    return {name: (p._location, p._direction, p._points)
+            for name, p in game.get_players().items()}
+
+class SimulatorTests:
+    def test_run_max_ticks(self):
+        game = games.Tag(10, self.tree, 50, 3, 4)
+        sim = simulator.Simulator(game)
+        sim.run(max_ticks=7)
+        assert sim.tick == 7
+        assert not sim.finished
+        assert sim.winner is None
+
+    def test_run_until_duration(self):
+        game = games.ZombieTag(10, self.tree, 4, 3, 4)
+        sim = simulator.Simulator(game, tick_rate=2)
+        winner = sim.run()
+        assert sim.finished
+        assert winner == game.check_for_winner()
+        assert sim.tick <= 8
+
+    def test_run_time_budget(self):
+        game = games.Tag(10, self.tree, 10 ** 6, 3, 4)
+        sim = simulator.Simulator(game)
+        sim.run(time_budget=0.05)
+        assert not sim.finished
+        assert sim.tick > 0
+
+    def test_collide_and_resolve(self):
+        game = games.EliminationTag(3, self.tree, 3, 4)
+        sim = simulator.Simulator(game)
+        hunter = 'p0'
+        target = game._players[hunter].get_targets()[0]
+        for name, loc in ((hunter, (100, 100)), (target, (103, 98)),
+                          ('p2' if target != 'p2' else 'p1', (400, 400))):
+            game.field.remove(name)
+            game.field.insert(name, loc)
+            game._players[name]._location = loc
+        pairs = sim._collide(game.get_players())
+        assert pairs == [tuple(sorted((hunter, target)))]
+        sim._resolve(pairs)
+        assert target not in game._players
+
+    def test_report(self):
+        game = games.Tag(10, self.tree, 5, 3, 4)
+        sim = simulator.Simulator(game)
+        sim.run(max_ticks=3)
+        report = sim.report()
+        assert report['ticks'] == 3
+        assert all(report[phase] >= 0 for phase in simulator.PHASES)
+        assert report['ticks_per_second'] > 0
+
+    def test_neighbour_lists_match(self):
+        random.seed(3)
+        game = games.Tag(30, self.make_tree(), 5, 3, 40)
+        simulator.Simulator(game).run(max_ticks=20)
+        random.seed(3)
+        cached = games.Tag(30, self.make_tree(), 5, 3, 40)
+        simulator.Simulator(cached, neighbour_ticks=4).run(max_ticks=20)
+        assert _state(game) == _state(cached)
+
+    def test_event_simulator_matches(self):
+        for make_game in (lambda t: games.Tag(20, t, 6, 3, 10),
+                          lambda t: games.ZombieTag(20, t, 60, 3, 10),
+                          lambda t: games.EliminationTag(20, t, 3, 10)):
+            random.seed(5)
+            game = make_game(self.make_tree())
+            winner = simulator.Simulator(game).run(max_ticks=80)
+            random.seed(5)
+            event = make_game(self.make_tree())
+            sim = simulator.EventSimulator(event)
+            assert sim.run(max_ticks=80) == winner
+            assert _state(game) == _state(event)
+            for name, player in event.get_players().items():
+                assert event.field.contains_point(player._location)
+
+    def test_event_simulator_sparse(self):
+        random.seed(2)
+        game = games.Tag(3, self.tree, 10 ** 6, 1, 2)
+        sim = simulator.EventSimulator(game)
+        for _ in range(3):
+            sim.step()
+        assert sim._quiet
+        sim.flush()
+        assert not sim._quiet and not sim._queue
+        for player in game.get_players().values():
+            assert game.field.contains_point(player._location)
+
+    def test_event_simulator_quiet_ticks(self):
+        random.seed(4)
+        game = games.Tag(300, self.make_tree(), 10 ** 6, 2, 5)
+        sim = simulator.EventSimulator(game)
+        players = game.get_players()
+        grid = sim._grid(players)
+        speed = 2 * sim._max_speed
+        for name, player in players.items():
+            x0, y0 = player.get_location()
+            nearest = min(max(abs(x - x0), abs(y - y0))
+                          for other in players if other != name
+                          for x, y in [players[other].get_location()])
+            expected = max(0, min(simulator.MAX_QUIET_TICKS,
+                                  (nearest - sim._reach - 1) // speed))
+            assert sim._quiet_ticks(name, player, grid) == expected
+
+    def test_run_to_winner_matches(self):
+        for make_game in (lambda t: games.Tag(20, t, 4, 3, 10),
+                          lambda t: games.ZombieTag(20, t, 40, 3, 10),
+                          lambda t: games.EliminationTag(8, t, 3, 10)):
+            random.seed(7)
+            game = make_game(self.make_tree())
+            sim = simulator.Simulator(game)
+            winner = sim.run(max_ticks=300)
+            random.seed(7)
+            fast = make_game(self.make_tree())
+            result = simulator.run_to_winner(fast, max_ticks=300)
+            assert (result.winner, result.ticks, result.finished) == \
+                (winner, sim.tick, sim.finished)
+            assert result.scores == {name: p.get_points() for name, p
+                                     in game.get_players().items()}
+            assert not fast.cosmetic
+
+    def test_game_result_as_dict(self):
+        game = games.ZombieTag(5, self.tree, 3, 3, 4)
+        result = simulator.run_to_winner(game)
+        record = result.as_dict()
+        assert record['winner'] == game.check_for_winner()
+        assert record['ticks'] == 3 and record['finished']
+        assert set(record['scores']) == set(game.get_players())
+
+class TestSimulatorQuadTree(SimulatorTests):
+    def setup_method(self):
+        self.tree = self.make_tree()
+
+    def make_tree(self):
+        return trees.QuadTree((250, 250))
+
+    def test_trees_agree(self):
+        results = []
+        for tree in (trees.QuadTree((250, 250)),
+                     trees.TwoDTree((0, 0), (500, 500))):
+            random.seed(4)
+            game = games.ZombieTag(25, tree, 100, 4, 30)
+            winner = simulator.Simulator(game).run(max_ticks=100)
+            results.append((winner, _state(game)))
+        assert results[0] == results[1]
+
+class TestSimulator2dTree(SimulatorTests):
+    def setup_method(self):
+        self.tree = self.make_tree()
+
+    def make_tree(self):
+        return trees.TwoDTree((0, 0), (500, 500))
+
+##### TOURNAMENT #####
+
+CONFIG = {'mode': 'zombie', 'field': 'quadtree', 'n_players': 8,
+          'duration': 20, 'max_speed': 3, 'max_vision': 10}
+
+class TestTournament:
+    def test_games_are_reproducible(self):
+        first = tournament.Tournament(CONFIG, seed=3).run(4, workers=0)
+        second = tournament.Tournament(CONFIG, seed=3).run(4, workers=0)
+        for a, b in zip(first, second):
+            assert a['winner'] == b['winner']
+            assert a['scores'] == b['scores']
+
+    def test_process_pool_matches_serial(self):
+        serial = tournament.Tournament(CONFIG, seed=1).run(4, workers=0)
+        pooled = tournament.Tournament(CONFIG, seed=1).run(4, workers=2)
+        assert [(r['game_id'], r['winner'], r['ticks']) for r in serial] == \
+            [(r['game_id'], r['winner'], r['ticks']) for r in pooled]
+
+    def test_resume(self, tmp_path):
+        for suffix in ('.csv', '.jsonl'):
+            path = str(tmp_path / ('results' + suffix))
+            first = tournament.Tournament(CONFIG, path=path).run(3, workers=0)
+            resumed = tournament.Tournament(CONFIG, path=path)
+            assert resumed.completed() == [0, 1, 2]
+            assert resumed.pending(5) == [3, 4]
+            records = resumed.run(5, workers=0)
+            assert [r['game_id'] for r in records] == [0, 1, 2, 3, 4]
+            for old, new in zip(first, records):
+                assert old['winner'] == new['winner']
+                assert old['scores'] == new['scores']
+            with open(path) as file:
+                lines = file.read().splitlines()
+            assert len(lines) == 5 + (suffix == '.csv')
+
+    def test_resume_skips_cut_short_line(self, tmp_path):
+        path = str(tmp_path / 'results.jsonl')
+        tournament.Tournament(CONFIG, path=path).run(2, workers=0)
+        with open(path, 'a') as file:
+            file.write('{"game_id": 2, "win')
+        resumed = tournament.Tournament(CONFIG, path=path)
+        assert resumed.completed() == [0, 1]
+        resumed.run(3, workers=0)
+        assert tournament.Tournament(CONFIG, path=path).completed() == \
+            [0, 1, 2]
+
+    def test_make_game(self):
+        for mode in tournament.MODES:
+            for field in tournament.FIELDS:
+                config = dict(CONFIG, mode=mode, field=field)
+                game = tournament.make_game(config)
+                assert len(game.get_players()) > 0
+        with pytest.raises(ValueError):
+            tournament.make_game(dict(CONFIG, mode='chess'))
+
+##### SWEEP #####
+
+class TestSweep:
+    def test_grid_and_random_search(self):
+        space = {'mode': ['tag', 'zombie'], 'n_players': [4, 8, 16]}
+        assert len(sweep.grid(space)) == 6
+        configs = sweep.random_search(space, 10, seed=2)
+        assert len(configs) == 6
+        assert all(config in sweep.grid(space) for config in configs)
+
+    def test_random_search_repeated_values(self):
+        space = {'mode': ['tag', 'tag'], 'n_players': [10, 10, 20],
+                 'spawns': [[[0, 0]], [[0, 0]]]}
+        configs = sweep.random_search(space, 5)
+        assert sorted(config['n_players'] for config in configs) == [10, 20]
+        assert all(config['spawns'] == [[0, 0]] for config in configs)
+
+    def test_wilson_narrows(self):
+        low1, high1 = sweep.wilson(5, 10)
+        low2, high2 = sweep.wilson(500, 1000)
+        assert low1 < low2 < 0.5 < high2 < high1
+
+    def test_sweep_caches_and_stops_early(self, tmp_path):
+        configs = sweep.grid({'mode': ['zombie'], 'field': ['quadtree'],
+                              'n_players': [2, 8], 'duration': [3],
+                              'max_speed': [3], 'max_vision': [10]})
+        cache = str(tmp_path / 'cache')
+        s = sweep.Sweep(configs, cache, batch=10, max_games=40, width=0.5)
+        rows = s.run(workers=0)
+        assert [row['n_players'] for row in rows] == [2, 8]
+        for row in rows:
+            assert 10 <= row['games'] <= 40
+            assert row['ci_high'] - row['ci_low'] <= 0.5 or \
+                row['games'] == 40
+        again = sweep.Sweep(configs, cache, batch=10, max_games=40,
+                            width=0.5)
+        assert all(again.target(t) == 0 for t in again._tournaments)
+        assert again.run(workers=0) == rows
+        path = str(tmp_path / 'table.csv')
+        sweep.write_table(rows, path)
+        with open(path) as file:
+            assert len(file.read().splitlines()) == 3
+
+##### CHECKPOINT #####
+
+def state_of(sim):
+    return (sim.tick, sim.finished, sim.winner,
+            sorted((name, player.get_location(), player._direction,
+                    player.get_points(), sorted(player.get_targets()),
+                    sorted(player.get_enemies()))
+                   for name, player in sim.game.get_players().items()),
+            random.random())
+
+class TestCheckpoint:
+    @pytest.mark.parametrize('make_game', [
+        lambda field: games.Tag(15, field, 5, 4, 30),
+        lambda field: games.ZombieTag(20, field, 40, 4, 25),
+        lambda field: games.EliminationTag(8, field, 4, 30)])
+    @pytest.mark.parametrize('make_sim', [
+        lambda game: simulator.Simulator(game, neighbour_ticks=3),
+        lambda game: simulator.EventSimulator(game, fast_forward=True)])
+    def test_resume_is_exact(self, tmp_path, make_game, make_sim):
+        path = str(tmp_path / 'game.ckpt')
+        for field in (trees.QuadTree((250, 250)),
+                      trees.TwoDTree((0, 0), (500, 500))):
+            random.seed(4)
+            sim = make_sim(make_game(field))
+            sim.run(max_ticks=12)
+            checkpoint.save(sim, path)
+            sim.run(max_ticks=40)
+            expected = state_of(sim)
+            resumed = checkpoint.load(path)
+            assert type(resumed) is type(sim)
+            assert type(resumed.game.field) is type(field)
+            resumed.run(max_ticks=40)
+            assert state_of(resumed) == expected
+
+    def test_checkpointer(self, tmp_path):
+        path = str(tmp_path / 'game.ckpt')
+        random.seed(2)
+        sim = simulator.Simulator(
+            games.ZombieTag(10, trees.QuadTree((250, 250)), 30, 4, 25))
+        checkpointer = checkpoint.Checkpointer(path, 7)
+        checkpointer.run(sim, max_ticks=10)
+        assert sim.tick == 10
+        assert checkpoint.load(path).tick == 10
+        checkpointer.run(sim)
+        assert sim.finished and checkpoint.load(path).finished
+
+    def test_not_a_checkpoint(self, tmp_path):
+        path = str(tmp_path / 'game.ckpt')
+        with open(path, 'wb') as file:
+            file.write(b'not a checkpoint')
+        with pytest.raises(ValueError):
+            checkpoint.load(path)
+
+##### EVENTS #####
+
+class TestEvents:
+    @pytest.mark.parametrize('make_game', [
+        lambda: games.Tag(15, trees.QuadTree((250, 250)), 5, 4, 30),
+        lambda: games.ZombieTag(20, trees.TwoDTree((0, 0), (500, 500)), 40,
+                                4, 25),
+        lambda: games.EliminationTag(8, trees.QuadTree((250, 250)), 4, 30)])
+    def test_logging_changes_nothing(self, tmp_path, make_game):
+        random.seed(6)
+        plain = simulator.Simulator(make_game())
+        plain.run(max_ticks=60)
+        expected = state_of(plain)
+        for binary in (False, True):
+            path = str(tmp_path / ('events' + str(binary)))
+            random.seed(6)
+            with events.EventLog(path, binary, batch=50) as log:
+                logged = simulator.Simulator(make_game(), events=log)
+                logged.run(max_ticks=60)
+            assert state_of(logged) == expected
+
+    def test_records(self, tmp_path):
+        logs = []
+        for binary in (False, True):
+            path = str(tmp_path / ('events' + str(binary)))
+            random.seed(1)
+            game = games.ZombieTag(20, trees.QuadTree((250, 250)), 30, 4, 25)
+            start = {name: player.get_location()
+                     for name, player in game.get_players().items()}
+            with events.EventLog(path, binary, batch=64) as log:
+                sim = simulator.Simulator(game, events=log)
+                sim.run()
+            logs.append(list(events.read_events(path)))
+        assert logs[0] == logs[1]
+        records = logs[0]
+        ticks = [record[0] for record in records]
+        assert ticks == sorted(ticks)
+        kinds = {record[1] for record in records}
+        assert {events.MOVE, events.DIRECTION, events.WINNER} <= kinds
+        for record in records:
+            if record[1] == events.MOVE:
+                start[record[2]] = (record[3], record[4])
+        assert start == {name: player.get_location()
+                         for name, player in game.get_players().items()}
+        infected = [record[3] for record in records
+                    if record[1] == events.INFECT]
+        assert len(infected) == len(game._zombies) - 1
+        assert records[-1][1:] == (events.WINNER, sim.winner)
+
+    def test_game_events(self, tmp_path):
+        path = str(tmp_path / 'events.bin')
+        with events.EventLog(path, binary=True) as log:
+            tag = games.Tag(5, trees.QuadTree((250, 250)), 5, 8, 6)
+            tag.events = log
+            tag.handle_collision('p0', 'p1')
+            tag.handle_collision('p1', 'p2')
+            tag.check_for_winner()
+            e_tag = games.EliminationTag(4, trees.QuadTree((250, 250)), 5, 8)
+            e_tag.events = log
+            e_tag.handle_collision('p0', 'p1')
+        assert [record[1:] for record in events.read_events(path)] == \
+            [(events.TAG, 'p0', 'p1'), (events.TAG, 'p1', 'p2'),
+             (events.ELIMINATE, None, 'p1'),
+             (events.ELIMINATE, 'p0', 'p1')]
+
+##### REPLAY #####
+
+def live_state(game: games.Game):
+    return {name: (player.get_location(), player.get_direction(),
+                   player.get_points())
+            for name, player in game.get_players().items()}
+
+
+class TestReplay:
+    @pytest.mark.parametrize('make_sim', [simulator.Simulator,
+                                          simulator.EventSimulator])
+    @pytest.mark.parametrize('make_game', [
+        lambda: games.Tag(15, trees.QuadTree((250, 250)), 5, 4, 30),
+        lambda: games.ZombieTag(30, trees.TwoDTree((0, 0), (500, 500)), 40,
+                                4, 25),
+        lambda: games.EliminationTag(10, trees.QuadTree((250, 250)), 4, 30)])
+    def test_seek(self, tmp_path, make_sim, make_game):
+        path = str(tmp_path / 'game.replay')
+        random.seed(4)
+        game = make_game()
+        states = [live_state(game)]
+        with replay.Recorder(path, game, every=7) as recorder:
+            sim = make_sim(game, events=recorder)
+            while not sim.finished and sim.tick < 60:
+                sim.step()
+                if make_sim is simulator.EventSimulator:
+                    sim.flush()
+                states.append(live_state(game))
+        recorded = replay.Replay(path)
+        assert recorded.end == sim.tick
+        for tick, state in enumerate(states):
+            assert recorded.seek(tick) == state
+
+    @pytest.mark.parametrize('make_sim', [simulator.Simulator,
+                                          simulator.EventSimulator])
+    @pytest.mark.parametrize('make_game', [
+        lambda: games.Tag(15, trees.QuadTree((250, 250)), 5, 4, 30),
+        lambda: games.ZombieTag(30, trees.TwoDTree((0, 0), (500, 500)), 40,
+                                4, 25),
+        lambda: games.EliminationTag(10, trees.QuadTree((250, 250)), 4, 30)])
+    def test_records_match_event_log(self, tmp_path, make_sim, make_game):
+        # The direction changes a move implies are not stored, so this
+        # checks that every one of them is read back, in the right order.
+        log_path = str(tmp_path / 'events.log')
+        path = str(tmp_path / 'game.replay')
+        random.seed(7)
+        with events.EventLog(log_path) as log:
+            make_sim(make_game(), events=log).run(max_ticks=60)
+        random.seed(7)
+        game = make_game()
+        with replay.Recorder(path, game, every=7) as recorder:
+            make_sim(game, events=recorder).run(max_ticks=60)
+        rank = {events.MOVE: 0, events.DIRECTION: 1}
+        logged = sorted((tuple(record) for record in
+                         events.read_events(log_path)),
+                        key=lambda record: (record[0],
+                                            rank.get(record[1], 2)))
+        assert list(replay.Replay(path).records()) == logged
+
+    def test_records_and_truncation(self, tmp_path):
+        path = str(tmp_path / 'game.replay')
+        random.seed(5)
+        game = games.ZombieTag(25, trees.QuadTree((250, 250)), 40, 4, 25)
+        start = live_state(game)
+        states = [start]
+        with replay.Recorder(path, game, every=10) as recorder:
+            sim = simulator.Simulator(game, events=recorder)
+            while not sim.finished and sim.tick < 50:
+                sim.step()
+                states.append(live_state(game))
+        recorded = replay.Replay(path)
+        locations = {name: state[0] for name, state in start.items()}
+        for record in recorded.records():
+            assert record[1] in events.FIELDS
+            assert len(record) == 2 + len(events.FIELDS[record[1]])
+            if record[1] == events.MOVE:
+                locations[record[2]] = (record[3], record[4])
+        assert locations == {name: state[0] for name, state in
+                             states[-1].items()}
+        with open(path, 'rb') as file:
+            data = file.read()
+        with open(path, 'wb') as file:
+            file.write(data[:len(data) // 2])
+        cut = replay.Replay(path)
+        assert 0 < cut.end < recorded.end
+        assert cut.seek(cut.end - 1) == states[cut.end - 1]
+
+    def test_not_a_replay(self, tmp_path):
+        path = tmp_path / 'game.replay'
+        path.write_bytes(b'TAGC' + bytes(20))
+        with pytest.raises(ValueError):
+            replay.Replay(str(path))
+
+class ReplayTests:
+    def test_play(self, tmp_path):
+        path = str(tmp_path / 'game.replay')
+        random.seed(2)
+        game = games.EliminationTag(12, self.make_tree(), 4, 30)
+        with replay.Recorder(path, game, every=5) as recorder:
+            simulator.Simulator(game, events=recorder).run(max_ticks=40)
+        field = self.make_tree()
+        ticks = list(replay.Replay(path).play(field, start=3))
+        assert ticks == list(range(4, 41))
+        locations = {name: player.get_location()
+                     for name, player in game.get_players().items()}
+        assert sorted(field.names_in_box(*field.bounds())) == \
+            sorted(locations)
+        assert all(field.contains_point(point)
+                   for point in locations.values())
+
+
+class TestReplayQuadTree(ReplayTests):
+    def make_tree(self):
+        return trees.QuadTree((250, 250))
+
+
+class TestReplay2DTree(ReplayTests):
+    def make_tree(self):
+        return trees.TwoDTree((0, 0), (500, 500))
+
+
+##### BENCHMARKS #####
+
+class TestBenchmarks:
+    @pytest.mark.parametrize('distribution', benchmarks.DISTRIBUTIONS)
+    def test_points(self, distribution):
+        side = benchmarks.field_size(999)
+        ps = benchmarks.points(distribution, 999, side, seed=3)
+        assert len(ps) == len(set(ps)) == 999
+        assert all(0 <= x <= side and 0 <= y <= side for x, y in ps)
+        assert ps == benchmarks.points(distribution, 999, side, seed=3)
+
+    def test_run_and_compare(self, tmp_path):
+        baseline = benchmarks.run(sizes=(60,), distributions=('sorted',),
+                                  budget=0.2)
+        results = baseline['results']
+        assert results['QuadTree/sorted/60/balance'] is None
+        for backend in benchmarks.BACKENDS:
+            assert results[backend + '/sorted/60/insert']['ops'] == 60
+            assert results[backend + '/sorted/60/memory']['bytes'] > 0
+        path = str(tmp_path / 'baseline.json')
+        benchmarks.save(baseline, path)
+        assert benchmarks.load(path) == baseline
+        assert benchmarks.compare(baseline, baseline) == []
+        slower = benchmarks.load(path)
+        slower['results']['TwoDTree/sorted/60/insert']['ops_per_sec'] /= 2
+        slower['results']['QuadTree/sorted/60/memory']['bytes'] *= 2
+        assert [(row['key'], row['metric'])
+                for row in benchmarks.compare(baseline, slower)] == \
+            [('QuadTree/sorted/60/memory', 'bytes'),
+             ('TwoDTree/sorted/60/insert', 'ops_per_sec')]
+        assert benchmarks.compare(baseline, slower, threshold=2.0) == []
+
+    def test_run_games(self):
+        baseline = benchmarks.run_games(sizes=(12,), ticks=4, isolate=False)
+        assert sorted(baseline['results']) == sorted(
+            'game/{}/{}/12'.format(mode, field)
+            for mode in tournament.MODES for field in tournament.FIELDS)
+        for result in baseline['results'].values():
+            assert 1 <= result['ticks'] <= 4
+            assert result['ticks_per_sec'] > 0
+            assert result['alloc_bytes_per_tick'] > 0
+            assert abs(sum(result[phase + '_ms']
+                           for phase in simulator.PHASES) -
+                       result['tick_ms']) < result['tick_ms']
+        slower = {'results': {key: dict(result) for key, result in
+                              baseline['results'].items()}}
+        slower['results']['game/tag/2dtree/12']['ticks_per_sec'] /= 2
+        assert [row['key'] for row in
+                benchmarks.compare(baseline, slower)] == \
+            ['game/tag/2dtree/12']
+
+    def test_run_events(self):
+        baseline = benchmarks.run_events(sizes=(20,), modes=('zombie',),
+                                         fields=('quadtree',), ticks=3)
+        jsonl = baseline['results']['events/zombie/quadtree/20/jsonl']
+        binary = baseline['results']['events/zombie/quadtree/20/binary']
+        assert jsonl['records'] == binary['records'] > 0
+        assert binary['bytes'] < jsonl['bytes']
+        assert jsonl['log_overhead'] >= 0
+        assert jsonl['within_budget'] == \
+            (jsonl['log_overhead'] <= benchmarks.LOG_BUDGET)
+
+##### INSTRUMENT #####
+
+class InstrumentTests:
+    def test_counts(self):
+        with instrument.Counters() as counters:
+            for i, point in enumerate([(100, 100), (400, 400), (120, 80),
+                                       (300, 350)]):
+                self.tree.insert('p' + str(i), point)
+            with pytest.raises(trees.OutOfBoundsError):
+                self.tree.insert('p9', (100, 100))
+            assert self.tree.move_point((100, 100), 'N', 1) == (100, 99)
+            assert self.tree.move_point((400, 400), 'W', 300) == (100, 400)
+            assert self.tree.move_point((1, 1), 'N', 1) is None
+            names = self.tree.names_in_range((0, 0), 'SE', 150)
+        stats = counters.stats
+        assert stats['insert']['calls'] == 5
+        assert stats['insert']['errors'] == 1
+        assert stats['insert']['nodes'] >= 5
+        assert stats['insert']['max_depth'] >= 2
+        assert 'contains_point' not in stats
+        move = stats['move_point']
+        assert (move['calls'], move['in_place'], move['relocated'],
+                move['missing']) == (3, 1, 1, 1)
+        assert stats['names_in_range']['results'] == len(names) == 2
+
+    def test_disable_restores(self):
+        methods = {name: getattr(type(self.tree), name)
+                   for name in instrument.OPERATIONS
+                   if hasattr(self.tree, name)}
+        with instrument.Counters():
+            assert instrument.enabled() is not None
+            assert type(self.tree).insert is not methods['insert']
+            with pytest.raises(ValueError):
+                instrument.Counters().enable()
+        assert instrument.enabled() is None
+        assert {name: getattr(type(self.tree), name)
+                for name in methods} == methods
+        assert 'move_many' not in type(self.tree).__dict__
+
+    def test_disable_out_of_order(self):
+        cls = type(self.tree)
+        methods = dict(cls.__dict__)
+        counters = instrument.Counters()
+        tracer = tracing.Tracer()
+        counters.enable()
+        tracer.enable()
+        with pytest.raises(ValueError):
+            tracer.enable()
+        counters.disable()
+        assert instrument.enabled() is None
+        self.tree.insert('a', (100, 100))
+        assert counters.stats == {}
+        assert tracer.spans()[-1][0] == 'insert'
+        tracer.disable()
+        assert dict(cls.__dict__) == methods
+
+    def test_simulator_snapshots(self):
+        random.seed(3)
+        plain = simulator.Simulator(games.ZombieTag(20, self.tree, 30, 4, 25))
+        plain.run(max_ticks=10)
+        expected = state_of(plain)
+        random.seed(3)
+        with instrument.Counters() as counters:
+            sim = simulator.Simulator(
+                games.ZombieTag(20, type(self.tree)(*self.args), 30, 4, 25),
+                counters=counters)
+            sim.step()
+            first = sim.tick_counters
+            sim.run(max_ticks=9)
+        assert state_of(sim) == expected
+        assert first['move_many']['calls'] == 1
+        assert sim.tick_counters['move_many']['calls'] == 1
+        moves = sim.tick_counters['move_many']
+        assert moves['in_place'] + moves['relocated'] + moves['rejected'] \
+            + moves['missing'] == len(sim.game.get_players())
+
+
+class TestInstrumentQuadTree(InstrumentTests):
+    args = ((250, 250),)
+
+    def setup_method(self):
+        self.tree = trees.QuadTree(*self.args)
+
+
+class TestInstrument2DTree(InstrumentTests):
+    args = ((0, 0), (500, 500))
+
+    def setup_method(self):
+        self.tree = trees.TwoDTree(*self.args)
+
+##### TRACING #####
+
+class TestTracing:
+    def test_ring_buffer(self):
+        tracer = tracing.Tracer(capacity=4)
+        for i in range(10):
+            tracer.record(str(i), tracing.PHASE, i, i + 1)
+        assert [span[0] for span in tracer.spans()] == ['6', '7', '8', '9']
+        assert [span[0] for span in tracer.spans(since=9.5)] == ['9']
+
+    def test_dump_slow_ticks(self, tmp_path):
+        tracer = tracing.Tracer(budget=0.0, directory=str(tmp_path),
+                                max_dumps=2)
+        random.seed(1)
+        sim = simulator.EventSimulator(
+            games.ZombieTag(10, trees.QuadTree((250, 250)), 50, 4, 30),
+            tracer=tracer)
+        sim.run(max_ticks=4)
+        assert len(tracer.dumps) == 2
+        with open(tracer.dumps[1]) as file:
+            trace = json.load(file)
+        events = trace['traceEvents']
+        assert {event['ph'] for event in events} == {'M', 'X'}
+        assert [event['name'] for event in events
+                if event.get('cat') == tracing.TICK] == ['tick 0', 'tick 1']
+
+
+class TracingTests:
+    def test_simulator_spans(self):
+        random.seed(8)
+        plain = simulator.Simulator(
+            games.Tag(15, self.make_tree(), 50, 4, 30))
+        plain.run(max_ticks=5)
+        expected = state_of(plain)
+        random.seed(8)
+        tracer = tracing.Tracer()
+        sim = simulator.Simulator(games.Tag(15, self.make_tree(), 50, 4, 30),
+                                  tracer=tracer)
+        original = type(sim.game.field).move_many
+        with tracer:
+            sim.run(max_ticks=5)
+        assert type(sim.game.field).move_many is original
+        assert state_of(sim) == expected
+        events = tracer.events()
+        ticks = [event for event in events if event['cat'] == tracing.TICK]
+        assert [event['name'] for event in ticks] == \
+            ['tick ' + str(i) for i in range(5)]
+        assert all(event['args']['players'] == 15 for event in ticks)
+        phases = [event['name'] for event in events
+                  if event['cat'] == tracing.PHASE]
+        assert phases == list(simulator.PHASES) * 5
+        moves = [event for event in events if event['name'] == 'move_many']
+        assert len(moves) == 5
+        assert all(event['args']['items'] == 15 for event in moves)
+        assert all(event['ts'] >= 0 and event['dur'] >= 0
+                   for event in events)
+
+
+class TestTracingQuadTree(TracingTests):
+    def make_tree(self):
+        return trees.QuadTree((250, 250))
+
+
+class TestTracing2DTree(TracingTests):
+    def make_tree(self):
+        return trees.TwoDTree((0, 0), (500, 500))
+
+##### MEMORY #####
+
+class MemoryTests:
+    def test_report(self):
+        random.seed(3)
+        game = games.Tag(50, self.make_tree(), 5, 8, 6)
+        result = memory.report(game)
+        assert list(result) == list(memory.CATEGORIES)
+        assert all(counts['bytes'] > 0 for counts in result.values())
+        assert result['names']['objects'] == len(game.get_players())
+        assert result['nodes']['bytes'] == \
+            memory.tree_report(game.field)['nodes']['bytes']
+        assert result['nodes']['unread'] == 0
+        assert memory.total(result) > memory.total(
+            memory.tree_report(game.field))
+
+    def test_report_loaded_tree(self, tmp_path):
+        random.seed(5)
+        game = games.Tag(40, self.make_tree(), 5, 8, 6)
+        path = str(tmp_path / 'field')
+        game.field.dump(path)
+        size = game.field.size()
+        game.field = type(game.field).load(path)
+        result = memory.report(game)
+        assert result['nodes']['objects'] == 2
+        assert result['nodes']['unread'] == 1
+        assert game.field.size() == size
+        result = memory.tree_report(game.field)
+        assert result['nodes']['objects'] == 2 * size
+        assert result['nodes']['unread'] == 0
+        assert result['names']['objects'] == 40
+
+
+class TestMemoryQuadTree(MemoryTests):
+    def make_tree(self):
+        return trees.QuadTree((250, 250))
+
+
+class TestMemory2DTree(MemoryTests):
+    def make_tree(self):
+        return trees.TwoDTree((0, 0), (500, 500))
+
+
+class TestMemory:
+    def test_relationship_entries(self):
+        for n in (20, 200):
+            random.seed(n)
+            tag = games.Tag(n, trees.QuadTree((250, 250)), 5, 8, 6)
+            players = len(tag.get_players())
+            assert memory.report(tag)['relationships']['entries'] == \
+                2 * (players - 1)
+            random.seed(n)
+            zombie = games.ZombieTag(n, trees.QuadTree((250, 250)), 5, 8, 6)
+            assert memory.report(zombie)['relationships']['entries'] == 0
+
+    def test_phase_peaks(self):
+        random.seed(4)
+        peaks = memory.PhaseMemory()
+        sim = simulator.Simulator(
+            games.Tag(30, trees.QuadTree((250, 250)), 50, 4, 30),
+            memory=peaks)
+        sim.run(max_ticks=2)
+        assert peaks.peaks == {}
+        with peaks:
+            sim.run(max_ticks=3)
+        assert sorted(peaks.peaks) == sorted(simulator.PHASES)
+        assert all(peak >= 0 for peak in peaks.peaks.values())
+        assert all(peaks.tick_peaks[phase] <= peaks.peaks[phase]
+                   for phase in simulator.PHASES)
+
+
+##### SCENARIOS #####
+
+class TestScenarios:
+    @pytest.mark.parametrize('distribution', scenarios.DISTRIBUTIONS)
+    @pytest.mark.parametrize('n, side', [(0, 500), (1, 500), (999, 500),
+                                         (100, 20)])
+    def test_points(self, distribution, n, side):
+        ps = scenarios.points(distribution, n, side, seed=5)
+        assert len(ps) == len(set(ps)) == n
+        assert all(0 <= x <= side and 0 <= y <= side for x, y in ps)
+        assert ps == scenarios.points(distribution, n, side, seed=5)
+
+    def test_tournament_scenario(self):
+        config = {'mode': 'elimination', 'field': '2dtree', 'n_players': 30,
+                  'max_speed': 3, 'max_vision': 6, 'scenario': 'grid'}
+        first = tournament.make_game(config)
+        second = tournament.make_game(config)
+        assert len(first.get_players()) == 30
+        assert {name: player.get_location() for name, player
+                in first.get_players().items()} != \
+            {name: player.get_location() for name, player
+             in second.get_players().items()}
+        config['scenario_seed'] = 7
+        spawns = scenarios.points('grid', 30, seed=7)
+        assert [player.get_location() for player in
+                tournament.make_game(config).get_players().values()] == \
+            [spawns[0], spawns[29]] + spawns[1:29]
+
+
+class ScenarioTests:
+    def test_games_spawn_from_scenario(self):
+        spawns = scenarios.points('adversarial', 41)
+        for game in (games.Tag(41, self.make_tree(), 5, 8, 6, spawns),
+                     games.ZombieTag(40, self.make_tree(), 5, 8, 6, spawns),
+                     games.EliminationTag(41, self.make_tree(), 8, 6, spawns)):
+            players = game.get_players()
+            assert len(players) == 41
+            assert all(players['p' + str(i)].get_location() == point
+                       and game.field.contains_point(point)
+                       for i, point in enumerate(spawns))
+
+
+class TestScenariosQuadTree(ScenarioTests):
+    def make_tree(self):
+        return trees.QuadTree((250, 250))
+
+
+class TestScenarios2DTree(ScenarioTests):
+    def make_tree(self):
+        return trees.TwoDTree((0, 0), (500, 500))
+
+
+##### SPAWNING #####
+
+class TestSpread:
+    @pytest.mark.parametrize('separation', [1, 2, 5, 12])
+    def test_separation(self, separation):
+        cells = (-(-501 // separation)) ** 2
+        n = min(2000, cells // 3)
+        ps = scenarios.spread(n, separation=separation,
+                              rng=random.Random(separation))
+        assert len(ps) == n
+        assert all(0 <= x <= 500 and 0 <= y <= 500 for x, y in ps)
+        grid = {}
+        for x, y in ps:
+            grid.setdefault((x // separation, y // separation), []).append(
+                (x, y))
+        for (cx, cy), cell in grid.items():
+            assert len(cell) == 1
+            x, y = cell[0]
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for ox, oy in grid.get((cx + dx, cy + dy), []):
+                        assert (ox, oy) == (x, y) or \
+                            max(abs(ox - x), abs(oy - y)) >= separation
+
+    def test_too_many(self):
+        with pytest.raises(ValueError):
+            scenarios.spread(10, side=2, separation=2)
+        with pytest.raises(ValueError):
+            scenarios.spread(10, side=2)
+
+    def test_games_have_every_player(self):
+        random.seed(2)
+        assert len(games.Tag(3000, trees.QuadTree((250, 250)), 5, 8, 6)
+                   .get_players()) == 3000
+        assert len(games.ZombieTag(3000, trees.TwoDTree((0, 0), (500, 500)),
+                                   5, 8, 6).get_players()) == 3001
+
+
+##### SIMULATE #####
+
+class TestSimulate:
+    def test_same_command_same_game(self):
+        argv = ['--mode', 'elimination', '--players', '30', '--field',
+                '2dtree', '--seed', '11', '--ticks', '50']
+        first = simulate.simulate(simulate.make_parser().parse_args(argv))
+        second = simulate.simulate(simulate.make_parser().parse_args(
+            first['command'].split()[3:]))
+        assert (first['winner'], first['ticks'], first['players']) == \
+            (second['winner'], second['ticks'], second['players'])
+        assert sorted(first['phase_ms']) == sorted(simulator.PHASES)
+
+    def test_main_with_profiling(self, tmp_path, capsys):
+        trace = tmp_path / 'run.json'
+        profile = tmp_path / 'run.prof'
+        assert simulate.main(['--mode', 'zombie', '--players', '20',
+                              '--duration', '5', '--counters', '--memory',
+                              '--trace', str(trace), '--profile',
+                              str(profile)]) == 0
+        out = capsys.readouterr().out
+        assert out.startswith('command: python -m simulate --mode zombie')
+        assert 'after 5 ticks with 21 players' in out
+        assert 'counters: move_many' in out
+        assert 'peak bytes/phase: decide' in out
+        assert profile.stat().st_size > 0
+        events = json.loads(trace.read_text())['traceEvents']
+        assert sum(event['name'] == 'move_many' for event in events) == 5
+        assert instrument.enabled() is None
+
+
+##### RANDOMNESS #####
+
+class TestRandomness:
+    def test_batched_draws(self):
+        rng = randomness.BatchedRandom(1)
+        directions = ['N', 'S', 'E', 'W']
+        picks = [rng.choice(directions) for _ in range(4000)]
+        assert all(700 < picks.count(d) < 1300 for d in directions)
+        pairs = [tuple(rng.sample(directions, 2)) for _ in range(6000)]
+        assert all(a != b for a, b in pairs)
+        assert len(set(pairs)) == 12
+        assert len(rng.sample(range(1000), 5)) == 5
+        assert rng.choice(range(1000)) in range(1000)
+        with pytest.raises(IndexError):
+            rng.choice([])
+
+    def test_batched_state_after_blocks_run_out(self):
+        rng = randomness.BatchedRandom(2)
+        items = list(range(17))
+        rng.sample(items, 2)
+        # 17 * 16 items are too many to draw a choice from a block.
+        for _ in range(randomness.BLOCK):
+            rng.choice(range(17 * 16))
+        for _ in range(randomness.BLOCK - 1):
+            rng.choice(items)
+        state = rng.getstate()
+        expected = [rng.sample(items, 2) + [rng.choice(items)]
+                    for _ in range(50)]
+        rng.setstate(state)
+        assert [rng.sample(items, 2) + [rng.choice(items)]
+                for _ in range(50)] == expected
+
+    @pytest.mark.parametrize('kind', ['random', 'batched'])
+    def test_games_own_their_rng(self, kind):
+        runs = []
+        for disturb in (False, True):
+            random.seed(disturb)
+            sim = simulator.Simulator(games.Tag(
+                30, trees.QuadTree((250, 250)), 5, 4, 30,
+                rng=randomness.make_rng(kind, 6)))
+            for _ in range(20):
+                if disturb:
+                    random.random()
+                sim.step()
+            runs.append(state_of(sim)[:4])
+        assert runs[0] == runs[1]
+
+    def test_tournament_leaves_global_rng(self):
+        config = {'mode': 'zombie', 'field': 'quadtree', 'n_players': 10,
+                  'duration': 5, 'max_speed': 3, 'max_vision': 20}
+        state = random.getstate()
+        record = tournament.play(config, 0, 3)
+        assert random.getstate() == state
+        random.random()
+        assert tournament.play(config, 0, 3)['scores'] == record['scores']
+
+    @pytest.mark.parametrize('kind', ['random', 'batched'])
+    def test_checkpoint_keeps_rng(self, tmp_path, kind):
+        path = str(tmp_path / 'game.ckpt')
+        sim = simulator.Simulator(games.ZombieTag(
+            20, trees.TwoDTree((0, 0), (500, 500)), 40, 4, 25,
+            rng=randomness.make_rng(kind, 9)))
+        sim.run(max_ticks=7)
+        checkpoint.save(sim, path)
+        sim.run(max_ticks=30)
+        expected = state_of(sim)[:4], sim.game.rng.random()
+        resumed = checkpoint.load(path)
+        assert type(resumed.game.rng) is type(sim.game.rng)
+        resumed.run(max_ticks=30)
+        assert (state_of(resumed)[:4], resumed.game.rng.random()) == expected
+
+
+##### IDS #####
+
+def named_state(sim):
+    tick, finished, winner, players, _ = state_of(sim)
+    name = sim.game.get_name
+    return (tick, finished, name(winner),
+            sorted((name(key), location, direction, points,
+                    sorted(map(name, targets)), sorted(map(name, enemies)))
+                   for key, location, direction, points, targets, enemies
+                   in players))
+
+class TestIds:
+    # Up to 10 players, ids sort in the same order as names, so collisions
+    # are handled in the same order and the games play out the same.
+    SPAWNS = [(200 + 12 * i, 200 + 9 * (i % 3)) for i in range(10)]
+
+    @pytest.mark.parametrize('make_game', [
+        lambda ids: games.Tag(10, trees.QuadTree((250, 250)), 5, 4, 40,
+                              TestIds.SPAWNS, random.Random(3), ids),
+        lambda ids: games.ZombieTag(9, trees.TwoDTree((0, 0), (500, 500)),
+                                    40, 4, 40, TestIds.SPAWNS,
+                                    random.Random(5), ids),
+        lambda ids: games.EliminationTag(10, trees.QuadTree((250, 250)), 4,
+                                         40, TestIds.SPAWNS,
+                                         random.Random(3), ids)])
+    def test_ids_play_like_names(self, make_game):
+        runs = []
+        for ids in (False, True):
+            game = make_game(ids)
+            assert all(isinstance(key, int) == ids
+                       for key in game.get_players())
+            sim = simulator.Simulator(game, collision_distance=8)
+            sim.run(max_ticks=150)
+            runs.append(named_state(sim))
+        assert runs[0] == runs[1]
+
+    def test_get_player_by_name(self):
+        game = games.ZombieTag(3, trees.QuadTree((250, 250)), 5, 4, 30,
+                               ids=True)
+        assert game.get_player('p2') is game.get_player(2) is not None
+        assert game.get_player('p9') is None
+        assert game.get_player('nobody') is None
+        assert game.get_key('p2') == 2 and game.get_name(2) == 'p2'
+        assert game.get_name('humans') == 'humans'
+
+    @pytest.mark.parametrize('tree', [
+        trees.QuadTree((250, 250)), trees.TwoDTree((0, 0), (500, 500))])
+    def test_dump_keeps_ids(self, tmp_path, tree):
+        path = str(tmp_path / 'field.bin')
+        tree.insert_many([(0, (10, 10)), (1, (400, 300)), (2, (11, 12))])
+        tree.dump(path)
+        loaded = type(tree).load(path)
+        assert 0 in loaded and '0' not in loaded
+        assert sorted(loaded.names_in_range((10, 10), 'SE', 5)) == [0, 2]
+
+    @pytest.mark.parametrize('tree', [
+        trees.QuadTree((250, 250)), trees.TwoDTree((0, 0), (500, 500))])
+    def test_remove_many_ids(self, tree):
+        tree.insert_many([(i, (10 * i, 7 * i)) for i in range(20)])
+        tree.remove_many([0, 1, (20, 14), 19, 25])
+        assert sorted(tree.names_in_box((0, 0), (500, 500))) == \
+            list(range(3, 19))
+        tree.remove_many(list(range(3, 19)))
+        assert tree.is_empty()
+
+    @pytest.mark.parametrize('binary', [False, True])
+    def test_events_keep_ids(self, tmp_path, binary):
+        path = str(tmp_path / 'events.log')
+        with events.EventLog(path, binary) as log:
+            log.emit(events.MOVE, 0, 5, 6)
+            log.emit(events.ELIMINATE, None, 0)
+            log.emit(events.TAG, 'p0', 12)
+        assert list(events.read_events(path)) == [
+            (0, events.MOVE, 0, 5, 6), (0, events.ELIMINATE, None, 0),
+            (0, events.TAG, 'p0', 12)]
+
+    @pytest.mark.parametrize('make_game', [
+        lambda field: games.Tag(15, field, 5, 4, 30, ids=True),
+        lambda field: games.EliminationTag(8, field, 4, 30, ids=True)])
+    def test_checkpoint_keeps_ids(self, tmp_path, make_game):
+        path = str(tmp_path / 'game.ckpt')
+        random.seed(2)
+        sim = simulator.Simulator(make_game(trees.QuadTree((250, 250))))
+        sim.run(max_ticks=10)
+        checkpoint.save(sim, path)
+        sim.run(max_ticks=40)
+        expected = state_of(sim)
+        resumed = checkpoint.load(path)
+        assert resumed.game.ids
+        resumed.run(max_ticks=40)
+        assert state_of(resumed) == expected
+
+    def test_tournament_names_players(self):
+        config = {'mode': 'tag', 'field': 'quadtree', 'n_players': 10,
+                  'duration': 3, 'max_speed': 5, 'max_vision': 80}
+        records = [tournament.play(dict(config, ids=ids), 0, 0, 3000)
+                   for ids in (False, True)]
+        for record in records:
+            del record['wall_time']
+        assert records[0] == records[1]
+        assert any(records[1]['scores'].values())
+
+
 if __name__ == '__main__':
     pytest.main(['tests.py'])
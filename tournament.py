@@ -0,0 +1,293 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+A Monte Carlo tournament runner that plays many independent games of one
+configuration across a pool of worker processes.
+
+Every game is identified by a game id and seeded from the tournament seed and
+its game id alone, so a game gives the same result no matter which worker
+plays it or in which order the games finish. Results are appended to a CSV or
+JSONL file as soon as each game finishes, and a tournament that is restarted
+with the same file only plays the games that are not in it yet.
+
+A configuration is a dictionary such as
+    {'mode': 'zombie', 'field': 'quadtree', 'n_players': 20,
+     'duration': 30, 'max_speed': 3, 'max_vision': 10}
+where mode is one of MODES and field is one of FIELDS. Elimination tag has no
+duration. A configuration may also name a scenario, one of
+scenarios.DISTRIBUTIONS, that players spawn from instead of random points.
+Every game draws its own scenario, unless a scenario_seed is given, in which
+case every game spawns from the same one. A configuration with 'ids': True
+builds games keyed by int ids (see games.Game); their results still name
+players by name.
+"""
+from __future__ import annotations
+import csv
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+import scenarios
+from games import Game, Tag, ZombieTag, EliminationTag
+from simulator import run_to_winner
+from trees import QuadTree, TwoDTree
+
+# The game modes a configuration can name.
+MODES = ('tag', 'zombie', 'elimination')
+
+# The field backends a configuration can name.
+FIELDS = ('quadtree', '2dtree')
+
+# The columns of a result record, in the order they are written to CSV.
+COLUMNS = ('game_id', 'seed', 'winner', 'ticks', 'finished', 'wall_time',
+           'scores')
+
+
+def make_game(config: Dict[str, object],
+              rng: Optional[random.Random] = None) -> Game:
+    """ Return a new game built from <config>, drawing from <rng>, or from
+    the module-global random generator if <rng> is None.
+
+    >>> game = make_game({'mode': 'tag', 'field': '2dtree', 'n_players': 5,
+    ...                   'duration': 5, 'max_speed': 3, 'max_vision': 6})
+    >>> isinstance(game, Tag)
+    True
+    >>> game = make_game({'mode': 'zombie', 'field': 'quadtree',
+    ...                   'n_players': 50, 'duration': 5, 'max_speed': 3,
+    ...                   'max_vision': 6, 'scenario': 'clustered'})
+    >>> len(game.get_players())
+    51
+    """
+    if config['field'] == 'quadtree':
+        field = QuadTree((250, 250))
+    elif config['field'] == '2dtree':
+        field = TwoDTree((0, 0), (500, 500))
+    else:
+        raise ValueError('unknown field: ' + str(config['field']))
+    mode = config['mode']
+    spawns = None
+    if config.get('scenario') is not None:
+        seed = config.get('scenario_seed')
+        if seed is None:
+            seed = (random if rng is None else rng).getrandbits(64)
+        spawns = scenarios.points(config['scenario'], config['n_players'] +
+                                  (mode == 'zombie'), seed=seed)
+    ids = config.get('ids', False)
+    if mode == 'tag':
+        return Tag(config['n_players'], field, config['duration'],
+                   config['max_speed'], config['max_vision'], spawns, rng,
+                   ids)
+    elif mode == 'zombie':
+        return ZombieTag(config['n_players'], field, config['duration'],
+                         config['max_speed'], config['max_vision'], spawns,
+                         rng, ids)
+    elif mode == 'elimination':
+        return EliminationTag(config['n_players'], field,
+                              config['max_speed'], config['max_vision'],
+                              spawns, rng, ids)
+    raise ValueError('unknown mode: ' + str(mode))
+
+
+def game_seed(seed: int, game_id: int) -> int:
+    """ Return the seed of game <game_id> in a tournament seeded with <seed>.
+    Different game ids give unrelated seeds.
+
+    >>> game_seed(0, 1) == game_seed(0, 1)
+    True
+    >>> game_seed(0, 1) == game_seed(0, 2)
+    False
+    """
+    digest = hashlib.sha256('{}/{}'.format(seed, game_id).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def play(config: Dict[str, object], seed: int, game_id: int,
+         max_ticks: Optional[int] = None) -> Dict[str, object]:
+    """ Play game <game_id> of a tournament of <config> seeded with <seed>,
+    for at most <max_ticks> ticks, and return its result record. The game
+    draws from a generator of its own, so the module-global random
+    generator is left untouched.
+
+    >>> config = {'mode': 'zombie', 'field': 'quadtree', 'n_players': 5,
+    ...           'duration': 3, 'max_speed': 3, 'max_vision': 6}
+    >>> record = play(config, 0, 4)
+    >>> record['ticks'], record['winner'] in ('humans', 'zombies')
+    (3, True)
+    >>> play(config, 0, 4)['scores'] == record['scores']
+    True
+    """
+    this_seed = game_seed(seed, game_id)
+    start = time.perf_counter()
+    game = make_game(config, random.Random(this_seed))
+    result = run_to_winner(game, max_ticks)
+    record = result.as_dict()
+    record['winner'] = game.get_name(result.winner)
+    record['scores'] = {game.get_name(name): points
+                        for name, points in result.scores.items()}
+    record['game_id'] = game_id
+    record['seed'] = this_seed
+    record['wall_time'] = time.perf_counter() - start
+    return record
+
+
+class Tournament:
+    """ Many independent games of one configuration.
+
+    === Public Attributes ===
+    config: the configuration every game is built from.
+    seed: the seed every game's seed is derived from.
+    path: the CSV (if it ends in .csv) or JSONL file results are streamed
+    to, or None to keep results in memory only.
+    max_ticks: the most ticks any game runs for, or None for no limit.
+
+    === Private Attributes ===
+    _results: the result record of every finished game, keyed by game id.
+
+    === Representation Invariants ===
+    - every record in _results is also in the file at path, if there is one.
+    """
+    config: Dict[str, object]
+    seed: int
+    path: Optional[str]
+    max_ticks: Optional[int]
+    _results: Dict[int, Dict[str, object]]
+
+    def __init__(self, config: Dict[str, object], seed: int = 0,
+                 path: Optional[str] = None,
+                 max_ticks: Optional[int] = None) -> None:
+        """ Initialize a tournament, reading back every result already in
+        the file at <path>.
+
+        >>> t = Tournament({'mode': 'elimination', 'field': 'quadtree',
+        ...                 'n_players': 4, 'max_speed': 3, 'max_vision': 6})
+        >>> t.completed()
+        []
+        """
+        self.config = config
+        self.seed = seed
+        self.path = path
+        self.max_ticks = max_ticks
+        self._results = {}
+        if path is not None and os.path.exists(path):
+            for record in _read(path):
+                self._results[record['game_id']] = record
+
+    def completed(self) -> List[int]:
+        """ Return the ids of every finished game, in increasing order. """
+        return sorted(self._results)
+
+    def results(self) -> List[Dict[str, object]]:
+        """ Return the record of every finished game, in order of game id. """
+        return [self._results[game_id] for game_id in sorted(self._results)]
+
+    def pending(self, n_games: int) -> List[int]:
+        """ Return the ids among the first <n_games> games that have not
+        been played yet. """
+        return [game_id for game_id in range(n_games)
+                if game_id not in self._results]
+
+    def submit(self, executor: ProcessPoolExecutor,
+               n_games: int) -> List[Future]:
+        """ Submit every pending game among the first <n_games> games to
+        <executor>, and return the futures of their records. """
+        return [executor.submit(play, self.config, self.seed, game_id,
+                                self.max_ticks)
+                for game_id in self.pending(n_games)]
+
+    def collect(self, futures: Iterable[Future]) -> None:
+        """ Record the result of every future in <futures> as it finishes. """
+        for future in as_completed(futures):
+            self.record(future.result())
+
+    def record(self, record: Dict[str, object]) -> None:
+        """ Record the result of one game, appending it to the file. """
+        self._results[record['game_id']] = record
+        if self.path is not None:
+            _append(self.path, record)
+
+    def run(self, n_games: int,
+            workers: Optional[int] = None) -> List[Dict[str, object]]:
+        """ Make sure the first <n_games> games have been played, using
+        <workers> processes (as many as there are cores if None, or none at
+        all if 0), and return the records of every finished game.
+
+        >>> t = Tournament({'mode': 'zombie', 'field': '2dtree',
+        ...                 'n_players': 5, 'duration': 3, 'max_speed': 3,
+        ...                 'max_vision': 6})
+        >>> [record['game_id'] for record in t.run(3, workers=0)]
+        [0, 1, 2]
+        """
+        if workers == 0:
+            for game_id in self.pending(n_games):
+                self.record(play(self.config, self.seed, game_id,
+                                 self.max_ticks))
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                self.collect(self.submit(executor, n_games))
+        return self.results()
+
+
+def _append(path: str, record: Dict[str, object]) -> None:
+    """ Append <record> to the CSV or JSONL file at <path>, starting a new
+    line first if the file ends with a line cut short. """
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    if not new:
+        with open(path, 'rb') as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b'\n':
+                with open(path, 'a') as out:
+                    out.write('\n')
+    if path.endswith('.csv'):
+        with open(path, 'a', newline='') as file:
+            writer = csv.writer(file)
+            if new:
+                writer.writerow(COLUMNS)
+            row = dict(record)
+            row['winner'] = '' if record['winner'] is None \
+                else record['winner']
+            row['scores'] = json.dumps(record['scores'], sort_keys=True)
+            writer.writerow([row[column] for column in COLUMNS])
+    else:
+        with open(path, 'a') as file:
+            file.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def _read(path: str) -> List[Dict[str, object]]:
+    """ Return every complete record in the CSV or JSONL file at <path>.
+    A line cut short by an interrupted run is skipped. """
+    records = []
+    with open(path, newline='') as file:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(file):
+                try:
+                    records.append(
+                        {'game_id': int(row['game_id']),
+                         'seed': int(row['seed']),
+                         'winner': row['winner'] or None,
+                         'ticks': int(row['ticks']),
+                         'finished': row['finished'] == 'True',
+                         'wall_time': float(row['wall_time']),
+                         'scores': json.loads(row['scores'])})
+                except (TypeError, ValueError):
+                    continue
+        else:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['csv', 'hashlib', 'json', 'os', 'random',
+                                  'time', 'concurrent.futures', 'typing',
+                                  'games', 'scenarios', 'simulator',
+                                  'trees'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -0,0 +1,228 @@
+"""CSC148 Assignment 2 - Tag You're It!
+
+=== Module Description ===
+Tracing of ticks, tick phases and tree operations, written out as Chrome
+trace-event JSON that Perfetto (ui.perfetto.dev) or chrome://tracing opens.
+
+A Tracer keeps its spans in a ring buffer of fixed capacity: recording one
+is a single store into a preallocated list, and the oldest spans are
+overwritten once the buffer is full, so a tracer can stay on for a run of
+any length. A Simulator given a tracer records a span for every tick and
+every phase of it, with the number of players. While a tracer is enabled,
+every outermost tree operation in instrument.OPERATIONS is recorded too,
+with the size of its batch for the bulk operations.
+
+If a tracer has a budget, every tick that takes longer than it makes the
+tracer write out the spans of the last <window> seconds, up to <max_dumps>
+files, so a slow tick can be looked at after a long run.
+"""
+from __future__ import annotations
+import functools
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from instrument import NODE_METHODS, OPERATIONS, Hook, replace_methods, \
+    restore_methods
+
+# The category of every kind of span.
+TICK = 'tick'
+PHASE = 'phase'
+TREE = 'tree'
+
+# Every category of span is drawn on its own track.
+_THREADS = {TICK: 1, PHASE: 2, TREE: 3}
+
+# The operations whose first argument is a batch, whose size is recorded.
+_BATCHES = ('insert_many', 'remove_many', 'move_many')
+
+# A span: its name, category, start and end in seconds of
+# time.perf_counter, and the number of players or items it handled (or
+# None).
+Span = Tuple[str, str, float, float, Optional[int]]
+
+
+class Tracer:
+    """ A ring buffer of the most recent spans of a simulation.
+
+    === Public Attributes ===
+    capacity: the most spans kept.
+    budget: the most seconds a tick may take before the last <window>
+    seconds are written out, or None for no budget.
+    window: the seconds of spans written out when a tick is over budget.
+    directory: where spans written out for slow ticks go.
+    max_dumps: the most files written for slow ticks.
+    dumps: the path of every file written for a slow tick so far.
+
+    === Private Attributes ===
+    _spans: the ring buffer, which holds None where no span was recorded
+    yet.
+    _next: the number of spans recorded so far; the next one goes at
+    _next % capacity.
+    _origin: the perf_counter time that trace timestamps count from.
+    _hook: the tree methods replaced while this tracer is enabled, or None.
+    _depth: how many tree operations are running now.
+
+    === Representation Invariants ===
+    - capacity >= 1
+    - len(_spans) == capacity
+    """
+    capacity: int
+    budget: Optional[float]
+    window: float
+    directory: str
+    max_dumps: int
+    dumps: List[str]
+    _spans: List[Optional[Span]]
+    _next: int
+    _origin: float
+    _hook: Optional[Hook]
+    _depth: int
+
+    def __init__(self, capacity: int = 1 << 16,
+                 budget: Optional[float] = None, window: float = 5.0,
+                 directory: str = '.', max_dumps: int = 10) -> None:
+        """ Initialize an empty tracer.
+
+        >>> tracer = Tracer(capacity=2)
+        >>> for i in range(3):
+        ...     tracer.record('phase' + str(i), PHASE, i, i + 0.5, 10)
+        >>> [event['name'] for event in tracer.events()]
+        ['phase1', 'phase2']
+        """
+        self.capacity = capacity
+        self.budget = budget
+        self.window = window
+        self.directory = directory
+        self.max_dumps = max_dumps
+        self.dumps = []
+        self._spans = [None] * capacity
+        self._next = 0
+        self._origin = time.perf_counter()
+        self._hook = None
+        self._depth = 0
+
+    def record(self, name: str, category: str, start: float, end: float,
+               count: Optional[int] = None) -> None:
+        """ Record a span <name> of <category> from <start> to <end>, which
+        handled <count> players or items. """
+        self._spans[self._next % self.capacity] = (name, category, start, end,
+                                                   count)
+        self._next += 1
+
+    def tick(self, tick: int, start: float, end: float,
+             players: int) -> Optional[str]:
+        """ Record tick <tick>, which ran from <start> to <end> with
+        <players> players. If it took longer than the budget, write out the
+        last window seconds of spans and return the path written to. """
+        self.record('tick ' + str(tick), TICK, start, end, players)
+        if self.budget is None or end - start <= self.budget or \
+                len(self.dumps) >= self.max_dumps:
+            return None
+        path = os.path.join(self.directory,
+                            'trace-tick{:06d}.json'.format(tick))
+        self.dump(path, end - self.window)
+        self.dumps.append(path)
+        return path
+
+    def spans(self, since: Optional[float] = None) -> List[Span]:
+        """ Return every span kept that ends at or after the perf_counter
+        time <since> (or every span kept), oldest first. """
+        if self._next <= self.capacity:
+            kept = self._spans[:self._next]
+        else:
+            split = self._next % self.capacity
+            kept = self._spans[split:] + self._spans[:split]
+        if since is None:
+            return kept
+        return [span for span in kept if span[3] >= since]
+
+    def events(self, since: Optional[float] = None) -> List[Dict[str, object]]:
+        """ Return the spans kept that end at or after <since>, as Chrome
+        trace events: complete events with times in microseconds. """
+        events = []
+        for name, category, start, end, count in self.spans(since):
+            event = {'name': name, 'cat': category, 'ph': 'X',
+                     'ts': (start - self._origin) * 1e6,
+                     'dur': (end - start) * 1e6, 'pid': 1,
+                     'tid': _THREADS[category]}
+            if count is not None:
+                event['args'] = {'players' if category != TREE else 'items':
+                                 count}
+            events.append(event)
+        return events
+
+    def dump(self, path: str, since: Optional[float] = None) -> None:
+        """ Write the spans kept that end at or after <since> to <path> as a
+        Chrome trace. """
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid,
+                     'args': {'name': category}}
+                    for category, tid in _THREADS.items()]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': metadata + self.events(since),
+                       'displayTimeUnit': 'ms'}, file)
+
+    def enable(self, operations: Tuple[str, ...] = OPERATIONS) -> None:
+        """ Start recording every outermost tree operation in <operations>.
+        The queries every player makes each tick (names_in_range above all)
+        are most of the cost of tracing, so a long run may leave them out.
+
+        Raise a ValueError if this tracer is enabled already.
+        """
+        if self._hook is not None:
+            raise ValueError('the tracer is already enabled')
+        self._hook = replace_methods(
+            {cls: operations for cls in NODE_METHODS},
+            lambda method, cls, name: self._wrap(method, name))
+
+    def disable(self) -> None:
+        """ Stop recording tree operations. Do nothing if this tracer is not
+        enabled. """
+        if self._hook is not None:
+            restore_methods(self._hook)
+            self._hook = None
+
+    def __enter__(self) -> Tracer:
+        """ Enable this tracer for the length of a with block. """
+        self.enable()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """ Disable this tracer. """
+        self.disable()
+
+    def _wrap(self, method: Callable, name: str) -> Callable:
+        """ Return <method> wrapped to record a span <name> when it is not
+        called from within another tree operation. """
+        batch = name in _BATCHES
+        clock = time.perf_counter
+        spans = self._spans
+        capacity = self.capacity
+
+        @functools.wraps(method)
+        def wrapper(tree: object, *args: object) -> object:
+            if self._depth:
+                return method(tree, *args)
+            self._depth = 1
+            start = clock()
+            try:
+                return method(tree, *args)
+            finally:
+                # The body of record, inlined: this runs on every query.
+                end = clock()
+                self._depth = 0
+                i = self._next
+                spans[i % capacity] = (name, TREE, start, end,
+                                       len(args[0]) if batch else None)
+                self._next = i + 1
+
+        return wrapper
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(
+        config={'extra-imports': ['functools', 'json', 'os', 'time',
+                                  'typing', 'instrument'],
+                'disable': ['R0913', 'R0902', 'W0611', 'R1710', 'R1702']})
@@ -5,7 +5,11 @@ Department of Computer Science,
 University of Toronto
 """
 from __future__ import annotations
-from typing import Optional, List, Tuple, Dict
+import mmap
+import struct
+import sys
+from array import array
+from typing import Optional, List, Tuple, Dict, Set, Union
 
 
 class OutOfBoundsError(Exception):
@@ -17,6 +21,31 @@ class OutOfBoundsError(Exception):
     pass
 
 
+# The results move_many gives for a move that would leave the field, and for a
+# move onto another player.
+OUT_OF_BOUNDS = 'out of bounds'
+COLLISION = 'collision'
+
+# The layout of a dumped tree: a header, a node table of fixed-width records
+# whose first record is the root, a table of name offsets and the names
+# themselves. A record refers to other nodes and to names by index, with -1
+# for None. A QuadTree record is centre x and y, point x and y, name and the
+# nw, ne, sw and se children; a TwoDTree record is point x and y, name, the lt
+# and gt children and 1 if the split type is 'y'. Bounds are the nw and se
+# corners of the root. If every name is an int id, the kind has the _IDS bit
+# set and the names are written as decimal text.
+_MAGIC = b'TAGF'
+_VERSION = 1
+_QUAD, _TWOD = 0, 1
+_IDS = 0x100
+_HEADER = struct.Struct('<4sHH4iQQ')
+_NODES = {_QUAD: struct.Struct('<9i'), _TWOD: struct.Struct('<6i')}
+
+# The name of a player in a tree: a string, or the int id of a player in a
+# game keyed by ids. A point is always a tuple, so the two never mix up.
+Name = Union[int, str]
+
+
 class Tree:
     """
     A tree to keep track of the positions of the players on the field.
@@ -35,7 +64,7 @@ class Tree:
     their subtrees do not overlap.
     """
 
-    def __contains__(self, name: str) -> bool:
+    def __contains__(self, name: Name) -> bool:
         """ Return True if a player named <name> is stored in this tree.
 
         Runtime: O(n)
@@ -49,7 +78,7 @@ class Tree:
         """
         raise NotImplementedError
 
-    def insert(self, name: str, point: Tuple[int, int]) -> None:
+    def insert(self, name: Name, point: Tuple[int, int]) -> None:
         """Insert a player named <name> into this tree at point <point>.
 
         Raise an OutOfBoundsError if <point> is out of bounds.
@@ -62,7 +91,37 @@ class Tree:
         """
         raise NotImplementedError
 
-    def remove(self, name: str) -> None:
+    def insert_many(self, items: List[Tuple[Name, Tuple[int, int]]]) -> None:
+        """ Insert every (name, point) pair in <items> into this tree. The
+        batch is split down the tree once instead of inserting one point at a
+        time.
+
+        Raise an OutOfBoundsError naming the first item whose point is out of
+        bounds, already in the tree, or repeated within <items>. In that case
+        nothing is inserted.
+
+        Runtime: O(k log(k) + k log(n)) for k items
+        """
+        raise NotImplementedError
+
+    def _check_many(self, items: List[Tuple[Name, Tuple[int, int]]]) -> None:
+        """ Raise an OutOfBoundsError naming the first item in <items> that
+        could not be inserted into this tree.
+
+        === Precondition ===
+        - This function is only to be called on the root of a tree.
+        """
+        (left, top), (right, bottom) = self.bounds()
+        seen = set()
+        for i, (name, point) in enumerate(items):
+            x, y = point
+            if x < left or x > right or y < top or y > bottom or \
+                    point in seen or self.contains_point(point):
+                raise OutOfBoundsError('item {} ({}, {}) cannot be inserted'
+                                       .format(i, name, point))
+            seen.add(point)
+
+    def remove(self, name: Name) -> None:
         """ Remove information about a player named <name> from this tree.
 
         if a player with the <name> does not exist in the tree, the method
@@ -72,6 +131,17 @@ class Tree:
         """
         raise NotImplementedError
 
+    def remove_many(self, names_or_points: List[Union[Name, Tuple[int, int]]]) \
+            -> None:
+        """ Remove every player in <names_or_points>, each given by its name
+        or by its point. Every tuple is a point and anything else a name, so
+        int ids are names. Names or points that are not in the tree are
+        ignored. Every subtree that loses a point is restructured once.
+
+        Runtime: O(k log(n)) for k points, plus O(n) if any names are given.
+        """
+        raise NotImplementedError
+
     def remove_point(self, point: Tuple[int, int]) -> None:
         """ Remove information about a player at point <point> from this tree.
 
@@ -82,7 +152,7 @@ class Tree:
         """
         raise NotImplementedError
 
-    def move(self, name: str, direction: str, steps: int) -> \
+    def move(self, name: Name, direction: str, steps: int) -> \
             Optional[Tuple[int, int]]:
         """ Return the new location of the player named <name> after moving it
         in the given <direction> by <steps> steps.
@@ -133,8 +203,112 @@ class Tree:
         """
         raise NotImplementedError
 
+    def move_many(self, moves: List[Tuple[Tuple[int, int], str, int]]) \
+            -> List[Union[Tuple[int, int], str, None]]:
+        """ Move the player at point p by s steps in direction d for every
+        (p, d, s) in <moves>, and return the result of every move in the same
+        order: the new location of the player, OUT_OF_BOUNDS or COLLISION if
+        move_point would have raised an OutOfBoundsError for that move (the
+        player then stays where it is), or None if there is no player at p.
+
+        The moves are resolved one after another in the order given, so the
+        results and the players' locations are exactly those of calling
+        move_point once per move. A player may move into a point another
+        player left earlier in <moves> (so a chain of players following each
+        other moves together), but not into a point that is only left later
+        (so two players cannot swap places). A later move may start from the
+        point an earlier move ended at.
+
+        Moves that stay within the node they start in are done in place, and
+        every other player is taken out and put back with one remove_many and
+        one insert_many.
+
+        Runtime: O(k log(n)) for k moves
+
+        === precondition ===
+        - This function is only to be called on the root of a tree.
+        - every direction is in ['N', 'S', 'E', 'W']
+
+        >>> tree = QuadTree((100, 100))
+        >>> tree.insert('a', (10, 10))
+        >>> tree.insert('b', (20, 10))
+        >>> tree.move_many([((10, 10), 'E', 10), ((20, 10), 'E', 10),
+        ...                 ((10, 10), 'E', 10), ((50, 50), 'N', 1)])
+        ['collision', (30, 10), (20, 10), None]
+        """
+        (left, top), (right, bottom) = self.bounds()
+        # origin[p] is the point in the tree of the player now at p, for every
+        # player that has moved; vacated holds the points in the tree that no
+        # player is at any more.
+        origin = {}
+        vacated = set()
+        results = []
+        for point, direction, steps in moves:
+            if point not in origin and \
+                    (point in vacated or not self.contains_point(point)):
+                results.append(None)
+                continue
+            x, y = point
+            if direction == 'N':
+                y -= steps
+            elif direction == 'S':
+                y += steps
+            elif direction == 'E':
+                x += steps
+            else:
+                x -= steps
+            if steps == 0:
+                results.append(point)
+            elif x < left or x > right or y < top or y > bottom:
+                results.append(OUT_OF_BOUNDS)
+            elif (x, y) in origin or ((x, y) not in vacated and
+                                      self.contains_point((x, y))):
+                results.append(COLLISION)
+            else:
+                if point in origin:
+                    start = origin.pop(point)
+                else:
+                    start = point
+                    vacated.add(point)
+                origin[(x, y)] = start
+                results.append((x, y))
+        # A player may only be moved in place onto a point no other player is
+        # still at, or the tree would briefly hold that point twice.
+        relocated = []
+        for new_point, point in origin.items():
+            if new_point == point:
+                vacated.discard(point)
+            elif new_point in vacated or \
+                    not self._move_in_place(point, new_point):
+                relocated.append((point, new_point))
+        if relocated:
+            names = [self._name_at(point) for point, _ in relocated]
+            self.remove_many([point for point, _ in relocated])
+            self.insert_many([(name, new_point) for name, (_, new_point)
+                              in zip(names, relocated)])
+        return results
+
+    def _move_in_place(self, point: Tuple[int, int],
+                       new_point: Tuple[int, int]) -> bool:
+        """ Move the player at <point> to <new_point> and return True if that
+        needs no change to the shape of this tree, else, return False, change
+        nothing.
+
+        === Precondition ===
+        - <point> is in self and <new_point> is within the bounds of self.
+        """
+        raise NotImplementedError
+
+    def _name_at(self, point: Tuple[int, int]) -> Name:
+        """ Return the name of the player at <point>.
+
+        === Precondition ===
+        - <point> is in self.
+        """
+        raise NotImplementedError
+
     def names_in_range(self, point: Tuple[int, int], direction: str,
-                       distance: int) -> List[str]:
+                       distance: int) -> List[Name]:
         """ Return a list of names of players whose location is in the
         <direction> relative to <point> and whose location is within <distance>
         along both the x and y axis.
@@ -154,6 +328,16 @@ class Tree:
         """
         raise NotImplementedError
 
+    def names_in_box(self, nw: Tuple[int, int],
+                     se: Tuple[int, int]) -> List[Name]:
+        """ Return a list of names of players whose location is in the
+        rectangle with north-west corner <nw> and south-east corner <se>
+        (include corner points).
+
+        Runtime: faster than O(n) when the rectangle is small.
+        """
+        raise NotImplementedError
+
     def size(self) -> int:
         """ Return the number of nodes in <self>. For an empty tree, it still
         has size of 1.
@@ -195,6 +379,29 @@ class Tree:
         """
         raise NotImplementedError
 
+    def bounds(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """ Return the north-west and south-east corners of the rectangle
+        described by this tree.
+
+        === Precondition ===
+        - This function is only to be called on the root of a tree.
+
+        Runtime: O(1)
+        """
+        raise NotImplementedError
+
+    def dump(self, path: str) -> None:
+        """ Write this tree to the file at <path> in a flat binary layout,
+        which the load method of the same class reads back. The tree is
+        walked without recursion, so any depth of tree can be written.
+
+        === Precondition ===
+        - This function is only to be called on the root of a tree.
+
+        Runtime: O(n)
+        """
+        raise NotImplementedError
+
 
 class QuadTree(Tree):
     """
@@ -230,7 +437,7 @@ class QuadTree(Tree):
     and in one of the other subtrees otherwise.
     """
     _centre: Tuple[int, int]
-    _name: Optional[str]
+    _name: Optional[Name]
     _point: Optional[Tuple[int, int]]
     _ne: Optional[QuadTree]
     _nw: Optional[QuadTree]
@@ -259,7 +466,7 @@ class QuadTree(Tree):
         self._se = None
         self._sw = None
 
-    def __contains__(self, name: str) -> bool:
+    def __contains__(self, name: Name) -> bool:
         """ Return True if a player named <name> is stored in this tree.
 
         >>> tree = QuadTree((100, 100))
@@ -294,18 +501,21 @@ class QuadTree(Tree):
         """
         x, y = self._centre
         x1, y1 = point
-        if self.is_empty():
+        if x1 < 0 or y1 < 0 or x1 > 2 * x or y1 > 2 * y:
             return False
-        elif self._point == point:
+        return self._help_contains(point)
+
+    def _help_contains(self, point: Tuple[int, int]) -> bool:
+        """ Return True if a player at location <point> is stored in this
+        subtree. The bounds are only checked on the root, since a rounded
+        down _centre does not describe the bounds of a subtree exactly.
+
+        Runtime: O(log(n))
+        """
+        if self._point == point:
             return True
-        elif x1 < 0 or y1 < 0 or x1 > 2 * x or y1 > 2 * y:
-            return False
-        else:
-            subtree = self._point_position(point)[0]
-            if subtree and subtree.contains_point(point):
-                return True
-            else:
-                return False
+        subtree = self._point_position(point)[0]
+        return subtree is not None and subtree._help_contains(point)
 
     def _point_position(self, point: Tuple[int, int]) -> Tuple[QuadTree, str]:
         """ Return the subtree in the direction that <point> is in.
@@ -323,7 +533,7 @@ class QuadTree(Tree):
         else:
             return self._se, 'se'
 
-    def insert(self, name: str, point: Tuple[int, int]) -> None:
+    def insert(self, name: Name, point: Tuple[int, int]) -> None:
         """Insert a player named <name> into this tree at point <point>. This
         point is inserted to a leaf node in this tree.
 
@@ -351,81 +561,139 @@ class QuadTree(Tree):
         if x1 > 2 * x or y1 > 2 * y or x1 < 0 or y1 < 0 or \
                 self.contains_point(point):
             raise OutOfBoundsError
-        self._help_insert(point, (0, 0), name)
+        self._help_insert(point, ((0, 0), (2 * x, 2 * y)), name)
 
-    def _help_insert(self, point: Tuple[int, int], o_point: Tuple[int, int],
-                     name: str) -> None:
+    def _help_insert(self, point: Tuple[int, int],
+                     region: Tuple[Tuple[int, int], Tuple[int, int]],
+                     name: Name) -> None:
         """
         Insert a player named <name> into this tree at point <point>, and this
-        tree has original point at <o_point>.
+        tree describes the rectangle <region>, given by its north-west and
+        south-east corners.
         === Precondition ===
         - The point <point> is in bound
         - The point <point> is not in this tree before insert.
         """
-        x0, y0 = o_point
-        x, y = self._centre
         if self.is_empty():
             self._name, self._point = name, point
         elif self.is_leaf():
-            self._help_insert1(self._point, (x0, y0), self._name)
+            self._help_insert1(self._point, region, self._name)
             self._name, self._point = None, None
-            self._help_insert(point, (x0, y0), name)
+            self._help_insert(point, region, name)
         else:
             subtree, pos = self._point_position(point)
             if subtree:
-                if pos == 'nw':
-                    subtree._help_insert(point, (x0, y0), name)
-                elif pos == 'ne':
-                    subtree._help_insert(point, (x, y0), name)
-                elif pos == 'sw':
-                    subtree._help_insert(point, (x0, y), name)
-                else:
-                    subtree._help_insert(point, (x, y), name)
+                subtree._help_insert(point, self._child_region(region, pos),
+                                     name)
             else:
-                self._help_insert1(point, (x0, y0), name)
+                self._help_insert1(point, region, name)
 
-    def _help_insert1(self, point: Tuple[int, int], o_point: Tuple[int, int],
-                      name: str) -> None:
+    def _help_insert1(self, point: Tuple[int, int],
+                      region: Tuple[Tuple[int, int], Tuple[int, int]],
+                      name: Name) -> None:
         """
         Insert a player named <name> into this tree at point <point>,  this tree
-        has original point at <o_point> and we need to build a new subtree
+        describes the rectangle <region> and we need to build a new subtree
         before adding this point.
 
         === Precondition ===
         - The point <point> is in bound
         - The point <point> is not in this tree before insert.
         """
-        x0, y0 = o_point
+        child = self._new_child(region, self._point_position(point)[1])
+        child._point = point
+        child._name = name
+
+    def _new_child(self, region: Tuple[Tuple[int, int], Tuple[int, int]],
+                   pos: str) -> QuadTree:
+        """ Create an empty subtree of this tree, which describes the
+        rectangle <region>, in the quadrant <pos>, and return it. The centre
+        of the subtree is the centre of its rectangle, rounded down.
+        """
+        (x0, y0), (x1, y1) = self._child_region(region, pos)
+        child = QuadTree(((x0 + x1) // 2, (y0 + y1) // 2))
+        if pos == 'nw':
+            self._nw = child
+        elif pos == 'sw':
+            self._sw = child
+        elif pos == 'ne':
+            self._ne = child
+        else:
+            self._se = child
+        return child
+
+    def _child_region(self, region: Tuple[Tuple[int, int], Tuple[int, int]],
+                      pos: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """ Return the rectangle described by the subtree in quadrant <pos> of
+        this tree, which describes the rectangle <region>. Points on the
+        centre lines belong to the north and west quadrants, so every
+        quadrant of a rectangle at least 2 wide or tall is smaller than it.
+        """
+        (x0, y0), (x1, y1) = region
         x, y = self._centre
-        x1, y1 = point
-        length_x = x - x0
-        length_y = y - y0
-        if length_x < 2:
-            length_x = 2
-        if length_y < 2:
-            length_y = 2
-        if x1 <= x and y1 <= y:
-            self._nw = QuadTree((int(1 / 2 * length_x) + x0,
-                                 int(1 / 2 * length_y) + y0))
-            self._nw._point = x1, y1
-            self._nw._name = name
-        elif x1 <= x and y < y1:
-            self._sw = QuadTree((int(1 / 2 * length_x) + x0,
-                                 int(3 / 2 * length_y) + y0))
-            self._sw._point = x1, y1
-            self._sw._name = name
-        elif x < x1 and y1 <= y:
-            self._ne = QuadTree((int(3 / 2 * length_x) + x0,
-                                 int(1 / 2 * length_y) + y0))
-            self._ne._point = x1, y1
-            self._ne._name = name
+        if pos == 'nw':
+            return (x0, y0), (x, y)
+        elif pos == 'ne':
+            return (x + 1, y0), (x1, y)
+        elif pos == 'sw':
+            return (x0, y + 1), (x, y1)
         else:
-            self._se = QuadTree((int(3 / 2 * length_x) + x0,
-                                 int(3 / 2 * length_y) + y0))
-            self._se._point = x1, y1
-            self._se._name = name
+            return (x + 1, y + 1), (x1, y1)
+
+    def insert_many(self, items: List[Tuple[Name, Tuple[int, int]]]) -> None:
+        """ Insert every (name, point) pair in <items> into this tree. The
+        batch is partitioned into quadrants once per node, which builds the
+        same tree as inserting the items one at a time.
+
+        Raise an OutOfBoundsError naming the first item whose point is out of
+        bounds, already in the tree, or repeated within <items>. In that case
+        nothing is inserted.
+
+        Runtime: O(k log(n)) for k items
+
+        >>> tree = QuadTree((100, 100))
+        >>> tree.insert('a', (90, 90))
+        >>> tree.insert_many([('b', (150, 150)), ('c', (10, 190))])
+        >>> tree.contains_point((10, 190)) and 'b' in tree
+        True
+        >>> tree.insert_many([('d', (20, 20)), ('e', (90, 90))])
+        Traceback (most recent call last):
+        ...
+        trees.OutOfBoundsError: item 1 (e, (90, 90)) cannot be inserted
+        >>> 'd' in tree
+        False
+        """
+        self._check_many(items)
+        if items:
+            self._help_insert_many([(point, name) for name, point in items],
+                                   self.bounds())
+
+    def _help_insert_many(self, items: List[Tuple[Tuple[int, int], Name]],
+                          region: Tuple[Tuple[int, int],
+                                        Tuple[int, int]]) -> None:
+        """ Insert every (point, name) pair in <items> into this tree, which
+        describes the rectangle <region>.
 
-    def remove(self, name: str) -> None:
+        === Precondition ===
+        - <items> is not empty.
+        - every point in <items> is in bound, and not in this tree.
+        """
+        if self.is_empty() and len(items) == 1:
+            self._point, self._name = items[0]
+            return
+        if self.is_leaf() and not self.is_empty():
+            items = items + [(self._point, self._name)]
+            self._name, self._point = None, None
+        parts = {}
+        for item in items:
+            parts.setdefault(self._point_position(item[0])[1], []).append(item)
+        for pos, part in parts.items():
+            subtree = self._point_position(part[0][0])[0]
+            if subtree is None:
+                subtree = self._new_child(region, pos)
+            subtree._help_insert_many(part, self._child_region(region, pos))
+
+    def remove(self, name: Name) -> None:
         """ Remove information about a player named <name> from this tree.
         if self contains a tree with only one leaf subtree, the name
         and point of this subtree is promoted to the parent node.
@@ -519,37 +787,104 @@ class QuadTree(Tree):
         >>> tree.is_leaf()
         True
         """
-        x, y = self._centre
-        x1, y1 = point
+        if self.contains_point(point):
+            self._help_remove_point(point)
+
+    def _help_remove_point(self, point: Tuple[int, int]) -> None:
+        """ Remove information about the player at point <point> from this
+        subtree, promoting a single remaining leaf to this node.
+
+        === Precondition ===
+        - The point <point> is in this subtree.
+        """
         if self._point == point:
             self._name, self._point = None, None
-        elif 0 <= x1 <= 2 * x and 0 <= y1 <= 2 * y:
-            if x1 <= x and y1 <= y and self._nw and \
-                    self._nw.contains_point(point):
-                self._nw.remove_point(point)
+        else:
+            pos = self._point_position(point)[1]
+            if pos == 'nw':
+                self._nw._help_remove_point(point)
                 if self._nw.is_empty():
                     self._nw = None
-                self._check_one_child()
-            elif x1 <= x and y < y1 and self._sw and \
-                    self._sw.contains_point(point):
-                self._sw.remove_point(point)
+            elif pos == 'sw':
+                self._sw._help_remove_point(point)
                 if self._sw.is_empty():
                     self._sw = None
-                self._check_one_child()
-            elif x < x1 and y1 <= y and self._ne and \
-                    self._ne.contains_point(point):
-                self._ne.remove_point(point)
+            elif pos == 'ne':
+                self._ne._help_remove_point(point)
                 if self._ne.is_empty():
                     self._ne = None
-                self._check_one_child()
             else:
-                if self._se and self._se.contains_point(point):
-                    self._se.remove_point(point)
-                    if self._se.is_empty():
+                self._se._help_remove_point(point)
+                if self._se.is_empty():
+                    self._se = None
+            self._check_one_child()
+
+    def remove_many(self, names_or_points: List[Union[Name, Tuple[int, int]]]) \
+            -> None:
+        """ Remove every player in <names_or_points>, each given by its name
+        or by its point. Names or points that are not in the tree are ignored.
+        The points are partitioned down the tree once, and every node that
+        loses a point is restructured once, after all of its subtrees.
+
+        Runtime: O(k log(n)) for k points, plus O(n) if any names are given.
+
+        >>> tree = QuadTree((100, 100))
+        >>> tree.insert_many([('a', (90, 90)), ('b', (150, 150)),
+        ...                   ('c', (10, 190))])
+        >>> tree.remove_many(['a', (150, 150), 'z', (1, 1)])
+        >>> tree.is_leaf() and 'c' in tree
+        True
+        """
+        points = set()
+        names = set()
+        for item in names_or_points:
+            if isinstance(item, tuple):
+                points.add(item)
+            else:
+                names.add(item)
+        if names:
+            self._collect_points(names, points)
+        if points and not self.is_empty():
+            self._help_remove_many(points)
+
+    def _collect_points(self, names: Set[Name],
+                        points: Set[Tuple[int, int]]) -> None:
+        """ Add the point of every player in this tree whose name is in
+        <names> to <points>.
+        """
+        if self._name is not None and self._name in names:
+            points.add(self._point)
+        for subtree in (self._nw, self._ne, self._sw, self._se):
+            if subtree is not None:
+                subtree._collect_points(names, points)
+
+    def _help_remove_many(self, points: Set[Tuple[int, int]]) -> None:
+        """ Remove every player at a point in <points> from this subtree,
+        promoting a single remaining leaf to this node.
+        """
+        if self.is_leaf():
+            if self._point in points:
+                self._name, self._point = None, None
+            return
+        parts = {}
+        for point in points:
+            parts.setdefault(self._point_position(point)[1], set()).add(point)
+        for pos, part in parts.items():
+            subtree = self._point_position(next(iter(part)))[0]
+            if subtree is not None:
+                subtree._help_remove_many(part)
+                if subtree.is_empty():
+                    if pos == 'nw':
+                        self._nw = None
+                    elif pos == 'ne':
+                        self._ne = None
+                    elif pos == 'sw':
+                        self._sw = None
+                    else:
                         self._se = None
-                    self._check_one_child()
+        self._check_one_child()
 
-    def move(self, name: str, direction: str, steps: int) -> \
+    def move(self, name: Name, direction: str, steps: int) -> \
             Optional[Tuple[int, int]]:
         """ Return the new location of the player named <name> after moving it
         in the given <direction> by <steps> steps.
@@ -604,7 +939,7 @@ class QuadTree(Tree):
             self.insert(name, (x0, y0))
             return x0, y0
 
-    def _find_point(self, name: str) -> Tuple[int, int]:
+    def _find_point(self, name: Name) -> Tuple[int, int]:
         """
         Return the point of the player with the name <name> located at in this
         tree.
@@ -679,11 +1014,8 @@ class QuadTree(Tree):
             if x0 > 2 * x or y0 > 2 * y or x0 < 0 or y0 < 0 \
                     or self.contains_point((x0, y0)):
                 raise OutOfBoundsError
-            point_tree = self._find_point_tree(point)
-            name = point_tree._name
-            if self._check_bound(point_tree, (x0, y0)):
-                point_tree._point = x0, y0
-            else:
+            if not self._check_side(point, (x0, y0)):
+                name = self._find_point_tree(point)._name
                 self.remove_point(point)
                 self.insert(name, (x0, y0))
             return x0, y0
@@ -703,28 +1035,47 @@ class QuadTree(Tree):
         else:
             return sub._find_point_tree(point)
 
-    def _check_bound(self, tree: QuadTree, point: Tuple[int, int]) -> bool:
-        """ Return True if <point> is within the bound of the <tree>.
+    def _check_side(self, point: Tuple[int, int],
+                    new_point: Tuple[int, int]) -> bool:
+        """ Return True if <new_point> belongs to the same leaf as <point>,
+        and change the _point attribute of that leaf to <new_point>, else,
+        return False, change nothing.
 
         === Precondition ===
-        - <tree> is a subtree of self.
-        - This function is only to be called on the root QuadTree.
+        - <point> is in self.
+        - <new_point> is within the bound of self.
 
         Runtime: O(log(n))
         """
-        dep = self.depth(tree)
-        if dep is not None:
-            length = self._centre[0] // 2 ** dep
-            return (tree._centre[0] - length < point[0] <= tree._centre[
-                0] + length
-                    and tree._centre[1] - length < point[1] <=
-                    tree._centre[1] + length)
-        else:
-            return 0 < point[0] <= tree._centre[0] * 2 and 0 < point[1] <= \
-                   tree._centre[1] * 2
+        if self.is_leaf():
+            self._point = new_point
+            return True
+        subtree, pos = self._point_position(point)
+        if self._point_position(new_point)[1] != pos:
+            return False
+        return subtree._check_side(point, new_point)
+
+    def _move_in_place(self, point: Tuple[int, int],
+                       new_point: Tuple[int, int]) -> bool:
+        """ Move the player at <point> to <new_point> and return True if
+        <new_point> belongs to the same leaf as <point>, else, return False,
+        change nothing.
+
+        === Precondition ===
+        - <point> is in self and <new_point> is within the bounds of self.
+        """
+        return self._check_side(point, new_point)
+
+    def _name_at(self, point: Tuple[int, int]) -> Name:
+        """ Return the name of the player at <point>.
+
+        === Precondition ===
+        - <point> is in self.
+        """
+        return self._find_point_tree(point)._name
 
     def names_in_range(self, point: Tuple[int, int], direction: str,
-                       distance: int) -> List[str]:
+                       distance: int) -> List[Name]:
         """ Return a list of names of players whose location is in the
         <direction> relative to <point> and whose location is within <distance>
         along both the x and y axis.
@@ -769,8 +1120,27 @@ class QuadTree(Tree):
                 y0, y)
             return self._name_in_range(left, top, right, bottom)
 
+    def names_in_box(self, nw: Tuple[int, int],
+                     se: Tuple[int, int]) -> List[Name]:
+        """ Return a list of names of players whose location is in the
+        rectangle with north-west corner <nw> and south-east corner <se>
+        (include corner points).
+
+        Runtime: faster than O(n) when the rectangle is small (Only check the
+        subtrees which the rectangle included.)
+
+        >>> tree = QuadTree((100, 100))
+        >>> tree.insert('a', (90, 90))
+        >>> tree.insert('b', (120, 120))
+        >>> tree.names_in_box((80, 80), (100, 130))
+        ['a']
+        """
+        if self.is_empty():
+            return []
+        return self._name_in_range(nw[0], nw[1], se[0], se[1])
+
     def _name_in_range(self, left: int, top: int, right: int,
-                       bottom: int) -> List[str]:
+                       bottom: int) -> List[Name]:
         """ Return a list of names that is within the frame constructed by the
         four boundaries <left>, <top>, <right>, <bottom>. Only check the
         subtrees which the frame included.
@@ -931,6 +1301,72 @@ class QuadTree(Tree):
         """
         return self.is_leaf() and not self._name and not self._point
 
+    def bounds(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """ Return the north-west and south-east corners of the rectangle
+        described by this tree.
+
+        === Precondition ===
+        - This function is only to be called on the root QuadTree.
+
+        Runtime: O(1)
+        >>> QuadTree((250, 250)).bounds()
+        ((0, 0), (500, 500))
+        """
+        x, y = self._centre
+        return (0, 0), (2 * x, 2 * y)
+
+    def dump(self, path: str) -> None:
+        """ Write this tree to the file at <path> in a flat binary layout,
+        which QuadTree.load reads back. The tree is walked without recursion,
+        so any depth of tree can be written.
+
+        === Precondition ===
+        - This function is only to be called on the root QuadTree.
+
+        Runtime: O(n)
+
+        >>> import os, tempfile
+        >>> tree = QuadTree((100, 100))
+        >>> tree.insert_many([('a', (10, 10)), ('b', (150, 20))])
+        >>> path = os.path.join(tempfile.mkdtemp(), 'field.bin')
+        >>> tree.dump(path)
+        >>> loaded = QuadTree.load(path)
+        >>> loaded.contains_point((150, 20)), 'a' in loaded
+        (True, True)
+        """
+        nodes = [self]
+        rows = array('i')
+        names = []
+        for node in nodes:
+            if node._name is None:
+                name = -1
+            else:
+                name = len(names)
+                names.append(node._name)
+            point = (0, 0) if node._point is None else node._point
+            children = []
+            for child in (node._nw, node._ne, node._sw, node._se):
+                if child is None:
+                    children.append(-1)
+                else:
+                    children.append(len(nodes))
+                    nodes.append(child)
+            rows.extend(node._centre + point + (name,) + tuple(children))
+        _write_field(path, _QUAD, self.bounds(), rows, names)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> QuadTree:
+        """ Return the QuadTree written to the file at <path> by dump. The file
+        is mapped into memory if <mmap> is True, and read into memory
+        otherwise. No node is built until it is first used, so loading takes
+        the same time for any size of tree.
+
+        Raise a ValueError if the file at <path> does not hold a QuadTree.
+
+        Runtime: O(1), plus O(1) for every node the first time it is used.
+        """
+        return _LazyQuadTree(_FieldFile(path, _QUAD, mmap), 0)
+
 
 class TwoDTree(Tree):
     """
@@ -970,7 +1406,7 @@ class TwoDTree(Tree):
     split along the y axis, dividing into two smaller rectangles, one above
     the other.
     """
-    _name: Optional[str]
+    _name: Optional[Name]
     _point: Optional[Tuple[int, int]]
     _nw: Optional[Tuple[int, int]]
     _se: Optional[Tuple[int, int]]
@@ -1007,7 +1443,7 @@ class TwoDTree(Tree):
         self._gt = None
         self._split_type = 'x'
 
-    def __contains__(self, name: str) -> bool:
+    def __contains__(self, name: Name) -> bool:
         """ Return True if a player named <name> is stored in this tree.
 
         Runtime: O(n)
@@ -1066,7 +1502,7 @@ class TwoDTree(Tree):
                     else:
                         return False
 
-    def insert(self, name: str, point: Tuple[int, int]) -> None:
+    def insert(self, name: Name, point: Tuple[int, int]) -> None:
         """Insert a player named <name> into this tree at point <point>.
 
         Raise an OutOfBoundsError if <point> is out of bounds.
@@ -1097,7 +1533,7 @@ class TwoDTree(Tree):
             raise OutOfBoundsError
         self._help_insert(name, point)
 
-    def _help_insert(self, name: str, point: Tuple[int, int]) -> None:
+    def _help_insert(self, name: Name, point: Tuple[int, int]) -> None:
         """
         Insert a player named <name> into this tree at point <point>.
 
@@ -1141,7 +1577,97 @@ class TwoDTree(Tree):
                     else:
                         self._gt._help_insert(name, point)
 
-    def remove(self, name: str) -> None:
+    def insert_many(self, items: List[Tuple[Name, Tuple[int, int]]]) -> None:
+        """ Insert every (name, point) pair in <items> into this tree. The
+        batch is split down the tree once, and every part that falls where
+        the tree has no subtree yet becomes a new balanced subtree.
+
+        Raise an OutOfBoundsError naming the first item whose point is out of
+        bounds, already in the tree, or repeated within <items>. In that case
+        nothing is inserted.
+
+        Runtime: O(k log(k) log(k) + k log(n)) for k items
+
+        >>> tree = TwoDTree((0, 0), (500, 500))
+        >>> tree.insert_many([('a', (100, 100)), ('b', (200, 50)),
+        ...                   ('c', (300, 400))])
+        >>> tree.__getattribute__('_point')
+        (200, 50)
+        >>> tree.insert_many([('d', (600, 0))])
+        Traceback (most recent call last):
+        ...
+        trees.OutOfBoundsError: item 0 (d, (600, 0)) cannot be inserted
+        """
+        self._check_many(items)
+        if items:
+            self._help_insert_many([(point, name) for name, point in items])
+
+    def _help_insert_many(self,
+                          items: List[Tuple[Tuple[int, int], Name]]) -> None:
+        """ Insert every (point, name) pair in <items> into this tree.
+
+        === Precondition ===
+        - <items> is not empty.
+        - every point in <items> is in bound, and not in this tree.
+        """
+        if self.is_empty():
+            self._build(items)
+            return
+        i = 0 if self._split_type == 'x' else 1
+        lt = [item for item in items if item[0][i] <= self._point[i]]
+        gt = [item for item in items if item[0][i] > self._point[i]]
+        for part, subtree in ((lt, self._lt), (gt, self._gt)):
+            if not part:
+                continue
+            if subtree is None:
+                subtree = TwoDTree(None, None)
+                subtree._split_type = 'y' if i == 0 else 'x'
+                if part is lt:
+                    self._lt = subtree
+                else:
+                    self._gt = subtree
+            subtree._help_insert_many(part)
+
+    def _build(self, items: List[Tuple[Tuple[int, int], Name]]) -> None:
+        """ Make this empty tree a balanced tree of the (point, name) pairs in
+        <items>. The root is the median along _split_type, moved up past any
+        ties so that every point in _lt is <= the root.
+
+        === Precondition ===
+        - <items> is not empty.
+        - this tree is empty.
+        """
+        i = 0 if self._split_type == 'x' else 1
+        items = sorted(items, key=lambda item: item[0][i])
+        mid = len(items) // 2
+        while mid < len(items) - 1 and \
+                items[mid][0][i] == items[mid + 1][0][i]:
+            mid += 1
+        self._point, self._name = items[mid]
+        for part, is_lt in ((items[:mid], True), (items[mid + 1:], False)):
+            if part:
+                subtree = TwoDTree(None, None)
+                subtree._split_type = 'y' if i == 0 else 'x'
+                subtree._build(part)
+                if is_lt:
+                    self._lt = subtree
+                else:
+                    self._gt = subtree
+
+    def _items(self) -> List[Tuple[Tuple[int, int], Name]]:
+        """ Return the (point, name) pair of every player in this tree. """
+        items = []
+        stack = [self]
+        while stack:
+            tree = stack.pop()
+            if tree._point is not None:
+                items.append((tree._point, tree._name))
+            for subtree in (tree._lt, tree._gt):
+                if subtree is not None:
+                    stack.append(subtree)
+        return items
+
+    def remove(self, name: Name) -> None:
         """ Remove information about a player named <name> from this tree.
         There is no empty node within this tree after remove (If the root of a
         non_leaf node is removed, the root will be replaced by a closet point
@@ -1176,7 +1702,7 @@ class TwoDTree(Tree):
                 point = self._find_point(name)
                 self.remove_point(point)
 
-    def _find_point(self, name: str) -> Tuple[int, int]:
+    def _find_point(self, name: Name) -> Tuple[int, int]:
         """
         Return the point of the player with the name <name> located at in this
         tree.
@@ -1248,60 +1774,89 @@ class TwoDTree(Tree):
                     if self._gt.is_empty():
                         self._gt = None
 
+    def remove_many(self, names_or_points: List[Union[Name, Tuple[int, int]]]) \
+            -> None:
+        """ Remove every player in <names_or_points>, each given by its name
+        or by its point. Names or points that are not in the tree are ignored.
+        The points are split down the tree once. A subtree whose root is
+        removed is rebuilt once as a balanced tree of its remaining points.
+
+        Runtime: O(k log(n)) for k points, plus the size of every rebuilt
+        subtree, plus O(n) if any names are given.
+
+        >>> tree = TwoDTree((0, 0), (500, 500))
+        >>> tree.insert_many([('a', (100, 100)), ('b', (200, 50)),
+        ...                   ('c', (300, 400))])
+        >>> tree.remove_many(['b', (300, 400), 'z'])
+        >>> tree.__getattribute__('_point'), tree.is_leaf()
+        ((100, 100), True)
+        """
+        points = set()
+        names = set()
+        for item in names_or_points:
+            if isinstance(item, tuple):
+                points.add(item)
+            else:
+                names.add(item)
+        if names:
+            for point, name in self._items():
+                if name in names:
+                    points.add(point)
+        if points and not self.is_empty():
+            self._help_remove_many(points)
+
+    def _help_remove_many(self, points: Set[Tuple[int, int]]) -> None:
+        """ Remove every player at a point in <points> from this subtree.
+
+        === Precondition ===
+        - this subtree is not empty.
+        """
+        if self._point in points:
+            items = [item for item in self._items()
+                     if item[0] not in points]
+            self._lt, self._gt = None, None
+            self._point, self._name = None, None
+            if items:
+                self._build(items)
+            return
+        i = 0 if self._split_type == 'x' else 1
+        lt = {point for point in points if point[i] <= self._point[i]}
+        gt = points - lt
+        if lt and self._lt:
+            self._lt._help_remove_many(lt)
+            if self._lt.is_empty():
+                self._lt = None
+        if gt and self._gt:
+            self._gt._help_remove_many(gt)
+            if self._gt.is_empty():
+                self._gt = None
+
     def _remove_root(self) -> None:
         """
         Remove the root of this tree. If this tree is not a leaf, the root will
         be replaced by a closet point found in its descendants, so the
         _lt and _gt relationship of the descendants will be maintained.
+
+        The replacement is always the point with the biggest coordinate along
+        _split_type, so every remaining point is <= the new root and can stay
+        in (or be moved to) the _lt subtree even when coordinates are tied.
         """
         if self.is_leaf():
             self._point, self._name = None, None
-        elif self._split_type == 'x':
-            if self._lt:
-                if self._lt.is_leaf():
-                    self._point, self._name = self._lt._point, self._lt._name
-                    self._lt = None
-                else:
-                    root_node = self._lt._find_root(self._lt, 'x', 'l')
-                    self._point, self._name = root_node._point, root_node._name
-                    if root_node.is_leaf():
-                        self._lt._remove_node(root_node)
-                    else:
-                        root_node._remove_root()
-            else:
-                if self._gt.is_leaf():
-                    self._point, self._name = self._gt._point, self._gt._name
-                    self._gt = None
-                else:
-                    root_node = self._gt._find_root(self._gt, 'x', 'g')
-                    self._point, self._name = root_node._point, root_node._name
-                    if root_node.is_leaf():
-                        self._gt._remove_node(root_node)
-                    else:
-                        root_node._remove_root()
+            return
+        if not self._lt:
+            # Every point in _gt will be <= the new root, so it becomes _lt.
+            self._lt, self._gt = self._gt, None
+        if self._lt.is_leaf():
+            self._point, self._name = self._lt._point, self._lt._name
+            self._lt = None
         else:
-            if self._lt:
-                if self._lt.is_leaf():
-                    self._point, self._name = self._lt._point, self._lt._name
-                    self._lt = None
-                else:
-                    root_node = self._lt._find_root(self._lt, 'y', 'l')
-                    self._point, self._name = root_node._point, root_node._name
-                    if root_node.is_leaf():
-                        self._lt._remove_node(root_node)
-                    else:
-                        root_node._remove_root()
+            root_node = self._lt._find_root(self._lt, self._split_type, 'l')
+            self._point, self._name = root_node._point, root_node._name
+            if root_node.is_leaf():
+                self._lt._remove_node(root_node)
             else:
-                if self._gt.is_leaf():
-                    self._point, self._name = self._gt._point, self._gt._name
-                    self._gt = None
-                else:
-                    root_node = self._gt._find_root(self._gt, 'y', 'g')
-                    self._point, self._name = root_node._point, root_node._name
-                    if root_node.is_leaf():
-                        self._gt._remove_node(root_node)
-                    else:
-                        root_node._remove_root()
+                root_node._remove_root()
 
     def _find_root(self, root_node: TwoDTree, split: str, j: str) -> TwoDTree:
         """
@@ -1316,24 +1871,19 @@ class TwoDTree(Tree):
         else:
             i = 1
         cha_p = root_node._point
-        if self.is_leaf():
-            if j == 'l' and self._point[i] > cha_p[i]:
-                root_node = self
-            elif j == 'g' and self._point[i] < cha_p[i]:
-                root_node = self
-        elif self._split_type != split:
-            if self._lt and self._gt:
-                root_node = self._lt._find_root(root_node, split, j)
-                root_node = self._gt._find_root(root_node, split, j)
-            elif self._lt:
+        if j == 'l' and self._point[i] > cha_p[i]:
+            root_node = self
+        elif j == 'g' and self._point[i] < cha_p[i]:
+            root_node = self
+        if self._split_type != split:
+            if self._lt:
                 root_node = self._lt._find_root(root_node, split, j)
-            else:
-                root_node = self._gt._find_root(root_node, split, j)
-        else:
-            if j == 'l' and self._gt:
+            if self._gt:
                 root_node = self._gt._find_root(root_node, split, j)
-            elif j == 'g' and self._lt:
-                root_node = self._lt._find_root(root_node, split, j)
+        elif j == 'l' and self._gt:
+            root_node = self._gt._find_root(root_node, split, j)
+        elif j == 'g' and self._lt:
+            root_node = self._lt._find_root(root_node, split, j)
         return root_node
 
     def _remove_node(self, node: TwoDTree) -> None:
@@ -1362,7 +1912,7 @@ class TwoDTree(Tree):
             if y1 <= y:
                 if self._lt is node:
                     self._lt = None
-                elif self._gt:
+                elif self._lt:
                     self._lt._remove_node(node)
             else:
                 if self._gt is node:
@@ -1370,7 +1920,7 @@ class TwoDTree(Tree):
                 elif self._gt:
                     self._gt._remove_node(node)
 
-    def move(self, name: str, direction: str, steps: int) -> \
+    def move(self, name: Name, direction: str, steps: int) -> \
             Optional[Tuple[int, int]]:
         """
         Return the new location of the player named <name> after moving it
@@ -1493,7 +2043,7 @@ class TwoDTree(Tree):
                 self.insert(name, (x2, y2))
             return x2, y2
 
-    def _check_side(self, x1: int, y1: int, x2: int, y2: int, name: str) -> \
+    def _check_side(self, x1: int, y1: int, x2: int, y2: int, name: Name) -> \
             bool:
         """
         Return true if the new point (<x2>, <y2>) will be added to the same node
@@ -1539,7 +2089,27 @@ class TwoDTree(Tree):
                 else:
                     return False
 
-    def _find_name(self, point: Tuple[int, int]) -> str:
+    def _move_in_place(self, point: Tuple[int, int],
+                       new_point: Tuple[int, int]) -> bool:
+        """ Move the player at <point> to <new_point> and return True if
+        <new_point> would be added to the same node <point> is removed from,
+        else, return False, change nothing.
+
+        === Precondition ===
+        - <point> is in self and <new_point> is within the bounds of self.
+        """
+        return self._check_side(point[0], point[1], new_point[0],
+                                new_point[1], self._find_name(point))
+
+    def _name_at(self, point: Tuple[int, int]) -> Name:
+        """ Return the name of the player at <point>.
+
+        === Precondition ===
+        - <point> is in self.
+        """
+        return self._find_name(point)
+
+    def _find_name(self, point: Tuple[int, int]) -> Name:
         """
         Return the name of the player at the point <point> located at in this
         tree.
@@ -1563,7 +2133,7 @@ class TwoDTree(Tree):
                     return self._gt._find_name(point)
 
     def names_in_range(self, point: Tuple[int, int], direction: str,
-                       distance: int) -> List[str]:
+                       distance: int) -> List[Name]:
         """ Return a list of names of players whose location is in the
         <direction> relative to <point> and whose location is within <distance>
         along both the x and y axis.
@@ -1606,8 +2176,27 @@ class TwoDTree(Tree):
                 y0, y)
             return self._name_in_range(left, top, right, bottom)
 
+    def names_in_box(self, nw: Tuple[int, int],
+                     se: Tuple[int, int]) -> List[Name]:
+        """ Return a list of names of players whose location is in the
+        rectangle with north-west corner <nw> and south-east corner <se>
+        (include corner points).
+
+        Runtime: faster than O(n) when the rectangle is small (Only check the
+        subtrees which the rectangle included.)
+
+        >>> tree = TwoDTree((0, 0), (500, 500))
+        >>> tree.insert('a', (200, 200))
+        >>> tree.insert('b', (150, 150))
+        >>> tree.names_in_box((100, 100), (180, 300))
+        ['b']
+        """
+        if self.is_empty():
+            return []
+        return self._name_in_range(nw[0], nw[1], se[0], se[1])
+
     def _name_in_range(self, left: int, top: int, right: int,
-                       bottom: int) -> List[str]:
+                       bottom: int) -> List[Name]:
         """
         Return a list of names that is within the frame constructed by the
         four boundaries <left>, <top>, <right>, <bottom>. Only check the
@@ -1784,6 +2373,71 @@ class TwoDTree(Tree):
         """
         return self.is_leaf() and not self._name and not self._point
 
+    def bounds(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """ Return the north-west and south-east corners of the rectangle
+        described by this tree.
+
+        === Precondition ===
+        - This function is only to be called on the root TwoDTree.
+
+        Runtime: O(1)
+        >>> TwoDTree((0, 0), (500, 500)).bounds()
+        ((0, 0), (500, 500))
+        """
+        return self._nw, self._se
+
+    def dump(self, path: str) -> None:
+        """ Write this tree to the file at <path> in a flat binary layout,
+        which TwoDTree.load reads back. The tree is walked without recursion,
+        so any depth of tree can be written.
+
+        === Precondition ===
+        - This function is only to be called on the root TwoDTree.
+
+        Runtime: O(n)
+
+        >>> import os, tempfile
+        >>> tree = TwoDTree((0, 0), (500, 500))
+        >>> tree.insert_many([('a', (10, 10)), ('b', (150, 20))])
+        >>> path = os.path.join(tempfile.mkdtemp(), 'field.bin')
+        >>> tree.dump(path)
+        >>> loaded = TwoDTree.load(path)
+        >>> loaded.bounds(), loaded.names_in_box((100, 0), (200, 100))
+        (((0, 0), (500, 500)), ['b'])
+        """
+        nodes = [self]
+        rows = array('i')
+        names = []
+        for node in nodes:
+            if node._name is None:
+                name, point = -1, (0, 0)
+            else:
+                name, point = len(names), node._point
+                names.append(node._name)
+            children = []
+            for child in (node._lt, node._gt):
+                if child is None:
+                    children.append(-1)
+                else:
+                    children.append(len(nodes))
+                    nodes.append(child)
+            rows.extend(point + (name,) + tuple(children) +
+                        (int(node._split_type == 'y'),))
+        _write_field(path, _TWOD, self.bounds(), rows, names)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> TwoDTree:
+        """ Return the TwoDTree written to the file at <path> by dump. The file
+        is mapped into memory if <mmap> is True, and read into memory
+        otherwise. No node is built until it is first used, so loading takes
+        the same time for any size of tree.
+
+        Raise a ValueError if the file at <path> does not hold a TwoDTree.
+
+        Runtime: O(1), plus O(1) for every node the first time it is used.
+        """
+        return _LazyTwoDTree(_FieldFile(path, _TWOD, mmap), 0)
+
     def balance(self) -> None:
         """ Balance <self> so that there is at most a difference of 1 between
         the size of the _lt subtree and the size of the _gt subtree for all
@@ -1888,8 +2542,8 @@ class TwoDTree(Tree):
                 self._gt._split_type = 'x'
             self._gt._help_balance(lst1_x, lst1_y)
 
-    def _build_list(self) -> Tuple[List[Tuple[tuple, str]],
-                                   List[Tuple[tuple, str]]]:
+    def _build_list(self) -> Tuple[List[Tuple[tuple, Name]],
+                                   List[Tuple[tuple, Name]]]:
         """
         Return a tuple of two lists: lst_x, which records all the points
         and name from self in order from smallest to biggest, based on x, and
@@ -1898,19 +2552,194 @@ class TwoDTree(Tree):
         """
         lst_x, lst_y = [], []
         if self._lt:
-            lst_x.extend(self._lt._build_list()[0])
-            lst_y.extend(self._lt._build_list()[1])
+            lt_x, lt_y = self._lt._build_list()
+            lst_x.extend(lt_x)
+            lst_y.extend(lt_y)
         lst_x.append((self._point, self._name))
         lst_y.append(((self._point[1], self._point[0]), self._name))
         if self._gt:
-            lst_x.extend(self._gt._build_list()[0])
-            lst_y.extend(self._gt._build_list()[1])
+            gt_x, gt_y = self._gt._build_list()
+            lst_x.extend(gt_x)
+            lst_y.extend(gt_y)
         return lst_x, lst_y
 
 
+def _write_field(path: str, kind: int,
+                 bounds: Tuple[Tuple[int, int], Tuple[int, int]],
+                 rows: array, names: List[Name]) -> None:
+    """ Write a dumped tree of the given <kind> to the file at <path>, with
+    the node table <rows> and the names <names>. """
+    flags = 0
+    if names and all(type(name) is int for name in names):
+        flags = _IDS
+        names = [str(name) for name in names]
+    encoded = [name.encode() for name in names]
+    offsets = array('Q', [0])
+    total = 0
+    for name in encoded:
+        total += len(name)
+        offsets.append(total)
+    if sys.byteorder == 'big':
+        rows.byteswap()
+        offsets.byteswap()
+    (left, top), (right, bottom) = bounds
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, kind | flags, left, top,
+                                right, bottom,
+                                len(rows) // (_NODES[kind].size // 4),
+                                len(names)))
+        file.write(rows.tobytes())
+        file.write(offsets.tobytes())
+        file.write(b''.join(encoded))
+
+
+class _FieldFile:
+    """ The contents of a file written by the dump method of a tree, read
+    one record at a time.
+
+    === Public Attributes ===
+    bounds: the north-west and south-east corners of the root.
+
+    === Private Attributes ===
+    _buffer: the contents of the file, mapped into memory or read into it.
+    _node: the layout of one node record.
+    _names: where the name offsets start in _buffer.
+    _text: where the names start in _buffer.
+    _ids: whether the names are int ids.
+    """
+    bounds: Tuple[Tuple[int, int], Tuple[int, int]]
+    _buffer: Union[mmap.mmap, bytes]
+    _node: struct.Struct
+    _names: int
+    _text: int
+    _ids: bool
+
+    def __init__(self, path: str, kind: int, use_mmap: bool) -> None:
+        """ Open the file at <path>, which must hold a tree of the given
+        <kind>. """
+        with open(path, 'rb') as file:
+            if use_mmap:
+                self._buffer = mmap.mmap(file.fileno(), 0,
+                                         access=mmap.ACCESS_READ)
+            else:
+                self._buffer = file.read()
+        if len(self._buffer) < _HEADER.size:
+            raise ValueError(path + ' is not a dumped tree')
+        magic, version, found, left, top, right, bottom, n_nodes, n_names = \
+            _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION or \
+                (found & ~_IDS) != kind:
+            raise ValueError('{} is not a dumped {}'.format(
+                path, 'QuadTree' if kind == _QUAD else 'TwoDTree'))
+        self.bounds = (left, top), (right, bottom)
+        self._node = _NODES[kind]
+        self._names = _HEADER.size + n_nodes * self._node.size
+        self._text = self._names + 8 * (n_names + 1)
+        self._ids = bool(found & _IDS)
+
+    def node(self, index: int) -> Tuple[int, ...]:
+        """ Return the record of node <index>. """
+        return self._node.unpack_from(self._buffer,
+                                      _HEADER.size + index * self._node.size)
+
+    def name(self, index: int) -> Optional[Name]:
+        """ Return name <index>, or None if <index> is -1. """
+        if index < 0:
+            return None
+        start, end = struct.unpack_from('<2Q', self._buffer,
+                                        self._names + 8 * index)
+        text = bytes(self._buffer[self._text + start:
+                                  self._text + end]).decode()
+        return int(text) if self._ids else text
+
+
+class _LazyQuadTree(QuadTree):
+    """ A QuadTree node loaded from a dumped tree, which reads its attributes
+    from the file the first time any of them is used. Attributes set before
+    that are kept.
+
+    === Private Attributes ===
+    _field: the file this node is read from.
+    _index: the index of this node in the node table.
+    """
+    _field: _FieldFile
+    _index: int
+
+    def __init__(self, field: _FieldFile, index: int) -> None:
+        """ Initialize node <index> of <field> without reading it. """
+        # QuadTree.__init__ is not called: it would hide the attributes in
+        # the file.
+        self._field = field
+        self._index = index
+
+    def __getattr__(self, attr: str) -> object:
+        """ Read this node from its file, then return its attribute <attr>.
+        """
+        values = self.__dict__
+        if attr.startswith('__') or '_field' not in values:
+            raise AttributeError(attr)
+        field = values.pop('_field')
+        cx, cy, x, y, name, nw, ne, sw, se = field.node(values.pop('_index'))
+        values.setdefault('_centre', (cx, cy))
+        values.setdefault('_name', field.name(name))
+        values.setdefault('_point', None if name < 0 else (x, y))
+        for key, child in (('_nw', nw), ('_ne', ne), ('_sw', sw),
+                           ('_se', se)):
+            values.setdefault(key, None if child < 0
+                              else _LazyQuadTree(field, child))
+        if attr not in values:
+            raise AttributeError(attr)
+        return values[attr]
+
+
+class _LazyTwoDTree(TwoDTree):
+    """ A TwoDTree node loaded from a dumped tree, which reads its attributes
+    from the file the first time any of them is used. Attributes set before
+    that are kept.
+
+    === Private Attributes ===
+    _field: the file this node is read from.
+    _index: the index of this node in the node table.
+    """
+    _field: _FieldFile
+    _index: int
+
+    def __init__(self, field: _FieldFile, index: int) -> None:
+        """ Initialize node <index> of <field> without reading it. """
+        # TwoDTree.__init__ is not called: it would hide the attributes in
+        # the file.
+        self._field = field
+        self._index = index
+
+    def __getattr__(self, attr: str) -> object:
+        """ Read this node from its file, then return its attribute <attr>.
+        """
+        values = self.__dict__
+        if attr.startswith('__') or '_field' not in values:
+            raise AttributeError(attr)
+        field = values.pop('_field')
+        index = values.pop('_index')
+        x, y, name, lt, gt, split = field.node(index)
+        values.setdefault('_name', field.name(name))
+        values.setdefault('_point', None if name < 0 else (x, y))
+        if index == 0:
+            values.setdefault('_nw', field.bounds[0])
+            values.setdefault('_se', field.bounds[1])
+        else:
+            values.setdefault('_nw', None)
+            values.setdefault('_se', None)
+        values.setdefault('_lt', None if lt < 0 else _LazyTwoDTree(field, lt))
+        values.setdefault('_gt', None if gt < 0 else _LazyTwoDTree(field, gt))
+        values.setdefault('_split_type', 'y' if split else 'x')
+        if attr not in values:
+            raise AttributeError(attr)
+        return values[attr]
+
+
 if __name__ == '__main__':
     import python_ta
 
-    python_ta.check_all(config={'extra-imports': ['typing'],
+    python_ta.check_all(config={'extra-imports': ['typing', 'array', 'mmap',
+                                                  'struct', 'sys'],
                                 'disable': ['R0913', 'R0902', 'W0611', 'R1710',
                                             'R1702']})